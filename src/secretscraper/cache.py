@@ -0,0 +1,350 @@
+"""Caches of fetched responses for SecretScraper.
+
+Only what the crawler reads from a response is kept: the status, a few headers
+and the body bytes.
+
+`ResponseCache` lives in memory for one crawl. Entries expire after a TTL and
+the least recently used ones are evicted once the cached bodies exceed a byte
+budget:
+
+    cache = ResponseCache(max_bytes=64 * 2 ** 20, ttl=60)
+
+    response = cache.get(url)
+    if response is None:
+        response = cache.set(url, await client.get(url))
+
+`DiskCache` persists responses carrying an ETag or Last-Modified header in a
+SQLite file, so the next run can revalidate them with a conditional request and
+load the stored body only on a 304:
+
+    disk_cache = DiskCache("http_cache.sqlite3", max_bytes=512 * 2 ** 20)
+
+    validators = disk_cache.validators(url)
+    response = await client.get(url, headers=validators or {})
+    if response.status_code == 304:
+        response = disk_cache.revalidate(url, response.headers)  # None if evicted meanwhile
+"""
+
+import json
+import pathlib
+import sqlite3
+import threading
+import time
+import typing
+from collections import OrderedDict, namedtuple
+
+import httpx
+
+__all__ = ["ResponseCache", "DiskCache", "CachedResponse", "CacheStats", "DiskCacheStats", "CACHED_HEADERS"]
+
+CACHED_HEADERS = ("content-type", "content-length", "etag", "last-modified")
+
+CacheStats = namedtuple("CacheStats", ["hits", "misses", "evictions", "expirations", "entries", "bytes"])
+
+DiskCacheStats = namedtuple("DiskCacheStats", ["revalidated", "stored", "misses", "evictions", "entries", "bytes"])
+
+_ENTRY_OVERHEAD = 256  # rough bytes of an entry besides its body
+
+
+class CachedResponse:
+    """The parts of an `httpx.Response` used by the crawler"""
+
+    __slots__ = ("status_code", "headers", "content", "encoding")
+
+    def __init__(
+        self,
+        status_code: int,
+        headers: typing.Dict[str, str],
+        content: bytes,
+        encoding: typing.Optional[str] = None,
+    ):
+        """
+
+        :param headers: headers with lower case names
+        """
+        self.status_code = status_code
+        self.headers = headers
+        self.content = content
+        self.encoding = encoding
+
+    @classmethod
+    def from_response(cls, response: httpx.Response) -> "CachedResponse":
+        """Keep status, CACHED_HEADERS and body of a read response"""
+        headers = {name: response.headers[name] for name in CACHED_HEADERS if name in response.headers}
+        return cls(response.status_code, headers, response.content, response.encoding)
+
+    def validators(self) -> typing.Dict[str, str]:
+        """Conditional request headers to revalidate this response"""
+        return _validators(self.headers)
+
+    @property
+    def text(self) -> str:
+        return self.content.decode(self.encoding or "utf-8", errors="replace")
+
+    @property
+    def nbytes(self) -> int:
+        """Approximate memory held by the entry"""
+        return len(self.content) + _ENTRY_OVERHEAD
+
+
+def _validators(headers: typing.Dict[str, str]) -> typing.Dict[str, str]:
+    """Conditional request headers to revalidate a response of headers"""
+    validators = dict()
+    if "etag" in headers:
+        validators["If-None-Match"] = headers["etag"]
+    if "last-modified" in headers:
+        validators["If-Modified-Since"] = headers["last-modified"]
+    return validators
+
+
+class ResponseCache:
+    """LRU cache of responses bounded by total bytes, with a TTL"""
+
+    def __init__(self, max_bytes: int = 64 * 2 ** 20, ttl: float = 60):
+        """
+
+        :param max_bytes: budget of cached bytes, 0 to disable the cache
+        :param ttl: seconds an entry stays valid, 0 for no expiry
+        """
+        if max_bytes < 0:
+            raise ValueError("max_bytes must be non-negative")
+        if ttl < 0:
+            raise ValueError("ttl must be non-negative")
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, typing.Tuple[float, CachedResponse]]" = OrderedDict()
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key: str) -> typing.Optional[CachedResponse]:
+        """Cached response of key, None if absent or expired"""
+        item = self._entries.get(key)
+        if item is None:
+            self.misses += 1
+            return None
+        expires, response = item
+        if expires and expires <= time.monotonic():
+            self._remove(key)
+            self.expirations += 1
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return response
+
+    def set(self, key: str, response: typing.Union[httpx.Response, CachedResponse]) -> CachedResponse:
+        """Cache a response, evicting the least recently used entries to stay within budget
+
+        :return: the cached form of response, also returned if it does not fit in the cache
+        """
+        if not isinstance(response, CachedResponse):
+            response = CachedResponse.from_response(response)
+        if key in self._entries:
+            self._remove(key)
+        if response.nbytes > self.max_bytes:
+            return response
+        while self._bytes + response.nbytes > self.max_bytes:
+            self._remove(next(iter(self._entries)))
+            self.evictions += 1
+        expires = time.monotonic() + self.ttl if self.ttl else 0.0
+        self._entries[key] = (expires, response)
+        self._bytes += response.nbytes
+        return response
+
+    def _remove(self, key: str) -> None:
+        _, response = self._entries.pop(key)
+        self._bytes -= response.nbytes
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._bytes = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._entries
+
+    @property
+    def nbytes(self) -> int:
+        """Bytes held by the cached entries"""
+        return self._bytes
+
+    @property
+    def stats(self) -> CacheStats:
+        return CacheStats(
+            hits=self.hits,
+            misses=self.misses,
+            evictions=self.evictions,
+            expirations=self.expirations,
+            entries=len(self._entries),
+            bytes=self._bytes,
+        )
+
+
+class DiskCache:
+    """Persistent cache of revalidatable responses in a SQLite file, bounded by total bytes.
+
+    Only 200 responses with an ETag or Last-Modified header are stored. Once the
+    stored bodies exceed the budget, the least recently used ones are deleted.
+    Calls are short blocking SQLite statements, safe to make from several threads.
+    Several processes may share the file: the budget holds for the whole file, as
+    each store re-reads the stored bytes once another process has written to it.
+    """
+
+    def __init__(self, path: typing.Union[str, pathlib.Path], max_bytes: int = 512 * 2 ** 20):
+        """
+
+        :param path: SQLite file, created if missing
+        :param max_bytes: budget of stored bytes
+        """
+        if max_bytes < 0:
+            raise ValueError("max_bytes must be non-negative")
+        self.path = pathlib.Path(path)
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            "url TEXT PRIMARY KEY, status INTEGER, headers TEXT, content BLOB, encoding TEXT, "
+            "size INTEGER, accessed REAL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS responses_accessed ON responses (accessed)")
+        self._bytes: int = 0
+        self._data_version: typing.Optional[int] = None
+        self._sync_bytes()
+        self.revalidations = 0  # 304 responses answered from the stored body
+        self.stored = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def is_storable(response: CachedResponse) -> bool:
+        return response.status_code == 200 and ("etag" in response.headers or "last-modified" in response.headers)
+
+    def get(self, key: str) -> typing.Optional[CachedResponse]:
+        """Stored response of key, to be revalidated before use"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT status, headers, content, encoding FROM responses WHERE url = ?", (key,)
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+        status, headers, content, encoding = row
+        return CachedResponse(status, json.loads(headers), content, encoding)
+
+    def validators(self, key: str) -> typing.Optional[typing.Dict[str, str]]:
+        """Conditional request headers to revalidate the stored response of key, without reading its body"""
+        with self._lock:
+            row = self._conn.execute("SELECT headers FROM responses WHERE url = ?", (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+        return _validators(json.loads(row[0]))
+
+    def revalidate(
+        self, key: str, headers: typing.Optional[typing.Mapping[str, str]] = None
+    ) -> typing.Optional[CachedResponse]:
+        """Stored response of key, once the server confirmed it is fresh. None if it was evicted since
+
+        :param key: key of the stored response
+        :param headers: headers of the 304 response, whose ETag and Last-Modified replace the stored ones
+        """
+        with self._lock:
+            self._conn.execute("UPDATE responses SET accessed = ? WHERE url = ?", (time.time(), key))
+            row = self._conn.execute(
+                "SELECT status, headers, content, encoding FROM responses WHERE url = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            status, stored_headers, content, encoding = row
+            stored_headers = json.loads(stored_headers)
+            updated = {name: headers[name] for name in ("etag", "last-modified") if headers and name in headers}
+            if any(stored_headers.get(name) != value for name, value in updated.items()):
+                stored_headers.update(updated)
+                self._conn.execute(
+                    "UPDATE responses SET headers = ? WHERE url = ?", (json.dumps(stored_headers), key)
+                )
+            self.revalidations += 1
+        return CachedResponse(status, stored_headers, content, encoding)
+
+    def set(self, key: str, response: CachedResponse) -> None:
+        """Store response if it can be revalidated, evicting the least recently used entries to stay within budget"""
+        if not self.is_storable(response) or response.nbytes > self.max_bytes:
+            return
+        with self._lock:
+            # the write lock of the file, so that other processes cannot store in between
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._sync_bytes()
+                self._delete(key)
+                while self._bytes + response.nbytes > self.max_bytes:
+                    oldest = self._conn.execute("SELECT url FROM responses ORDER BY accessed LIMIT 1").fetchone()
+                    self._delete(oldest[0])
+                    self.evictions += 1
+                self._conn.execute(
+                    "INSERT INTO responses VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (
+                        key,
+                        response.status_code,
+                        json.dumps(response.headers),
+                        response.content,
+                        response.encoding,
+                        response.nbytes,
+                        time.time(),
+                    ),
+                )
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                self._data_version = None  # the deletes were rolled back, re-read the stored bytes
+                raise
+            self._bytes += response.nbytes
+            self.stored += 1
+
+    def _delete(self, key: str) -> None:
+        row = self._conn.execute("SELECT size FROM responses WHERE url = ?", (key,)).fetchone()
+        if row is not None:
+            self._conn.execute("DELETE FROM responses WHERE url = ?", (key,))
+            self._bytes -= row[0]
+
+    def _sync_bytes(self) -> None:
+        # data_version changes once another connection commits to the file, never for our own commits
+        data_version = self._conn.execute("PRAGMA data_version").fetchone()[0]
+        if data_version != self._data_version:
+            self._bytes = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+            self._data_version = data_version
+
+    def reload(self) -> None:
+        """Re-read the stored bytes, after other processes wrote to the file"""
+        with self._lock:
+            self._sync_bytes()
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+
+    @property
+    def nbytes(self) -> int:
+        """Bytes held by the stored entries"""
+        return self._bytes
+
+    @property
+    def stats(self) -> DiskCacheStats:
+        return DiskCacheStats(
+            revalidated=self.revalidations,
+            stored=self.stored,
+            misses=self.misses,
+            evictions=self.evictions,
+            entries=len(self),
+            bytes=self._bytes,
+        )
@@ -0,0 +1,249 @@
+"""Checkpoints of a crawl in a SQLite file, to resume it after a crash or an interrupt.
+
+Checkpoints are incremental: the crawler reports every url it enqueues and
+every page it finishes, and each checkpoint writes only what was reported since
+the previous one. Rows are taken on the event loop and written in a thread:
+
+    checkpoint = Checkpoint("crawl.sqlite3")
+    checkpoint.queued(url_node)
+    checkpoint.done(url_node, url_children, js_children, secrets)
+    await loop.run_in_executor(None, checkpoint.write, checkpoint.take())
+
+    state = Checkpoint("crawl.sqlite3", resume=True).load()
+
+Urls enqueued and not done, including those in flight, are crawled again on resume.
+"""
+
+import ast
+import pathlib
+import sqlite3
+import threading
+import typing
+from collections import namedtuple
+
+from .entity import Secret, URLNode
+
+__all__ = [
+    "Checkpoint",
+    "CheckpointRows",
+    "CheckpointState",
+    "node_row",
+    "secret_row",
+    "build_results",
+    "create_tables",
+    "write_rows",
+    "read_state",
+]
+
+# states of a url, a url only moves to a later state
+FOUND, QUEUED, DONE = 0, 1, 2
+# kinds of link
+URL_LINK, JS_LINK = 0, 1
+
+CheckpointRows = namedtuple("CheckpointRows", ["found", "queued", "done", "links", "secrets"])
+
+CheckpointState = namedtuple("CheckpointState", ["url_dict", "js_dict", "url_secrets", "visited", "queued"])
+
+
+def node_row(url_node: URLNode, state: int = FOUND) -> tuple:
+    """Row of the nodes table for a url node"""
+    parent = url_node.parent
+    return (
+        url_node.url,
+        url_node.depth,
+        parent.url if parent is not None else None,
+        state,
+        url_node.response_status,
+        url_node.content_length,
+        url_node.content_type,
+        url_node.title,
+    )
+
+
+def build_results(
+    rows: typing.Iterable[tuple], links: typing.Iterable[tuple], secrets: typing.Iterable[tuple]
+) -> typing.Tuple[
+    typing.Dict[str, URLNode],
+    typing.Dict[URLNode, typing.Set[URLNode]],
+    typing.Dict[URLNode, typing.Set[URLNode]],
+    typing.Dict[URLNode, typing.Set[Secret]],
+]:
+    """Url nodes and crawl results from rows of the nodes, links and secrets tables
+
+    :param rows: node rows, parents before their children
+    :return: url nodes by url, url_dict, js_dict and url_secrets
+    """
+    nodes: typing.Dict[str, URLNode] = dict()
+    for url, depth, parent_url, _, response_status, content_length, content_type, title in rows:
+        parent = nodes.get(parent_url) if parent_url is not None else None
+        nodes[url] = URLNode(
+            url=url,
+            depth=depth,
+            parent=parent if parent is not None and parent.depth < depth else None,
+            response_status=response_status,
+            content_length=content_length,
+            content_type=content_type,
+            title=title,
+        )
+    url_dict: typing.Dict[URLNode, typing.Set[URLNode]] = dict()
+    js_dict: typing.Dict[URLNode, typing.Set[URLNode]] = dict()
+    for parent_url, child_url, kind in links:
+        children = js_dict if kind == JS_LINK else url_dict
+        children.setdefault(nodes[parent_url], set()).add(nodes[child_url])
+    url_secrets: typing.Dict[URLNode, typing.Set[Secret]] = dict()
+    for url, type_, data in secrets:
+        url_secrets.setdefault(nodes[url], set()).add(Secret(type=type_, data=_load_data(data)))
+    return nodes, url_dict, js_dict, url_secrets
+
+
+def secret_row(url: str, secret: Secret) -> tuple:
+    """Row of the secrets table, data is stored as text if it is a string, as the bytes of its repr otherwise"""
+    data = secret.data if isinstance(secret.data, str) else repr(secret.data).encode("utf8")
+    return url, secret.type, data
+
+
+def _load_data(data: typing.Union[str, bytes]) -> typing.Any:
+    """Secret data of a secrets row, non-string data is evaluated as a literal only, never unpickled"""
+    if not isinstance(data, bytes):
+        return data
+    text = data.decode("utf8", errors="replace")
+    try:
+        return ast.literal_eval(text)
+    except (ValueError, SyntaxError, MemoryError, RecursionError):
+        return text  # not a literal, keep its repr
+
+
+def create_tables(conn: sqlite3.Connection) -> None:
+    """Create the nodes, links and secrets tables if missing"""
+    conn.execute(
+        "CREATE TABLE IF NOT EXISTS nodes ("
+        "url TEXT PRIMARY KEY, depth INTEGER, parent TEXT, state INTEGER, "
+        "response_status TEXT, content_length INTEGER, content_type TEXT, title TEXT)"
+    )
+    conn.execute(
+        "CREATE TABLE IF NOT EXISTS links ("
+        "parent TEXT, child TEXT, kind INTEGER, PRIMARY KEY (parent, child)) WITHOUT ROWID"
+    )
+    conn.execute(
+        "CREATE TABLE IF NOT EXISTS secrets (url TEXT, type TEXT, data, PRIMARY KEY (url, type, data)) WITHOUT ROWID"
+    )
+
+
+def write_rows(conn: sqlite3.Connection, rows: CheckpointRows) -> None:
+    """Merge rows into the tables, within the caller's transaction.
+
+    A found url keeps the depth and parent it was first found with, and a done
+    url takes its response fields from the done row.
+    """
+    conn.executemany("INSERT OR IGNORE INTO nodes VALUES (?, ?, ?, ?, ?, ?, ?, ?)", rows.found)
+    conn.executemany(
+        "INSERT INTO nodes VALUES (?, ?, ?, ?, ?, ?, ?, ?) ON CONFLICT (url) DO UPDATE SET "
+        "depth = excluded.depth, parent = excluded.parent, state = MAX(state, excluded.state)",
+        rows.queued,
+    )
+    conn.executemany(
+        "INSERT INTO nodes VALUES (?, ?, ?, ?, ?, ?, ?, ?) ON CONFLICT (url) DO UPDATE SET "
+        "state = excluded.state, response_status = excluded.response_status, "
+        "content_length = excluded.content_length, content_type = excluded.content_type, "
+        "title = excluded.title",
+        rows.done,
+    )
+    conn.executemany("INSERT OR IGNORE INTO links VALUES (?, ?, ?)", rows.links)
+    conn.executemany("INSERT OR IGNORE INTO secrets VALUES (?, ?, ?)", rows.secrets)
+
+
+def read_state(conn: sqlite3.Connection) -> CheckpointState:
+    """Url nodes and results in the tables, see `Checkpoint.load`"""
+    rows = conn.execute(
+        "SELECT url, depth, parent, state, response_status, content_length, content_type, title "
+        "FROM nodes ORDER BY depth, rowid"
+    ).fetchall()
+    links = conn.execute("SELECT parent, child, kind FROM links").fetchall()
+    secrets = conn.execute("SELECT url, type, data FROM secrets").fetchall()
+    nodes, url_dict, js_dict, url_secrets = build_results(rows, links, secrets)
+    visited = [nodes[row[0]] for row in rows if row[3] >= QUEUED]
+    queued = [nodes[row[0]] for row in rows if row[3] == QUEUED]
+    return CheckpointState(url_dict, js_dict, url_secrets, visited, queued)
+
+
+class Checkpoint:
+    """Crawl state in a SQLite file: urls with their state, links between them and secrets"""
+
+    def __init__(self, path: typing.Union[str, pathlib.Path], resume: bool = False):
+        """
+
+        :param path: SQLite file, created if missing
+        :param resume: keep the state in the file, otherwise it is cleared for a new crawl
+        """
+        self.path = pathlib.Path(path)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        create_tables(self._conn)
+        if not resume:
+            for table in ("nodes", "links", "secrets"):
+                self._conn.execute(f"DELETE FROM {table}")
+        self._queued: typing.List[URLNode] = []
+        self._done: typing.List[typing.Tuple[URLNode, typing.Set[URLNode], typing.Set[URLNode], typing.Set[Secret]]] = []
+        self.writes = 0
+
+    def queued(self, url_node: URLNode) -> None:
+        """Report a url put in the frontier"""
+        self._queued.append(url_node)
+
+    def done(
+        self,
+        url_node: URLNode,
+        url_children: typing.Optional[typing.Set[URLNode]] = None,
+        js_children: typing.Optional[typing.Set[URLNode]] = None,
+        secrets: typing.Optional[typing.Set[Secret]] = None,
+    ) -> None:
+        """Report a processed page, with its final children and secrets"""
+        self._done.append((url_node, url_children or set(), js_children or set(), secrets or set()))
+
+    @property
+    def pending(self) -> int:
+        """Reports not taken yet"""
+        return len(self._queued) + len(self._done)
+
+    def take(self) -> CheckpointRows:
+        """Rows of the reports since the previous take, to pass to `write`"""
+        rows = CheckpointRows([], [node_row(url_node, QUEUED) for url_node in self._queued], [], [], [])
+        for url_node, url_children, js_children, secrets in self._done:
+            url = url_node.url
+            rows.done.append(node_row(url_node, DONE))
+            for kind, children in ((URL_LINK, url_children), (JS_LINK, js_children)):
+                for child in children:
+                    rows.found.append(node_row(child, FOUND))
+                    rows.links.append((url, child.url, kind))
+            rows.secrets.extend(secret_row(url, secret) for secret in secrets)
+        self._queued.clear()
+        self._done.clear()
+        return rows
+
+    def write(self, rows: CheckpointRows) -> None:
+        """Write rows in one transaction, safe to call from another thread"""
+        with self._lock:
+            conn = self._conn
+            conn.execute("BEGIN")
+            try:
+                write_rows(conn, rows)
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            conn.execute("COMMIT")
+            self.writes += 1
+
+    def load(self) -> CheckpointState:
+        """Url nodes and results of the checkpointed crawl
+
+        :return: url_dict, js_dict and url_secrets as kept by the crawler, the visited url nodes,
+            and the queued url nodes not done yet, shallowest first
+        """
+        with self._lock:
+            return read_state(self._conn)
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
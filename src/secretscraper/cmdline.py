@@ -103,6 +103,46 @@ class ExternalEntry:
     help="Minimum seconds between requests to the same domain",
     type=click.FLOAT,
 )
+@click.option(
+    "--min-workers",
+    help="Autoscale workers between this number and workers_num, following queue depth and fetch latency",
+    type=click.INT,
+)
+@click.option(
+    "--scheduler",
+    help="Order of crawl: discovery order, shallowest first, js files first or one url per host in turn",
+    type=click.Choice(["fifo", "bfs", "js-first", "round-robin"]),
+)
+@click.option(
+    "--shards",
+    help="Crawl in this number of processes, each owning the hosts hashed to it",
+    type=click.INT,
+)
+@click.option(
+    "--progress-interval",
+    help="Report crawl progress every given seconds",
+    type=click.FLOAT,
+)
+@click.option(
+    "--extract-executor",
+    help="Extract secrets and links in a thread or process pool instead of the event loop",
+    type=click.Choice(["thread", "process"]),
+)
+@click.option(
+    "--dedup-mode",
+    help="Index of visited urls, exact fingerprints or a bloom filter with a fixed memory budget",
+    type=click.Choice(["exact", "bloom"]),
+)
+@click.option(
+    "--disk-cache",
+    help="Keep responses in a SQLite file across runs and revalidate them with conditional requests",
+    type=click.Path(file_okay=True, dir_okay=False, path_type=pathlib.Path),
+)
+@click.option(
+    "--checkpoint",
+    help="Checkpoint the crawl to a SQLite file periodically",
+    type=click.Path(file_okay=True, dir_okay=False, path_type=pathlib.Path),
+)
 @click.option(
     "-o",
     "--outfile",
@@ -129,6 +169,7 @@ class ExternalEntry:
 @click.option("-u", "--url", help="Target url", type=click.STRING)
 @click.option("--detail", help="Show detailed result", is_flag=True)
 @click.option("--validate", help="Validate the status of found urls", is_flag=True)
+@click.option("--resume", help="Resume the crawl saved in the checkpoint file", is_flag=True)
 @click.option("-l", "--local", help="Local file or directory, scan local file/directory recursively ",
               type=click.Path(exists=True, file_okay=True, dir_okay=True, path_type=pathlib.Path))
 def main(**options):
@@ -192,6 +233,9 @@ debug: false
 loglevel: critical
 logpath: log
 handler_type: re
+hyperscan_cache_dir: "" # directory of compiled hyperscan databases, e.g. ~/.cache/secretscraper
+regex_combined: true # re handler: match rules sharing a leading character class in one pass
+regex_prefilter: true # re handler: skip rules whose required literals are absent from the page
 
 proxy: "" # http://127.0.0.1:7890
 max_depth: 1 # 0 for no limit
@@ -203,6 +247,27 @@ max_connections: 100 # total HTTP connection pool size
 max_keepalive_connections: 50 # keep-alive connections retained in the pool
 max_concurrent_per_domain: 5 # simultaneous requests allowed per domain
 min_request_interval: 0.2 # seconds between requests to the same domain
+progress_interval: 0 # seconds between crawl progress reports, 0 to disable
+min_workers: 0 # autoscale workers between min_workers and workers_num, 0 for a fixed pool of workers_num
+autoscale_interval: 1 # seconds between autoscaling decisions
+task_queue_capacity: 1000 # tasks waiting for a worker, 0 for no limit
+done_queue_capacity: 4096 # tasks submitted and not yet consumed, bounds memory of large crawls, 0 for no limit
+scheduler: fifo # order of crawl: "fifo", "bfs" shallowest first, "js-first", or "round-robin" across hosts
+frontier_memory_limit: 0 # url nodes kept in memory by the frontier, the rest spill to a temporary SQLite file, 0 for no limit
+shards: 0 # crawler processes, each owning the hosts hashed to it, 0 or 1 for a single process
+extract_executor: "" # "thread" or "process" to extract secrets and links off the event loop
+extract_workers: 0 # extraction pool size, 0 for the default
+extract_memo_size: 1024 # distinct bodies whose extraction results are reused across urls, 0 to disable
+dedup_mode: exact # "exact" url fingerprints, or "bloom" for a fixed-size filter with false positives
+dedup_bits: 64 # fingerprint width of the exact index, 64 or 128
+bloom_capacity: 10000000 # expected number of urls of the bloom filter
+bloom_error_rate: 0.0001 # false positive rate of the bloom filter at capacity
+cache_ttl: 60 # seconds a fetched response stays cached, 0 for no expiry
+cache_max_bytes: 67108864 # memory budget of cached responses in bytes, 0 to disable the cache
+disk_cache: "" # SQLite file keeping responses across runs for conditional revalidation, e.g. http_cache.sqlite3
+disk_cache_max_bytes: 536870912 # size budget of the disk cache in bytes
+checkpoint: "" # SQLite file the crawl is checkpointed to, e.g. crawl.sqlite3
+checkpoint_interval: 60 # seconds between checkpoints
 headers:
   Accept: "*/*"
   Cookie: ""
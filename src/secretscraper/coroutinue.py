@@ -28,9 +28,15 @@ class AsyncWorker:
         self,
         task_queue: asyncio.Queue[AsyncTask],
         event_loop: asyncio.AbstractEventLoop,
+        pool: typing.Optional["AsyncPool"] = None,
     ):
+        """
+
+        :param pool: pool to report task start and completion to
+        """
         self.task_queue = task_queue
         self.event_loop = event_loop
+        self.pool = pool
         self.is_running: bool = False
         self.future: asyncio.Future = asyncio.Future()
 
@@ -58,6 +64,8 @@ class AsyncWorker:
                 break
             try:
                 self.is_running = True
+                if self.pool is not None:
+                    self.pool.running += 1
                 ret = await task.func(*task.args, **task.kwargs)
                 task.future.set_result(ret)
             except asyncio.CancelledError:
@@ -70,6 +78,9 @@ class AsyncWorker:
                         task.future.set_exception(ex)
             finally:
                 self.is_running = False
+                if self.pool is not None:
+                    self.pool.running -= 1
+                    self.pool.task_done()
 
 
 class AsyncPool:
@@ -88,21 +99,63 @@ class AsyncPool:
         self.task_queue: asyncio.Queue[AsyncTask] = asyncio.Queue(
             maxsize=self.queue_capacity
         )
+        self.running: int = 0  # tasks being run by workers
+        self.unfinished: int = 0  # tasks submitted and not done, queued or running
+        self.idle = asyncio.Event()  # set while no task is queued or running
+        self.idle.set()
 
         self.start()
 
     def start(self):
         """Start all workers"""
-        for _ in range(self.num_workers):
-            self.workers.append(AsyncWorker(self.task_queue, self.event_loop))
-        [worker.start() for worker in self.workers]
+        self.add_workers(self.num_workers)
         # self.event_loop.run_forever()
 
+    def add_workers(self, num: int) -> None:
+        """Start num more workers"""
+        for _ in range(num):
+            worker = AsyncWorker(self.task_queue, self.event_loop, pool=self)
+            worker.start()
+            self.workers.append(worker)
+        self.num_workers = len(self.workers)
+
+    def retire_workers(self, num: int) -> int:
+        """Stop up to num idle workers, a worker waiting for a task leaves it in the queue
+
+        :return: number of workers stopped
+        """
+        retired = 0
+        for worker in reversed(self.workers[:]):
+            if retired >= num:
+                break
+            if not worker.is_running:
+                worker.future.cancel()
+                self.workers.remove(worker)
+                retired += 1
+        self.num_workers = len(self.workers)
+        return retired
+
     async def submit(self, task: AsyncTask) -> asyncio.Future:
         """Submit one task"""
-        await self.task_queue.put(task)
+        self.unfinished += 1
+        self.idle.clear()
+        try:
+            await self.task_queue.put(task)
+        except BaseException:
+            self.task_done()
+            raise
         return task.future
 
+    def task_done(self) -> None:
+        """Account for a task that finished or was dropped from the queue"""
+        self.unfinished -= 1
+        if self.unfinished == 0:
+            self.idle.set()
+
+    async def wait_idle(self) -> None:
+        """Wait until no task is queued or running"""
+        await self.idle.wait()
+
     async def submit_all(self, tasks: typing.List[AsyncTask]) -> typing.List[asyncio.Future]:
         """Submit multiple tasks"""
         futures: typing.List[asyncio.Future] = []
@@ -122,6 +175,7 @@ class AsyncPool:
                 task = self.task_queue.get_nowait()
             except asyncio.QueueEmpty:
                 break
+            self.task_done()
             if cancel_queue and not task.future.done():
                 task.future.cancel()
 
@@ -135,19 +189,113 @@ class AsyncPool:
     @property
     def is_finish(self) -> bool:
         """Check if all workers are idle and task queue is empty"""
-        return (
-            not any(worker.is_running for worker in self.workers)
-            and self.task_queue.empty()
-        )
+        return self.unfinished == 0
+
+
+class AutoScaler:
+    """Grow and shrink the workers of a pool between bounds, following its load.
+
+    Every interval, the pool grows by up to half its size while tasks are
+    queued and all workers are busy, unless tasks spend longer waiting on the
+    rate limiter than fetching, as more workers would only wait as well. It
+    shrinks by half of its idle workers while the queue is empty.
+    """
+
+    def __init__(
+        self,
+        pool: AsyncPool,
+        min_workers: int,
+        max_workers: int,
+        interval: float = 1.0,
+        latency: typing.Optional[Callable[[], float]] = None,
+        limiter_wait: typing.Optional[Callable[[], float]] = None,
+        on_scale: typing.Optional[Callable[[int, int], typing.Any]] = None,
+    ):
+        """
+
+        :param min_workers: workers kept when idle, at least 1
+        :param max_workers: workers allowed when busy
+        :param interval: seconds between scaling decisions
+        :param latency: returns the recent seconds a task spends fetching
+        :param limiter_wait: returns the recent seconds a task waits on the rate limiter
+        :param on_scale: called with the old and new number of workers on every change
+        """
+        if not 1 <= min_workers <= max_workers:
+            raise ValueError("workers must satisfy 1 <= min_workers <= max_workers")
+        if interval <= 0:
+            raise ValueError("interval must be positive")
+        self.pool = pool
+        self.min_workers = min_workers
+        self.max_workers = max_workers
+        self.interval = interval
+        self.latency = latency if latency is not None else lambda: 0.0
+        self.limiter_wait = limiter_wait if limiter_wait is not None else lambda: 0.0
+        self.on_scale = on_scale
+        self.future: typing.Optional[asyncio.Future] = None
+
+    def target(self) -> int:
+        """Number of workers the pool should have now"""
+        workers = len(self.pool.workers)
+        running = self.pool.running
+        backlog = self.pool.task_queue.qsize()
+        if backlog and running >= workers:
+            if self.limiter_wait() > self.latency():
+                return workers  # bound by the per-domain limits
+            return min(self.max_workers, workers + min(backlog, max(1, workers // 2)))
+        if not backlog and running < workers:
+            return max(self.min_workers, workers - max(1, (workers - running) // 2))
+        return workers
+
+    def scale(self) -> int:
+        """Resize the pool to the target
+
+        :return: number of workers after scaling
+        """
+        workers = len(self.pool.workers)
+        target = self.target()
+        if target > workers:
+            self.pool.add_workers(target - workers)
+        elif target < workers:
+            self.pool.retire_workers(workers - target)
+        new_workers = len(self.pool.workers)
+        if new_workers != workers:
+            logger.debug(f"Scaled workers from {workers} to {new_workers}")
+            if self.on_scale is not None:
+                self.on_scale(workers, new_workers)
+        return new_workers
+
+    async def run(self) -> None:
+        """Scale the pool every interval"""
+        while True:
+            await asyncio.sleep(self.interval)
+            self.scale()
+
+    def start(self) -> None:
+        self.future = self.pool.event_loop.create_task(self.run())
+
+    def stop(self) -> None:
+        if self.future is not None:
+            self.future.cancel()
 
 
 class AsyncPoolCollector:
     """Collect futures generated from pool"""
 
-    def __init__(self, pool: AsyncPool, cancel_tasks: bool = True):
+    def __init__(self, pool: AsyncPool, cancel_tasks: bool = True, done_capacity: int = 0):
+        """
+
+        :param done_capacity: max tasks submitted and not yet taken from `iter`, 0 for no limit.
+            Submit waits for a slot, so the consumer of `iter` must keep running
+        """
+        if done_capacity < 0:
+            raise ValueError("done_capacity must be non-negative")
         self.pool: AsyncPool = pool
         self.cancel_tasks: bool = cancel_tasks  # whether cancel all tasks when shutdown
-        self.done_queue: asyncio.Queue[asyncio.Future] = asyncio.Queue()
+        self.done_capacity: int = done_capacity
+        self.done_queue: asyncio.Queue[asyncio.Future] = asyncio.Queue(maxsize=done_capacity)
+        self._slots: typing.Optional[asyncio.Semaphore] = (
+            asyncio.Semaphore(done_capacity) if done_capacity > 0 else None
+        )
         self.closed = threading.Event()  # whether the pool is closed
         self.closed.clear()
 
@@ -157,9 +305,11 @@ class AsyncPoolCollector:
         queue_capacity: int,
         event_loop: asyncio.AbstractEventLoop,
         cancel_tasks: bool = True,
+        done_capacity: int = 0,
     ):
         """Factory function for creating AsyncPoolCollector
         :param queue_capacity: maximum size of task queue, 0 for infinite queue
+        :param done_capacity: maximum tasks submitted and not yet collected, 0 for no limit
         :return: AsyncPoolCollector
         """
         pool = (
@@ -167,19 +317,37 @@ class AsyncPoolCollector:
             if event_loop
             else AsyncPool(num_workers, asyncio.new_event_loop(), queue_capacity)
         )
-        return AsyncPoolCollector(pool, cancel_tasks)
+        return AsyncPoolCollector(pool, cancel_tasks, done_capacity)
 
-    async def submit(self, task: AsyncTask) -> asyncio.Future:
-        """Submit one task"""
-        future = await self.pool.submit(task)
-        future.add_done_callback(self.done_queue.put_nowait)
+    async def submit(self, task: AsyncTask, collect: bool = True) -> asyncio.Future:
+        """Submit one task, waiting while done_capacity tasks are pending
+
+        :param collect: whether `iter` yields the future of the task, otherwise it is dropped
+            once done and its exception is logged
+        """
+        if self._slots is not None:
+            await self._slots.acquire()
+        try:
+            future = await self.pool.submit(task)
+        except BaseException:
+            self._release()
+            raise
+        future.add_done_callback(self.done_queue.put_nowait if collect else self._forget)
         return future
 
-    async def submit_all(self, tasks: typing.List[AsyncTask]) -> typing.List[asyncio.Future]:
+    async def submit_all(self, tasks: typing.Iterable[AsyncTask], collect: bool = True) -> typing.List[asyncio.Future]:
         """Submit multiple tasks"""
-        futures = await self.pool.submit_all(tasks)
-        [future.add_done_callback(self.done_queue.put_nowait) for future in futures]
-        return futures
+        return [await self.submit(task, collect) for task in tasks]
+
+    def _release(self) -> None:
+        if self._slots is not None:
+            self._slots.release()
+
+    def _forget(self, future: asyncio.Future) -> None:
+        """Done callback of a task whose result is not collected"""
+        self._release()
+        if not future.cancelled() and future.exception() is not None:
+            logger.error(f"Uncollected task failed: {future.exception()}")
 
     async def close(self) -> None:
         """Close all workers, cancel all futures that have not done"""
@@ -191,6 +359,7 @@ class AsyncPoolCollector:
             if not future.done():
                 future.cancel()
         self.closed.set()
+        self.done_queue.put_nowait(None)  # wake up iter
 
     @property
     def remaining_tasks(self) -> int:
@@ -200,13 +369,17 @@ class AsyncPoolCollector:
     @property
     def running_tasks(self) -> int:
         """Number of tasks running"""
-        return len([worker for worker in self.pool.workers if worker.is_running])
+        return self.pool.running
 
     @property
     def is_finish(self) -> bool:
         """Whether all workers are idle or all tasks are"""
         return self.pool.is_finish
 
+    async def wait_idle(self) -> None:
+        """Wait until no task is queued or running"""
+        await self.pool.wait_idle()
+
     async def __aenter__(self):
         return self
 
@@ -220,6 +393,9 @@ class AsyncPoolCollector:
                 break
             try:
                 future = await self.done_queue.get()
+                if future is None:
+                    break
+                self._release()
                 yield future
             except asyncio.CancelledError:
                 break
@@ -2,16 +2,16 @@
 
 import asyncio
 import functools
+import itertools
 import logging
-import queue
 import re
 import threading
+import time
 import traceback
 import typing
 from typing import Set
 from urllib.parse import urlparse
 
-import aiocache
 import aiohttp
 import anyio
 import dynaconf
@@ -19,17 +19,24 @@ import httpx
 from aiohttp import ClientResponse
 from httpx import AsyncClient
 
-from secretscraper.coroutinue import AsyncPoolCollector, AsyncTask
-from secretscraper.entity import URL, Secret, URLNode
+from secretscraper.coroutinue import AsyncPoolCollector, AsyncTask, AutoScaler
+from secretscraper.document import Document
+from secretscraper.entity import URL, PageResult, Secret, URLNode
+from secretscraper.extractor import Extractor
 from secretscraper.filter import URLFilter
 from secretscraper.handler import Handler
 from secretscraper.urlparser import URLParser
-from aiocache.serializers import PickleSerializer
 
+from .cache import CachedResponse, DiskCache, ResponseCache
+from .checkpoint import Checkpoint
 from .config import settings
+from .dedup import URLIndex, canonicalize_url, create_url_index
 from .exception import CrawlerException
+from .frontier import Frontier
 from .rate_limiter import DomainRateLimiter
-from .util import Range, get_response_title
+from .scheduler import create_scheduler
+from .stats import CrawlStats, ProgressReporter
+from .util import Range
 
 logger = logging.getLogger(__name__)
 
@@ -48,6 +55,15 @@ class Crawler:
         max_page_num: int = 0,
         max_depth: int = 3,
         num_workers: int = 100,
+        min_workers: int = 0,
+        autoscale_interval: float = 1.0,
+        task_queue_capacity: int = 1000,
+        done_queue_capacity: int = 4096,
+        scheduler: str = "fifo",
+        frontier_memory_limit: int = 0,
+        checkpoint: str = "",
+        checkpoint_interval: float = 60,
+        resume: bool = False,
         proxy: str = None,
         headers: dict = None,
         verbose: bool = False,
@@ -59,7 +75,20 @@ class Crawler:
         debug: bool = False,
         follow_redirects: bool = False,
         dangerous_paths: typing.List[str] = None,
-        validate: bool = False
+        validate: bool = False,
+        extract_executor: str = "",
+        extract_workers: int = 0,
+        extract_memo_size: int = 1024,
+        dedup_mode: str = "exact",
+        dedup_bits: int = 64,
+        bloom_capacity: int = 10_000_000,
+        bloom_error_rate: float = 1e-4,
+        cache_ttl: float = 60,
+        cache_max_bytes: int = 64 * 2 ** 20,
+        disk_cache: str = "",
+        disk_cache_max_bytes: int = 512 * 2 ** 20,
+        progress_interval: float = 0,
+        progress_func: typing.Optional[typing.Callable[[str], typing.Any]] = None,
     ):
         """
 
@@ -71,7 +100,18 @@ class Crawler:
         # :param allowed_status: filter response status. None for no filter
         :param max_page_num: max number of urls to crawl, 0 for no limit
         :param max_depth: max url depth, should greater than 0
-        :param num_workers: worker number of the async pool
+        :param num_workers: worker number of the async pool, the upper bound when autoscaling
+        :param min_workers: autoscale the async pool between min_workers and num_workers, 0 for a fixed pool
+        :param autoscale_interval: seconds between autoscaling decisions
+        :param task_queue_capacity: max tasks waiting for a worker, 0 for no limit
+        :param done_queue_capacity: max tasks submitted and not yet consumed, 0 for no limit.
+            Urls stay in the frontier until a slot is free
+        :param scheduler: order of crawl, "fifo", "bfs" by depth, "js-first" or "round-robin" across hosts
+        :param frontier_memory_limit: url nodes the frontier keeps in memory before spilling to a temporary
+            SQLite file, 0 for no limit
+        :param checkpoint: SQLite file to checkpoint the crawl to, "" to disable
+        :param checkpoint_interval: seconds between checkpoints
+        :param resume: resume the crawl checkpointed in `checkpoint` instead of starting from start_urls
         :param proxy: http proxy
         :param verbose: whether to print exception detail
         :param timeout: timeout for aiohttp request
@@ -80,6 +120,19 @@ class Crawler:
         :param max_concurrent_per_domain: max simultaneous requests per domain
         :param min_request_interval: min seconds between requests to one domain
         :param dangerous_paths: dangerous paths to evade
+        :param extract_executor: "" to extract on the event loop, "thread" or "process" to extract in a pool
+        :param extract_workers: worker number of the extraction pool, 0 for the executor's default
+        :param extract_memo_size: number of distinct bodies whose extraction results are reused, 0 to disable
+        :param dedup_mode: index of visited and found urls, "exact" fingerprints or a "bloom" filter
+        :param dedup_bits: fingerprint width of the exact index, 64 or 128
+        :param bloom_capacity: expected number of urls of the bloom filter
+        :param bloom_error_rate: false positive rate of the bloom filter at capacity
+        :param cache_ttl: seconds a fetched response stays cached, 0 for no expiry
+        :param cache_max_bytes: byte budget of cached responses, 0 to disable the cache
+        :param disk_cache: SQLite file to keep responses across runs and revalidate them, "" to disable
+        :param disk_cache_max_bytes: byte budget of the disk cache
+        :param progress_interval: seconds between progress reports, 0 to disable
+        :param progress_func: called with each progress report, defaults to logging
         """
         if max_connections < 1:
             raise ValueError("max_connections must be at least 1")
@@ -93,6 +146,9 @@ class Crawler:
         self.filter = url_filter
         self.parser = parser
         self.handler = handler
+        self.extractor = Extractor(
+            handler, parser, executor_type=extract_executor, max_workers=extract_workers, memo_size=extract_memo_size
+        )
         self.max_page_num = max_page_num
         self.max_depth = max_depth
         self.num_workers = num_workers
@@ -109,12 +165,33 @@ class Crawler:
         self.follow_redirects = follow_redirects
         self._validate = validate
 
-        self.cache = aiocache.Cache(aiocache.Cache.MEMORY)
-        self.serializer = PickleSerializer()
+        self.cache = ResponseCache(max_bytes=cache_max_bytes, ttl=cache_ttl)
+        self._in_flight: typing.Dict[str, asyncio.Future] = dict()  # canonical url to its pending fetch
+        self.coalesced_requests: int = 0  # fetches served by another caller's pending request
+        self.disk_cache: typing.Optional[DiskCache] = (
+            DiskCache(disk_cache, max_bytes=disk_cache_max_bytes) if disk_cache else None
+        )
 
-        self.visited_urls: Set[URLNode] = set()
-        self.found_urls: Set[URLNode] = set()  # newly found urls
-        self.working_queue: queue.Queue[URLNode] = queue.Queue()  # BP queue
+        self.checkpoint: typing.Optional[Checkpoint] = (
+            Checkpoint(checkpoint, resume=resume) if checkpoint else None
+        )
+        self.checkpoint_interval = checkpoint_interval
+        self.resume = resume
+        self._last_checkpoint = time.monotonic()
+        self._checkpoint_future: typing.Optional[asyncio.Future] = None  # checkpoint being written
+
+        # fingerprints only, url nodes are kept by the results below
+        self.visited_urls: URLIndex = create_url_index(
+            dedup_mode, bits=dedup_bits, capacity=bloom_capacity, error_rate=bloom_error_rate
+        )
+        self.found_urls: URLIndex = create_url_index(
+            dedup_mode, bits=dedup_bits, capacity=bloom_capacity, error_rate=bloom_error_rate
+        )  # newly found urls
+        self.working_queue: Frontier = Frontier(
+            create_scheduler(scheduler, is_js=self.is_append_js, max_in_memory=frontier_memory_limit)
+        )  # crawl frontier
+        self.stats: CrawlStats = CrawlStats(self.working_queue)
+        self.progress = ProgressReporter(self.stats, interval=progress_interval, report=progress_func)
         self.url_dict: typing.Dict[URLNode, typing.Set[URLNode]] = (
             dict()
         )  # url and all of its children url
@@ -125,10 +202,9 @@ class Crawler:
         self.url_secrets: typing.Dict[URLNode, typing.Set[Secret]] = (
             dict()
         )  # url and secrets found from it
-        self._event_loop = asyncio.new_event_loop()
-        # self.client: aiohttp.ClientSession = aiohttp.ClientSession(
-        #     loop=self._event_loop
-        # )  # assign event loop to client
+        self._loop: typing.Optional[asyncio.AbstractEventLoop] = None  # loop the crawler runs on
+        self._page_results: typing.Optional[asyncio.Queue] = None  # results of pages while iterated
+        self._crawl_task: typing.Optional[asyncio.Future] = None  # crawl of iter_results
         self.client_limits = httpx.Limits(
             max_connections=self.max_connections,
             max_keepalive_connections=self.max_keepalive_connections,
@@ -137,12 +213,52 @@ class Crawler:
             max_concurrent_per_domain=self.max_concurrent_per_domain,
             min_interval=self.min_request_interval,
         )
-        self.client: httpx.AsyncClient = self._create_client()
+        self.client: typing.Optional[httpx.AsyncClient] = None  # created by the first request
         self.close = threading.Event()  # whether the crawler is closed
         self.close.clear()
-        self.pool: AsyncPoolCollector = AsyncPoolCollector.create_pool(
-            num_workers=num_workers, queue_capacity=0, event_loop=self._event_loop
+        self._cleaned = False  # whether clean has run, it is called by run and again on exit
+        # created on the loop the crawler runs on
+        self.min_workers = min_workers
+        self.autoscale_interval = autoscale_interval
+        self.task_queue_capacity = task_queue_capacity
+        self.done_queue_capacity = done_queue_capacity
+        self.pool: typing.Optional[AsyncPoolCollector] = None
+        self.autoscaler: typing.Optional[AutoScaler] = None
+
+    @property
+    def _event_loop(self) -> asyncio.AbstractEventLoop:
+        """Loop the crawler runs on: the running loop of `crawl`, or a loop of its own for `start`"""
+        if self._loop is None:
+            self._loop = asyncio.new_event_loop()
+        return self._loop
+
+    def _bind(self, loop: asyncio.AbstractEventLoop) -> None:
+        """Create the worker pool and the autoscaler on loop, once"""
+        if self.pool is not None:
+            if self.pool.pool.event_loop is not loop:
+                raise CrawlerException("Crawler is already bound to another event loop")
+            return
+        if self._loop is not None and self._loop is not loop and not self._loop.is_running():
+            self._loop.close()
+        self._loop = loop
+        self.pool = AsyncPoolCollector.create_pool(
+            num_workers=self.min_workers or self.num_workers,
+            queue_capacity=self.task_queue_capacity,
+            event_loop=loop,
+            cancel_tasks=False,  # the loop may run tasks of others
+            done_capacity=self.done_queue_capacity,
         )
+        self.stats.set_workers(self.pool.pool.num_workers)
+        if self.min_workers:
+            self.autoscaler = AutoScaler(
+                self.pool.pool,
+                min_workers=self.min_workers,
+                max_workers=self.num_workers,
+                interval=self.autoscale_interval,
+                latency=lambda: self.stats.fetch_latency,
+                limiter_wait=lambda: self.rate_limiter.mean_wait,
+                on_scale=lambda _, num: self.stats.record_workers(num),
+            )
 
     def _create_client(self) -> httpx.AsyncClient:
         return AsyncClient(
@@ -152,7 +268,8 @@ class Crawler:
         )
 
     def start(self):
-        """Start event loop"""
+        """Crawl on a loop of its own, blocking until done"""
+        self._bind(self._event_loop)
         try:
             self._event_loop.run_until_complete(self.main_task())
         except asyncio.CancelledError:
@@ -165,6 +282,69 @@ class Crawler:
         except asyncio.CancelledError:
             pass  # ignore
 
+    async def __aenter__(self) -> "Crawler":
+        self._bind(asyncio.get_running_loop())
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self._cancel_crawl()
+        await self.clean()
+
+    async def crawl(self) -> None:
+        """Crawl on the running loop, then validate the results if enabled.
+
+        Usage:
+            async with Crawler(...) as crawler:
+                await crawler.crawl()
+            print(crawler.url_dict)
+        """
+        self._bind(asyncio.get_running_loop())
+        await self.main_task()
+        if self._validate:
+            await self._validate_with_client()
+
+    async def iter_results(self) -> typing.AsyncIterator[PageResult]:
+        """Crawl on the running loop and yield the results of each page as it completes.
+
+        The crawl waits while num_workers results are not consumed, and is
+        cancelled when the iteration is closed or the crawler exits early.
+
+        Usage:
+            async with Crawler(...) as crawler:
+                async for result in crawler.iter_results():
+                    print(result.url_node.url, result.secrets)
+        """
+        if self._page_results is not None:
+            raise CrawlerException("Results of the crawler are already iterated")
+        results: asyncio.Queue = asyncio.Queue(maxsize=max(self.num_workers, 1))
+        self._page_results = results
+        self._crawl_task = task = asyncio.ensure_future(self.crawl())
+        try:
+            while True:
+                get = asyncio.ensure_future(results.get())
+                await asyncio.wait((get, task), return_when=asyncio.FIRST_COMPLETED)
+                if not get.done():
+                    get.cancel()
+                    break
+                yield get.result()
+            while not results.empty():
+                yield results.get_nowait()
+            task.result()  # raise what stopped the crawl
+        finally:
+            await self._cancel_crawl()
+            self._page_results = None
+
+    async def _cancel_crawl(self) -> None:
+        """Cancel the crawl of iter_results if it is still running"""
+        task, self._crawl_task = self._crawl_task, None
+        if task is None or task.done():
+            return
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+
     async def main_task(self):
         """A wrapper"""
         try:
@@ -176,38 +356,39 @@ class Crawler:
         """Start the crawler"""
         try:
 
-            # initialize with start_urls
-            for url in self.start_urls:
-                url_obj = urlparse(url)
-                url_node = URLNode(url=url, url_object=url_obj, depth=0, parent=None)
-                # self.found_urls.add(url_node)
-                if self.filter.doFilter(url_node.url_object):
-                    logger.debug(f"Target: {url}")
-                    self.visited_urls.add(url_node)
-                    self.working_queue.put(url_node)
+            if not (self.resume and self.restore()):
+                # initialize with start_urls
+                for url in self.start_urls:
+                    url_obj = urlparse(url)
+                    url_node = URLNode(url=url, url_object=url_obj, depth=0, parent=None)
+                    # self.found_urls.add(url_node)
+                    if self.filter.doFilter(url_node.url_object):
+                        logger.debug(f"Target: {url}")
+                        self.enqueue(url_node)
+            if self.autoscaler is not None:
+                self.autoscaler.start()
+            self.progress.start(self._event_loop)
 
             while True:
                 if self.max_page_num > 0 and self.total_page >= self.max_page_num:
                     break
-                if (
-                    self.working_queue.empty()
-                    and self.pool.is_finish
-                    and self.pool.done_queue.empty()
-                ):
+                # wakes up as soon as a child url is enqueued, None once the crawl is complete
+                url_node = await self.working_queue.get()
+                if url_node is None:
                     break
-
-                try:
-                    url_node = self.working_queue.get_nowait()
-                except queue.Empty:
-                    await asyncio.sleep(0.1)
-                    continue
                 if self.max_depth <= 0 or url_node.depth <= self.max_depth:
                     task = AsyncTask(self.process_one, url_node)
-                    await self.pool.submit(task)
-                logger.debug(
-                    f"Total:{self.total_page}, Found:{len(self.found_urls)}, Depth:{url_node.depth}, Visited:{len(self.visited_urls)}, Secrets:{sum([len(secrets) for secrets in self.url_secrets.values()])}"
-                )
-            logger.debug(f"Crawler finished.")
+                    future = await self.pool.submit(task)
+                    future.add_done_callback(lambda _: self.working_queue.task_done())
+                else:
+                    self.working_queue.task_done()
+                self.maybe_checkpoint()
+            # let the consumer handle the results of finished tasks
+            await self.pool.done_queue.join()
+            logger.debug(
+                f"Crawler finished. {self.stats.summary()}. "
+                f"Cache: {self.cache.stats}, coalesced requests: {self.coalesced_requests}"
+            )
         except asyncio.CancelledError:
             # raise CrawlerException(f"Crawler cancelled.")
             pass
@@ -217,17 +398,24 @@ class Crawler:
             await self.clean()
 
     def start_validate(self):
-        """Start validate"""
+        """Validate on the loop of `start`, blocking until done"""
         if not self._validate:
             return
         logger.debug(f"Start validate...")
-        self._event_loop = asyncio.new_event_loop()
-        self.client = self._create_client()
         try:
-            self._event_loop.run_until_complete(self.validate())
+            self._event_loop.run_until_complete(self._validate_with_client())
         except asyncio.CancelledError:
             pass  # ignore
 
+    async def _validate_with_client(self):
+        """Validate with a client of its own, the one of the crawl being closed by then"""
+        self.client = self._create_client()
+        try:
+            await self.validate()
+        finally:
+            await self.client.aclose()
+            self.client = None
+
     async def validate(self):
         """Validate the status of results that are marked as unknown"""
 
@@ -255,10 +443,68 @@ class Crawler:
         for future in asyncio.as_completed(task_list):
             await future
 
+    def enqueue(self, url_node: URLNode) -> None:
+        """Mark a url node visited and put it in the frontier"""
+        self.visited_urls.add(url_node)
+        self.working_queue.put(url_node)
+        if self.checkpoint is not None:
+            self.checkpoint.queued(url_node)
+
+    def restore(self) -> bool:
+        """Restore results, visited urls and frontier from the checkpoint
+
+        :return: whether the checkpoint held a crawl
+        """
+        state = self.checkpoint.load()
+        if not state.visited:
+            return False
+        self.url_dict, self.js_dict, self.url_secrets = state.url_dict, state.js_dict, state.url_secrets
+        for url_node in self.found_nodes():
+            self.found_urls.add(url_node)
+        for url_node in state.visited:
+            self.visited_urls.add(url_node)
+        for url_node in state.queued:
+            self.working_queue.put(url_node)
+        # pages counted like in _process_one: done and not evaded
+        queued = set(state.queued)
+        self.total_page = sum(
+            1 for url_node in state.visited if url_node not in queued and not self.is_evade(url_node)
+        )
+        logger.debug(f"Resumed crawl: {self.total_page} pages done, {len(state.queued)} queued")
+        return True
+
+    def maybe_checkpoint(self) -> None:
+        """Start writing a checkpoint in a thread if the interval has passed and none is being written"""
+        if self.checkpoint is None or time.monotonic() - self._last_checkpoint < self.checkpoint_interval:
+            return
+        if self._checkpoint_future is not None and not self._checkpoint_future.done():
+            return
+        self._last_checkpoint = time.monotonic()
+        self._checkpoint_future = self._event_loop.run_in_executor(
+            None, self.checkpoint.write, self.checkpoint.take()
+        )
+
+    async def flush_checkpoint(self) -> None:
+        """Wait for the checkpoint being written and write what was reported since"""
+        if self.checkpoint is None:
+            return
+        try:
+            if self._checkpoint_future is not None:
+                await self._checkpoint_future
+            if self.checkpoint.pending:
+                self.checkpoint.write(self.checkpoint.take())
+        except Exception as e:
+            logger.error(f"Failed to write checkpoint {self.checkpoint.path}: {e}")
+
+    def found_nodes(self) -> typing.Iterator[URLNode]:
+        """Url nodes of found urls, read from the url and js results"""
+        for children in itertools.chain(self.url_dict.values(), self.js_dict.values()):
+            yield from children
+
     def is_evade(self, url: URLNode) -> bool:
         """Check whether url should be evaded"""
         if self.dangerous_paths is not None:
-            path = url.url_object.path
+            path = url.path
             if len(
                 [path for p in self.dangerous_paths if re.search(f"/?{p}", path.strip(), re.IGNORECASE)]
             ) > 0:
@@ -269,6 +515,27 @@ class Crawler:
         """Fetch, extract url children and execute handler on result"""
         if self.max_page_num > 0 and self.total_page >= self.max_page_num:
             return
+        try:
+            await self._process_one(url_node)
+        finally:
+            if self.checkpoint is not None:
+                self.checkpoint.done(
+                    url_node,
+                    self.url_dict.get(url_node),
+                    self.js_dict.get(url_node),
+                    self.url_secrets.get(url_node),
+                )
+        if self._page_results is not None:
+            await self._page_results.put(
+                PageResult(
+                    url_node,
+                    frozenset(self.url_dict.get(url_node, ())),
+                    frozenset(self.js_dict.get(url_node, ())),
+                    frozenset(self.url_secrets.get(url_node, ())),
+                )
+            )
+
+    async def _process_one(self, url_node: URLNode):
         if self.is_evade(url_node):
             logger.debug(f"Evading {url_node}")
             return
@@ -277,41 +544,45 @@ class Crawler:
         response = await self.fetch(url_node.url)
         if response is not None:  # and response.status == 200
             url_node.response_status = str(response.status_code)
-            url_node.title = get_response_title(response)
             try:
                 url_node.content_length = int(response.headers.get('content-length'))
             except Exception:
                 pass
             url_node.content_type = response.headers.get('content-type')
-            response_text: str = response.text
-            # try:
-            #     response_text: str = await response.text(
-            #         encoding="utf8", errors="ignore"
-            #     )
-            # except TimeoutError:
-            #     logger.error(f"Timeout while reading response from {url_node.url}")
-            #     return
-            # call handler and urlparser
-            # extract secrets TODO: nonblocking extract
-            await self.extract_secrets(url_node, response_text)
-            # extract links TODO: nonblocking extract
-            await self.extract_links_and_extend(url_node, response, response_text)
+            self.stats.record_page(len(response.content))
+            # decoded, encoded and parsed once for all extraction stages
+            document = Document(content=response.content, encoding=response.encoding)
+            # run handler, urlparser and title lookup, in the extraction pool if one is configured
+            extracted = await self.extractor.extract(url_node, document, self.is_extend(response))
+            url_node.title = extracted.title
+            await self.extract_secrets(url_node, document, extracted.secrets)
+            await self.extract_links_and_extend(url_node, response, document, extracted.children)
         else:
             # no extend on this branch
             logger.debug(f"No extend on {url_node.url}")
             return
         logger.debug(f"Finished processing {url_node.url}")
 
-    async def extract_secrets(self, url_node: URLNode, response_text: str):
-        """Extract secrets from response and store them in self.url_secrets"""
+    async def extract_secrets(
+        self,
+        url_node: URLNode,
+        response_text: typing.Union[str, Document],
+        secrets: typing.Optional[typing.Iterable[Secret]] = None,
+    ):
+        """Extract secrets from response and store them in self.url_secrets
+
+        :param secrets: secrets already extracted by the extractor, extract from `response_text` if None
+        """
         logger.debug(f"Extracting secret from {url_node.url}")
 
-        secrets = self.handler.handle(response_text)
+        if secrets is None:
+            secrets = self.handler.handle(response_text)
         if secrets is not None:
-            self.url_secrets[url_node] = set(secrets)
-        logger.debug(f"Extract secret of number {len(list(secrets))} from {url_node}")
+            secrets = self.url_secrets[url_node] = set(secrets)
+            self.stats.record_secrets(len(secrets))
+            logger.debug(f"Extract secret of number {len(secrets)} from {url_node}")
 
-    def is_extend(self, response: httpx.Response) -> bool:
+    def is_extend(self, response: CachedResponse) -> bool:
         """Determine if extract links from a url node"""
         content_type = response.headers.get("content-type", "")
         content_type = content_type.split(";", maxsplit=1)[0].strip().lower()
@@ -324,8 +595,8 @@ class Crawler:
 
     def is_append_js(self, url_node: URLNode) -> bool:
         """Determine whether append url to js result or not"""
-        if url_node.url_object.path.endswith(".js") or url_node.url_object.path.endswith(
-            ".js.map") or url_node.url_object.path.__contains__(".js?"):
+        path = url_node.path
+        if path.endswith(".js") or path.endswith(".js.map") or path.__contains__(".js?"):
             return True
         return False
 
@@ -334,11 +605,17 @@ class Crawler:
         return True
 
     async def extract_links_and_extend(
-        self, url_node: URLNode, response: httpx.Response, response_text: str
+        self,
+        url_node: URLNode,
+        response: CachedResponse,
+        response_text: typing.Union[str, Document],
+        url_children: typing.Optional[typing.Set[URLNode]] = None,
     ):
         """Extract links from response and extend the task queue in demand
         This function only works if the response is text-like, but regardless of whether it is html or not.
         Extract and extend `url_node` only if `response` is text-like.
+
+        :param url_children: children already extracted by the extractor, extract from `response_text` if None
         """
         if not self.is_extend(response):
             return
@@ -351,7 +628,8 @@ class Crawler:
             is_extending = False
 
         logger.debug(f"Extracting links from {url_node.url}")
-        url_children: typing.Set[URLNode] = self.parser.extract_urls(url_node, response_text)
+        if url_children is None:
+            url_children = self.parser.extract_urls(url_node, response_text)
         # self.url_dict[url_node] = set()
 
         # if len(url_children) > 0:
@@ -376,62 +654,121 @@ class Crawler:
                 self.url_dict[url_node].add(child)
 
             if child not in self.visited_urls and is_extending and self.filter.doFilter(child.url_object):
-                self.working_queue.put(child)
-                self.visited_urls.add(child)
+                self.enqueue(child)
             logger.debug(f"New link found: {child.url} from {url_node.url}")
 
-    # @aiocache.cached(ttl=5, key="http", namespace="fetch", serializer=PickleSerializer())
-    async def fetch(self, url: str) -> httpx.Response:
+    async def fetch(self, url: str) -> typing.Optional[CachedResponse]:
         """Wrapper for sending http request
+        Concurrent calls for the same canonical url share one request.
         If exception occurs, return None
         """
-        cached_response = await self.cache.get(url)
+        key = canonicalize_url(url)
+        cached_response = self.cache.get(key)
         if cached_response is not None:
             logger.debug(f"Cache Match: {url}")
-            return self.serializer.loads(cached_response)
-        logger.debug(f"Fetching {url}")
+            return cached_response
+        in_flight = self._in_flight.get(key)
+        if in_flight is not None:
+            logger.debug(f"Coalesced: {url}")
+            self.coalesced_requests += 1
+            # shielded, so a cancelled follower does not cancel the shared request
+            return await asyncio.shield(in_flight)
+
+        future: asyncio.Future = asyncio.get_running_loop().create_future()
+        self._in_flight[key] = future
         response = None
         try:
-            async with self.rate_limiter.acquire(url):
-                response = await self.client.get(
-                    url,
-                    headers=self.headers,
-                    follow_redirects=self.follow_redirects,
-                    timeout=self.timeout,
-                )
-            logger.debug(f"Fetch {url}, status: {response.status_code}")
-            await self.cache.set(url, self.serializer.dumps(response), ttl=60)
+            response = await self._fetch(url, key)
+        finally:
+            del self._in_flight[key]
+            # if this request is cancelled, followers get None, like for a failed request
+            future.set_result(response)
+        return response
 
-        except TimeoutError:
+    async def _fetch(self, url: str, key: str) -> typing.Optional[CachedResponse]:
+        """Send the http request and cache the response under key"""
+        logger.debug(f"Fetching {url}")
+        response = None
+        try:
+            # revalidate a response stored by a previous run, the disk cache is read and written in a thread
+            loop = asyncio.get_running_loop()
+            validators = None
+            if self.disk_cache is not None:
+                validators = await loop.run_in_executor(None, self.disk_cache.validators, key)
+            fetched = await self._request(url, validators)
+            stored = None
+            if fetched.status_code == 304 and validators is not None:
+                stored = await loop.run_in_executor(None, self.disk_cache.revalidate, key, fetched.headers)
+                if stored is not None:
+                    logger.debug(f"Not modified, reuse stored body: {url}")
+                else:  # evicted since its validators were read
+                    fetched = await self._request(url, None)
+            if stored is None:
+                stored = CachedResponse.from_response(fetched)
+                if self.disk_cache is not None:
+                    await loop.run_in_executor(None, self.disk_cache.set, key, stored)
+            response = self.cache.set(key, stored)
+
+        except TimeoutError as e:
+            self.stats.record_error(e)
             logger.error(f"Timeout while fetching {url}")
         except httpx.ConnectError as e:
+            self.stats.record_error(e)
             logger.error(f"Connection error for {url}: {e}")
         except anyio.ClosedResourceError as e:
+            self.stats.record_error(e)
             logger.error(f"Closing resource for {url}: {e}")
         except httpx.InvalidURL as e:
+            self.stats.record_error(e)
             logger.error(f"Invalid URL for {url}: {e}")
         except httpx.TimeoutException as e:
+            self.stats.record_error(e)
             logger.error(f"Timeout while fetching {url} ")
         except httpx.ReadError as e:
+            self.stats.record_error(e)
             logger.debug(f"Read error for {url}: {e}")  # trigger when keyboard interrupt
         except KeyboardInterrupt:
             pass  # ignore
         except Exception as e:
+            self.stats.record_error(e)
             logger.error(f"Unexpected error: {e.__class__}:{e} while fetching {url}")
         return response
 
+    async def _request(self, url: str, validators: typing.Optional[typing.Dict[str, str]]) -> httpx.Response:
+        """Send the http request within the rate limit of its domain, conditional if validators are given"""
+        headers = self.headers
+        if validators:
+            headers = {**(self.headers or {}), **validators}
+        if self.client is None:
+            self.client = self._create_client()
+        async with self.rate_limiter.acquire(url):
+            started = time.monotonic()
+            response = await self.client.get(
+                url,
+                headers=headers,
+                follow_redirects=self.follow_redirects,
+                timeout=self.timeout,
+            )
+            self.stats.record_fetch(time.monotonic() - started)
+        logger.debug(f"Fetch {url}, status: {response.status_code}")
+        return response
+
     async def clean(self):
-        """Close pool, cancel tasks, close http client session"""
-        try:
+        """Close pool, cancel tasks, close http client session and extraction pool, once"""
+        if self._cleaned:
+            return
+        self._cleaned = True
+        if self.autoscaler is not None:
+            self.autoscaler.stop()
+        self.progress.stop()
+        await self.flush_checkpoint()
+        self.working_queue.close()
+        self.extractor.shutdown()
+        if self.client is not None:
             await self.client.aclose()
-        except:
-            pass  # ignore
-        try:
+        if self.pool is not None:
             await self.pool.close()
-        except:
-            pass  # ignore
-        if not self.close.is_set():
-            self.close.set()
+        self.close.set()
         logger.debug(f"Closing")
 
     async def consumer(self):
@@ -439,8 +776,8 @@ class Crawler:
         async for future in self.pool.iter():
             if future.done():
                 logger.debug(f"Done task for {future}")
-                result = future.result()
-                if future.exception() is not None:
+                if not future.cancelled() and future.exception() is not None:
+                    self.stats.record_error(future.exception())
                     try:
                         raise CrawlerException(
                             future.exception()
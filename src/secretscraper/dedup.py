@@ -0,0 +1,223 @@
+"""Compact dedup indexes of urls, keyed by a hash of the canonical url.
+
+A url is canonical in the same sense `URLNode` compares urls: by the components
+of its parsed url. Indexes store fingerprints only, not url nodes, so a node can
+be freed once nothing else needs it.
+
+Usage:
+    visited = FingerprintSet()  # exact up to 64/128-bit hash collisions
+    visited = BloomFilter(capacity=10_000_000, error_rate=1e-4)  # fixed size, false positives
+
+    if url_node not in visited:
+        visited.add(url_node)
+"""
+
+import array
+import hashlib
+import math
+import typing
+from urllib.parse import urlparse
+
+from .entity import URL, URLNode
+
+__all__ = [
+    "URLIndex",
+    "FingerprintSet",
+    "BloomFilter",
+    "url_fingerprint",
+    "canonicalize_url",
+    "create_url_index",
+    "DEDUP_MODES",
+]
+
+DEDUP_MODES = ("exact", "bloom")
+
+URLLike = typing.Union[URLNode, URL]
+
+_MASK_64 = (1 << 64) - 1
+
+
+def canonicalize_url(url: str) -> str:
+    """Url as requested from the server: lower case host and no fragment"""
+    url_object = urlparse(url)
+    netloc = url_object.netloc
+    if "@" not in netloc:  # user info is case-sensitive
+        netloc = netloc.lower()
+    return url_object._replace(netloc=netloc, fragment="").geturl()
+
+
+def url_fingerprint(url: URLLike, bits: int = 64) -> int:
+    """Hash of the canonical url, `bits` wide"""
+    url_object = url.url_object if isinstance(url, URLNode) else url
+    canonical = "\0".join(url_object).encode("utf8", errors="surrogatepass")
+    return int.from_bytes(hashlib.blake2b(canonical, digest_size=bits // 8).digest(), "little")
+
+
+class URLIndex(typing.Protocol):
+    """Set-like index of urls"""
+
+    def add(self, url: URLLike) -> None: ...
+
+    def __contains__(self, url: URLLike) -> bool: ...
+
+    def __len__(self) -> int: ...
+
+    @property
+    def nbytes(self) -> int: ...
+
+
+class FingerprintSet(URLIndex):
+    """Exact set of url fingerprints in an open-addressing table of 64-bit slots.
+
+    Takes 16 to 32 bytes per url for 64-bit fingerprints, twice that for 128-bit ones.
+    """
+
+    _MAX_LOAD = 0.5
+
+    def __init__(self, bits: int = 64, capacity: int = 1024):
+        """
+
+        :param bits: fingerprint width, 64 or 128
+        :param capacity: initial number of slots, grows on demand
+        """
+        if bits not in (64, 128):
+            raise ValueError("bits must be 64 or 128")
+        self.bits = bits
+        self._width = bits // 64  # array items per slot
+        self._size = 1 << max(capacity - 1, 1).bit_length()  # number of slots
+        self._slots = array.array("Q", bytes(8 * self._width * self._size))
+        self._len = 0
+
+    def _words(self, url: URLLike) -> typing.Tuple[int, ...]:
+        """Fingerprint as 64-bit words, never starting with zero as zero marks an empty slot"""
+        fingerprint = url_fingerprint(url, self.bits)
+        words = (fingerprint,) if self._width == 1 else (fingerprint & _MASK_64, fingerprint >> 64)
+        return words if words[0] else (1,) + words[1:]
+
+    def _find(self, words: typing.Tuple[int, ...]) -> typing.Tuple[int, bool]:
+        """Index of the slot holding `words` or of the empty slot where it belongs, and whether it was found"""
+        slots, width, mask = self._slots, self._width, self._size - 1
+        first = words[0]
+        index = first & mask
+        while True:
+            base = index * width
+            slot = slots[base]
+            if slot == 0:
+                return base, False
+            if slot == first and (width == 1 or slots[base + 1] == words[1]):
+                return base, True
+            index = (index + 1) & mask
+
+    def _grow(self) -> None:
+        old_slots, width = self._slots, self._width
+        self._size *= 2
+        self._slots = array.array("Q", bytes(8 * width * self._size))
+        for base in range(0, len(old_slots), width):
+            if old_slots[base] != 0:
+                words = tuple(old_slots[base:base + width])
+                new_base = self._find(words)[0]
+                self._slots[new_base:new_base + width] = array.array("Q", words)
+
+    def add(self, url: URLLike) -> None:
+        """Add a url"""
+        words = self._words(url)
+        base, found = self._find(words)
+        if found:
+            return
+        slots = self._slots
+        slots[base] = words[0]
+        if self._width == 2:
+            slots[base + 1] = words[1]
+        self._len += 1
+        if self._len > self._size * self._MAX_LOAD:
+            self._grow()
+
+    def __contains__(self, url: URLLike) -> bool:
+        return self._find(self._words(url))[1]
+
+    def __len__(self) -> int:
+        return self._len
+
+    @property
+    def nbytes(self) -> int:
+        """Size of the table in bytes"""
+        return self._slots.itemsize * len(self._slots)
+
+
+class BloomFilter(URLIndex):
+    """Fixed-size probabilistic set of urls.
+
+    Membership tests have no false negatives and a false positive rate of about
+    `error_rate` while at most `capacity` urls are added. A false positive makes
+    the crawler skip a url it has not visited.
+    """
+
+    def __init__(self, capacity: int = 10_000_000, error_rate: float = 1e-4):
+        """
+
+        :param capacity: expected number of urls
+        :param error_rate: false positive rate at capacity
+        """
+        if capacity < 1:
+            raise ValueError("capacity must be at least 1")
+        if not 0 < error_rate < 1:
+            raise ValueError("error_rate must be between 0 and 1")
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.num_bits = math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2)
+        self.num_hashes = max(1, round(self.num_bits / capacity * math.log(2)))
+        self._bits = bytearray((self.num_bits + 7) // 8)
+        self._len = 0
+
+    def _positions(self, url: URLLike) -> typing.List[int]:
+        """Bit positions of a url, by double hashing of a 128-bit fingerprint"""
+        fingerprint = url_fingerprint(url, 128)
+        h1, h2 = fingerprint & _MASK_64, fingerprint >> 64
+        h2 |= 1
+        num_bits = self.num_bits
+        return [(h1 + i * h2) % num_bits for i in range(self.num_hashes)]
+
+    def add(self, url: URLLike) -> None:
+        """Add a url"""
+        bits = self._bits
+        is_new = False
+        for position in self._positions(url):
+            byte, mask = position >> 3, 1 << (position & 7)
+            if not bits[byte] & mask:
+                bits[byte] |= mask
+                is_new = True
+        if is_new:
+            self._len += 1
+
+    def __contains__(self, url: URLLike) -> bool:
+        bits = self._bits
+        for position in self._positions(url):
+            if not bits[position >> 3] & (1 << (position & 7)):
+                return False
+        return True
+
+    def __len__(self) -> int:
+        """Approximate number of distinct urls added"""
+        return self._len
+
+    @property
+    def nbytes(self) -> int:
+        """Size of the bit array in bytes"""
+        return len(self._bits)
+
+
+def create_url_index(
+    mode: str = "exact", bits: int = 64, capacity: int = 10_000_000, error_rate: float = 1e-4
+) -> URLIndex:
+    """Create a dedup index
+
+    :param mode: "exact" for a FingerprintSet, "bloom" for a BloomFilter
+    :param bits: fingerprint width of the exact index, 64 or 128
+    :param capacity: expected number of urls of the bloom filter
+    :param error_rate: false positive rate of the bloom filter at capacity
+    """
+    if mode == "exact":
+        return FingerprintSet(bits=bits)
+    if mode == "bloom":
+        return BloomFilter(capacity=capacity, error_rate=error_rate)
+    raise ValueError(f"mode must be one of {DEDUP_MODES}, got {mode!r}")
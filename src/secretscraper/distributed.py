@@ -0,0 +1,571 @@
+"""Crawl with workers on several machines, coordinated through a broker.
+
+The broker holds the frontier and the visited urls of the crawl. Workers lease
+batches of urls, crawl them, and complete the lease with the urls they found
+and their results in one step. A lease not renewed within its ttl, because its
+worker died or hung, expires and its urls are leased again to another worker:
+
+    broker = SQLiteBroker("crawl-broker.sqlite3", clear=True)
+    crawler = DistributedCrawler(broker, local_workers=4, start_urls=urls, url_filter=..., parser=..., handler=...)
+    crawler.start()  # results in crawler.url_dict, crawler.js_dict and crawler.url_secrets
+
+    # on other machines sharing the broker
+    DistributedWorker(SQLiteBroker("crawl-broker.sqlite3"), url_filter=..., parser=..., handler=...).start()
+
+`InMemoryBroker` serves workers in the same process, `SQLiteBroker` serves
+processes sharing its file. Results are merged like checkpoints, so a crawl
+coordinated by a `SQLiteBroker` resumes when the coordinator is started again
+on the same file. Rate limits per domain apply per worker. Workers call the
+broker in a thread, so its blocking calls do not stall their event loop.
+
+Distributed crawls are used as a library; the command line does not expose them.
+"""
+
+import asyncio
+import collections
+import contextlib
+import itertools
+import logging
+import multiprocessing
+import os
+import pathlib
+import socket
+import sqlite3
+import threading
+import time
+import typing
+from collections import namedtuple
+from urllib.parse import urlparse
+
+from .cache import DiskCache
+from .checkpoint import (
+    DONE,
+    JS_LINK,
+    URL_LINK,
+    Checkpoint,
+    CheckpointRows,
+    CheckpointState,
+    create_tables,
+    node_row,
+    read_state,
+    secret_row,
+    write_rows,
+)
+from .coroutinue import AsyncTask
+from .crawler import Crawler
+from .entity import URLNode
+from .exception import CrawlerException
+
+__all__ = ["Broker", "InMemoryBroker", "SQLiteBroker", "Lease", "DistributedWorker", "DistributedCrawler"]
+
+logger = logging.getLogger(__name__)
+
+Lease = namedtuple("Lease", ["id", "urls"])  # urls are (url, depth) pairs
+
+# states of a url in the broker
+PENDING, LEASED, FINISHED = 0, 1, 2
+
+# connections of SQLiteBroker inherited by a forked process, never used or closed by it
+_inherited_connections: typing.List[sqlite3.Connection] = []
+
+
+class Broker(typing.Protocol):
+    """Frontier, dedup and leases of a distributed crawl, and its merged results"""
+
+    # whether forked processes can use the broker through `connect`
+    multiprocess: bool
+
+    def add(self, urls: typing.Iterable[typing.Tuple[str, int]]) -> int:
+        """Add (url, depth) pairs not seen before to the frontier
+
+        :return: number of urls added
+        """
+        ...
+
+    def lease(self, worker: str, size: int, ttl: float) -> typing.Optional[Lease]:
+        """Lease up to size pending urls, shallowest first, after expiring overdue leases
+
+        :return: the lease, None if no url is pending
+        """
+        ...
+
+    def renew(self, lease_id: int, ttl: float) -> bool:
+        """Extend a lease by ttl seconds from now, False if it expired"""
+        ...
+
+    def complete(self, lease_id: int, found: typing.Iterable[typing.Tuple[str, int]], rows: CheckpointRows) -> bool:
+        """Finish the urls of a lease, add the urls found on them and merge their results
+
+        :return: False if the lease expired, in which case nothing is recorded
+        """
+        ...
+
+    def is_finished(self) -> bool:
+        """Whether no url is pending or leased"""
+        ...
+
+    def results(self) -> CheckpointState:
+        """Merged results, as loaded from a checkpoint"""
+        ...
+
+    def connect(self) -> "Broker":
+        """A handle on the same broker, for use in another process"""
+        ...
+
+    def close(self) -> None: ...
+
+
+class InMemoryBroker(Broker):
+    """Broker for workers in the same process, e.g. in threads or in tests"""
+
+    multiprocess = False
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._seen: typing.Set[str] = set()
+        self._pending: typing.List[typing.Deque[str]] = []  # urls by depth
+        self._depths: typing.Dict[str, int] = dict()
+        self._leases: typing.Dict[int, typing.Tuple[str, float, typing.List[str]]] = dict()  # id to worker, expiry, urls
+        self._lease_ids = itertools.count(1)
+        self._results = Checkpoint(":memory:")
+
+    def _push(self, url: str, depth: int) -> None:
+        while len(self._pending) <= depth:
+            self._pending.append(collections.deque())
+        self._pending[depth].append(url)
+
+    def add(self, urls: typing.Iterable[typing.Tuple[str, int]]) -> int:
+        with self._lock:
+            return self._add(urls)
+
+    def _add(self, urls: typing.Iterable[typing.Tuple[str, int]]) -> int:
+        added = 0
+        for url, depth in urls:
+            if url in self._seen:
+                continue
+            self._seen.add(url)
+            self._depths[url] = depth
+            self._push(url, depth)
+            added += 1
+        return added
+
+    def _expire(self) -> None:
+        now = time.monotonic()
+        for lease_id in [lease_id for lease_id, (_, expires, _) in self._leases.items() if expires <= now]:
+            worker, _, urls = self._leases.pop(lease_id)
+            logger.warning(f"Lease {lease_id} of {worker} expired, {len(urls)} urls are leased again")
+            for url in urls:
+                self._push(url, self._depths[url])
+
+    def lease(self, worker: str, size: int, ttl: float) -> typing.Optional[Lease]:
+        with self._lock:
+            self._expire()
+            urls = []
+            for queue in self._pending:
+                while queue and len(urls) < size:
+                    urls.append(queue.popleft())
+            if not urls:
+                return None
+            lease_id = next(self._lease_ids)
+            self._leases[lease_id] = (worker, time.monotonic() + ttl, urls)
+            return Lease(lease_id, [(url, self._depths[url]) for url in urls])
+
+    def renew(self, lease_id: int, ttl: float) -> bool:
+        with self._lock:
+            if lease_id not in self._leases:
+                return False
+            worker, _, urls = self._leases[lease_id]
+            self._leases[lease_id] = (worker, time.monotonic() + ttl, urls)
+            return True
+
+    def complete(self, lease_id: int, found: typing.Iterable[typing.Tuple[str, int]], rows: CheckpointRows) -> bool:
+        with self._lock:
+            if self._leases.pop(lease_id, None) is None:
+                return False
+            self._add(found)
+            self._results.write(rows)
+            return True
+
+    def is_finished(self) -> bool:
+        with self._lock:
+            return not self._leases and not any(self._pending)
+
+    def results(self) -> CheckpointState:
+        with self._lock:
+            return self._results.load()
+
+    def connect(self) -> "InMemoryBroker":
+        return self
+
+    def close(self) -> None:
+        self._results.close()
+
+
+class SQLiteBroker(Broker):
+    """Broker in a SQLite file, shared by the worker processes that open it.
+
+    Leases and completions are short write transactions; the frontier, the
+    leases and the results live in the same file, so a completion is atomic.
+    The connection is opened per process: a forked process opens its own on
+    first use and leaves the inherited one untouched.
+    """
+
+    multiprocess = True
+
+    def __init__(self, path: typing.Union[str, pathlib.Path], clear: bool = False, timeout: float = 30):
+        """
+
+        :param path: SQLite file, created if missing
+        :param clear: clear the crawl in the file to start a new one
+        :param timeout: seconds to wait for the file lock held by another process
+        """
+        self.path = pathlib.Path(path)
+        self.timeout = timeout
+        self._pid = os.getpid()
+        self._lock = threading.Lock()
+        self._conn = self._open()
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS frontier (url TEXT PRIMARY KEY, depth INTEGER, state INTEGER, lease INTEGER)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS frontier_state ON frontier (state, depth)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS frontier_lease ON frontier (lease)")
+        # lease ids are never reused, so an expired lease cannot be completed by mistake
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS leases (id INTEGER PRIMARY KEY AUTOINCREMENT, worker TEXT, expires REAL)"
+        )
+        create_tables(self._conn)
+        if clear:
+            for table in ("frontier", "leases", "nodes", "links", "secrets"):
+                self._conn.execute(f"DELETE FROM {table}")
+
+    def _open(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(str(self.path), timeout=self.timeout, check_same_thread=False, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    @contextlib.contextmanager
+    def _connection(self) -> typing.Iterator[sqlite3.Connection]:
+        """Connection of this process, held under the lock"""
+        if self._pid != os.getpid():
+            # SQLite connections must not be used or closed across fork: the inherited one is kept unused
+            _inherited_connections.append(self._conn)
+            self._pid = os.getpid()
+            self._lock = threading.Lock()  # may have been held by a thread of the parent
+            self._conn = self._open()
+        with self._lock:
+            yield self._conn
+
+    def _transaction(self, func: typing.Callable[[sqlite3.Connection], typing.Any]) -> typing.Any:
+        """Run func in a write transaction, locking the file against other writers from the start"""
+        with self._connection() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                result = func(conn)
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            conn.execute("COMMIT")
+            return result
+
+    @staticmethod
+    def _add(conn: sqlite3.Connection, urls: typing.Iterable[typing.Tuple[str, int]]) -> int:
+        before = conn.total_changes
+        conn.executemany(
+            f"INSERT OR IGNORE INTO frontier VALUES (?, ?, {PENDING}, NULL)", ((url, depth) for url, depth in urls)
+        )
+        return conn.total_changes - before
+
+    def add(self, urls: typing.Iterable[typing.Tuple[str, int]]) -> int:
+        return self._transaction(lambda conn: self._add(conn, urls))
+
+    def lease(self, worker: str, size: int, ttl: float) -> typing.Optional[Lease]:
+        def lease(conn: sqlite3.Connection) -> typing.Optional[Lease]:
+            now = time.time()
+            expired = conn.execute("SELECT id, worker FROM leases WHERE expires <= ?", (now,)).fetchall()
+            for lease_id, lease_worker in expired:
+                cursor = conn.execute(
+                    f"UPDATE frontier SET state = {PENDING}, lease = NULL WHERE lease = ?", (lease_id,)
+                )
+                logger.warning(f"Lease {lease_id} of {lease_worker} expired, {cursor.rowcount} urls are leased again")
+                conn.execute("DELETE FROM leases WHERE id = ?", (lease_id,))
+            rows = conn.execute(
+                f"SELECT url, depth FROM frontier WHERE state = {PENDING} ORDER BY depth, rowid LIMIT ?", (size,)
+            ).fetchall()
+            if not rows:
+                return None
+            lease_id = conn.execute("INSERT INTO leases (worker, expires) VALUES (?, ?)", (worker, now + ttl)).lastrowid
+            conn.executemany(
+                f"UPDATE frontier SET state = {LEASED}, lease = ? WHERE url = ?", ((lease_id, url) for url, _ in rows)
+            )
+            return Lease(lease_id, rows)
+
+        return self._transaction(lease)
+
+    def renew(self, lease_id: int, ttl: float) -> bool:
+        return self._transaction(
+            lambda conn: conn.execute(
+                "UPDATE leases SET expires = ? WHERE id = ?", (time.time() + ttl, lease_id)
+            ).rowcount
+            > 0
+        )
+
+    def complete(self, lease_id: int, found: typing.Iterable[typing.Tuple[str, int]], rows: CheckpointRows) -> bool:
+        def complete(conn: sqlite3.Connection) -> bool:
+            if conn.execute("DELETE FROM leases WHERE id = ?", (lease_id,)).rowcount == 0:
+                return False
+            conn.execute(f"UPDATE frontier SET state = {FINISHED}, lease = NULL WHERE lease = ?", (lease_id,))
+            self._add(conn, found)
+            write_rows(conn, rows)
+            return True
+
+        return self._transaction(complete)
+
+    def is_finished(self) -> bool:
+        with self._connection() as conn:
+            return conn.execute(f"SELECT 1 FROM frontier WHERE state < {FINISHED} LIMIT 1").fetchone() is None
+
+    def results(self) -> CheckpointState:
+        with self._connection() as conn:
+            return read_state(conn)
+
+    def connect(self) -> "SQLiteBroker":
+        return SQLiteBroker(self.path, timeout=self.timeout)
+
+    def close(self) -> None:
+        with self._connection() as conn:
+            conn.close()
+
+
+class DistributedWorker(Crawler):
+    """Crawler taking its urls from leases of a broker and reporting what it found back"""
+
+    def __init__(
+        self,
+        broker: Broker,
+        worker_id: typing.Optional[str] = None,
+        batch_size: int = 100,
+        lease_ttl: float = 60,
+        poll_interval: float = 0.5,
+        **kwargs,
+    ):
+        """
+
+        :param broker: broker of the crawl
+        :param worker_id: name of the worker in the broker, host and pid by default
+        :param batch_size: max urls of a lease
+        :param lease_ttl: seconds a lease is kept without renewal, renewed every third of it while crawling
+        :param poll_interval: seconds between lease attempts while other workers hold the pending urls
+        :param kwargs: arguments of `Crawler`, start_urls is ignored
+        """
+        if batch_size < 1:
+            raise ValueError("batch_size must be at least 1")
+        if lease_ttl <= 0:
+            raise ValueError("lease_ttl must be positive")
+        kwargs.setdefault("start_urls", [])
+        super().__init__(**kwargs)
+        self.broker = broker
+        self.worker_id = worker_id or f"{socket.gethostname()}-{os.getpid()}"
+        self.batch_size = batch_size
+        self.lease_ttl = lease_ttl
+        self.poll_interval = poll_interval
+        self.leases = 0  # leases completed
+        self._processed: typing.List[URLNode] = []  # url nodes of the current lease taken from the frontier
+        self._found: typing.List[typing.Tuple[str, int]] = []  # urls found on the current lease
+
+    async def main_task(self):
+        try:
+            await asyncio.gather(self.work(), self.consumer())
+        except asyncio.CancelledError:
+            return
+
+    async def work(self) -> None:
+        """Crawl leases until the broker has no url left"""
+        loop = asyncio.get_running_loop()
+        try:
+            self.progress.start(loop)
+            while True:
+                lease = await loop.run_in_executor(
+                    None, self.broker.lease, self.worker_id, self.batch_size, self.lease_ttl
+                )
+                if lease is None:
+                    if await loop.run_in_executor(None, self.broker.is_finished):
+                        break
+                    await asyncio.sleep(self.poll_interval)  # other workers may still find urls
+                    continue
+                await self.crawl_lease(lease)
+            await self.pool.done_queue.join()
+            logger.debug(f"Worker {self.worker_id} finished {self.leases} leases. {self.stats.summary()}")
+        except asyncio.CancelledError:
+            pass
+        except Exception as e:
+            raise CrawlerException("Unexpected Exception") from e
+        finally:
+            await self.clean()
+
+    async def crawl_lease(self, lease: Lease) -> None:
+        """Crawl the urls of a lease, then complete it"""
+        for url, depth in lease.urls:
+            url_node = URLNode(url=url, depth=depth)
+            self.visited_urls.add(url_node)
+            self.working_queue.put(url_node)
+        heartbeat = self._event_loop.create_task(self.heartbeat(lease))
+        try:
+            while (url_node := await self.working_queue.get()) is not None:
+                if self.max_depth <= 0 or url_node.depth <= self.max_depth:
+                    future = await self.pool.submit(AsyncTask(self.process_one, url_node))
+                    future.add_done_callback(lambda _: self.working_queue.task_done())
+                else:
+                    self.working_queue.task_done()
+        finally:
+            heartbeat.cancel()
+        found, rows = self._found, self.take_rows()
+        self._found = []
+        if await asyncio.get_running_loop().run_in_executor(None, self.broker.complete, lease.id, found, rows):
+            self.leases += 1
+        else:
+            logger.warning(f"Lease {lease.id} expired before {self.worker_id} completed it")
+
+    async def heartbeat(self, lease: Lease) -> None:
+        """Renew a lease while it is crawled"""
+        loop = asyncio.get_running_loop()
+        while True:
+            await asyncio.sleep(self.lease_ttl / 3)
+            if not await loop.run_in_executor(None, self.broker.renew, lease.id, self.lease_ttl):
+                logger.warning(f"Lease {lease.id} of {self.worker_id} expired while crawling")
+                return
+
+    def enqueue(self, url_node: URLNode) -> None:
+        # crawled by whichever worker leases it
+        self.visited_urls.add(url_node)
+        self._found.append((url_node.url, url_node.depth))
+
+    async def process_one(self, url_node: URLNode):
+        self._processed.append(url_node)
+        await super().process_one(url_node)
+
+    def take_rows(self) -> CheckpointRows:
+        """Rows of the results of the current lease, forgotten once taken"""
+        rows = CheckpointRows([], [], [], [], [])
+        for url_node in self._processed:
+            url = url_node.url
+            rows.done.append(node_row(url_node, DONE))
+            for kind, results in ((URL_LINK, self.url_dict), (JS_LINK, self.js_dict)):
+                for child in results.get(url_node, ()):
+                    rows.found.append(node_row(child))
+                    rows.links.append((url, child.url, kind))
+            rows.secrets.extend(secret_row(url, secret) for secret in self.url_secrets.get(url_node, ()))
+        self._processed = []
+        self.url_dict, self.js_dict, self.url_secrets = dict(), dict(), dict()
+        return rows
+
+
+def _run_worker(broker: Broker, kwargs: dict) -> None:
+    """Process target: crawl as a worker with a connection of its own to the broker"""
+    broker = broker.connect()
+    try:
+        DistributedWorker(broker, **kwargs).start()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        broker.close()
+
+
+class DistributedCrawler(Crawler):
+    """Coordinator of a distributed crawl: seeds the broker, waits for the workers and loads the results.
+
+    Exposes the results of `Crawler`, and validates them in the coordinator.
+    `max_page_num` applies per worker. The coordinator forks the local workers
+    without a disk cache open, and opens it once they are done.
+    """
+
+    def __init__(
+        self,
+        broker: Broker,
+        local_workers: int = 0,
+        batch_size: int = 100,
+        lease_ttl: float = 60,
+        poll_interval: float = 0.5,
+        **kwargs,
+    ):
+        """
+
+        :param broker: broker of the crawl
+        :param local_workers: worker processes to fork, 0 to rely on workers started elsewhere
+        :param batch_size: max urls of a lease of the local workers
+        :param lease_ttl: seconds a lease of the local workers is kept without renewal
+        :param poll_interval: seconds between checks of the broker
+        :param kwargs: arguments of `Crawler`, also passed to the local workers
+        """
+        if local_workers and not broker.multiprocess:
+            raise ValueError(f"{broker.__class__.__name__} cannot serve worker processes")
+        if kwargs.get("checkpoint"):
+            raise ValueError("checkpoint is not supported by a distributed crawl, the broker keeps its state")
+        super().__init__(**{**kwargs, "disk_cache": ""})
+        self.broker = broker
+        self.local_workers = local_workers
+        self.poll_interval = poll_interval
+        self._worker_kwargs = dict(kwargs, batch_size=batch_size, lease_ttl=lease_ttl, poll_interval=poll_interval)
+        self.processes: typing.List[multiprocessing.process.BaseProcess] = []
+
+    def seed(self) -> int:
+        """Add the start urls passing the filter to the broker
+
+        :return: number of urls added
+        """
+        urls = [(url, 0) for url in self.start_urls if self.filter.doFilter(urlparse(url))]
+        return self.broker.add(urls)
+
+    def start(self):
+        """Seed the broker, run the local workers until the crawl is finished and load the results"""
+        self.seed()
+        context = multiprocessing.get_context("fork") if "fork" in multiprocessing.get_all_start_methods() else None
+        context = context or multiprocessing.get_context()
+        self.processes = [
+            context.Process(
+                target=_run_worker,
+                args=(self.broker, dict(self._worker_kwargs, worker_id=f"{socket.gethostname()}-local-{i}")),
+                name=f"secretscraper-worker-{i}",
+                daemon=True,
+            )
+            for i in range(self.local_workers)
+        ]
+        for process in self.processes:
+            process.start()
+        try:
+            while not self.broker.is_finished():
+                if self.processes and not any(process.is_alive() for process in self.processes):
+                    logger.error("All local workers exited before the crawl was finished")
+                    break
+                time.sleep(self.poll_interval)
+        finally:
+            for process in self.processes:
+                process.join(timeout=max(self.poll_interval * 4, 5))
+                if process.is_alive():
+                    process.terminate()
+        if self._worker_kwargs.get("disk_cache"):
+            self.open_disk_cache()
+        self.load()
+        super().close_all()
+
+    def open_disk_cache(self) -> None:
+        """Open the disk cache the workers wrote to, for validation"""
+        max_bytes = self._worker_kwargs.get("disk_cache_max_bytes")
+        path = self._worker_kwargs["disk_cache"]
+        self.disk_cache = DiskCache(path) if max_bytes is None else DiskCache(path, max_bytes=max_bytes)
+
+    def load(self) -> None:
+        """Load the results merged by the broker"""
+        state = self.broker.results()
+        self.url_dict, self.js_dict, self.url_secrets = state.url_dict, state.js_dict, state.url_secrets
+        for url_node in self.found_nodes():
+            self.found_urls.add(url_node)
+        self.total_page = len(state.visited)
+        logger.debug(f"Distributed crawl finished: {self.total_page} pages")
+
+    def close_all(self):
+        for process in self.processes:
+            if process.is_alive():
+                process.terminate()
+                process.join(timeout=5)
+        super().close_all()
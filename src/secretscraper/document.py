@@ -0,0 +1,208 @@
+"""Response document shared by the title, link and secret extraction stages.
+
+A `Document` decodes the body, encodes it to UTF-8 and parses the HTML at most
+once, however many stages consume it:
+
+    document = Document(content=response.content, encoding=response.encoding)
+    document.title  # parsed once
+    document.links  # reuses the same parse
+    document.content  # UTF-8 bytes for hyperscan, no re-encode for UTF-8 bodies
+
+Titles and links are collected by a streaming parser built on the events of
+`html.parser.HTMLParser`, without building a tree. The BeautifulSoup tree is
+only built on demand, for the "bs4" engine, BSHandler, or as a fallback if the
+streaming parser fails.
+"""
+
+import codecs
+import functools
+import logging
+import typing
+from html.parser import HTMLParser
+
+from bs4 import BeautifulSoup
+
+__all__ = ["Document", "as_document", "HTML_ENGINES"]
+
+logger = logging.getLogger(__name__)
+
+HTML_ENGINES = ("stream", "bs4")
+
+# non-ASCII letters that re.IGNORECASE matches with i and s, but that lower() keeps or expands,
+# the Kelvin sign matched with k lowers to k
+_ASCII_CASE_FOLDS = "\u0130\u0131\u017f"
+_ASCII_CASE_FOLD_TABLE = str.maketrans(_ASCII_CASE_FOLDS, "iis")
+
+
+def _get_attr(attrs: typing.List[typing.Tuple[str, typing.Optional[str]]], name: str) -> typing.Optional[str]:
+    """Value of the last attribute named `name`, like BeautifulSoup does for duplicate attributes"""
+    value = None
+    for key, val in attrs:
+        if key == name:
+            value = val if val is not None else ""
+    return value
+
+
+class _StreamingLinkParser(HTMLParser):
+    """Collect tag links and titles as parser events arrive, without building a tree"""
+
+    # end tags which implicitly close an unclosed <title>
+    _TITLE_CLOSERS = frozenset(("title", "head", "body", "html"))
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.links: typing.Set[str] = set()
+        self.titles: typing.List[str] = list()
+        self._title: typing.Optional[typing.List[str]] = None  # text of the open <title>
+
+    def handle_starttag(self, tag: str, attrs: typing.List[typing.Tuple[str, typing.Optional[str]]]) -> None:
+        if tag == "a" or tag == "link":
+            href = _get_attr(attrs, "href")
+            if href is not None:
+                self.links.add(href)
+        elif tag == "script":
+            src = _get_attr(attrs, "src")
+            if src is not None and src.endswith(".js"):
+                self.links.add(src)
+        elif tag == "title":
+            self._close_title()
+            self._title = list()
+
+    def handle_startendtag(self, tag: str, attrs: typing.List[typing.Tuple[str, typing.Optional[str]]]) -> None:
+        self.handle_starttag(tag, attrs)
+        if tag == "title":
+            self._close_title()
+
+    def handle_endtag(self, tag: str) -> None:
+        if tag in self._TITLE_CLOSERS:
+            self._close_title()
+
+    def handle_data(self, data: str) -> None:
+        if self._title is not None:
+            self._title.append(data)
+
+    def close(self) -> None:
+        super().close()
+        self._close_title()
+
+    def _close_title(self) -> None:
+        if self._title is not None:
+            text = "".join(self._title)
+            self.titles.append(text.replace("\n", " ").replace("\r", " ").strip())
+            self._title = None
+
+
+class Document:
+    """A fetched body, built from either the decoded text or the raw bytes and their encoding.
+
+    Every derived form is computed lazily and cached.
+    """
+
+    def __init__(
+        self,
+        text: typing.Optional[str] = None,
+        content: typing.Optional[bytes] = None,
+        encoding: typing.Optional[str] = None,
+    ):
+        """
+
+        :param text: decoded body
+        :param content: raw body, used if text is None
+        :param encoding: encoding of content, defaults to utf-8
+        """
+        if text is None and content is None:
+            raise ValueError("Either text or content must be provided")
+        self._text = text
+        self._content = content if text is None else None
+        self.encoding: str = encoding or "utf-8"
+
+    def __getstate__(self) -> dict:
+        """Pickle the source only, derived forms are rebuilt on demand"""
+        return {"_text": self._text, "_content": self._content, "encoding": self.encoding}
+
+    def __setstate__(self, state: dict) -> None:
+        self.__dict__.update(state)
+
+    @functools.cached_property
+    def text(self) -> str:
+        """Decoded body"""
+        if self._text is not None:
+            return self._text
+        return self._content.decode(self.encoding, errors="replace")
+
+    @functools.cached_property
+    def folded(self) -> str:
+        """Lower-cased text, in which an ASCII literal is found wherever `re.IGNORECASE` would match it"""
+        text = self.text
+        if not text.isascii() and any(char in text for char in _ASCII_CASE_FOLDS):
+            text = text.translate(_ASCII_CASE_FOLD_TABLE)
+        return text.lower()
+
+    @functools.cached_property
+    def content(self) -> bytes:
+        """Body encoded in UTF-8"""
+        if self._content is not None and codecs.lookup(self.encoding).name == "utf-8":
+            return self._content
+        return self.text.encode("utf8")
+
+    @functools.cached_property
+    def soup(self) -> BeautifulSoup:
+        """HTML tree of the body"""
+        return BeautifulSoup(self.text, "html.parser")
+
+    @functools.cached_property
+    def _stream(self) -> typing.Optional[_StreamingLinkParser]:
+        """Result of the streaming parse, None if the markup was rejected"""
+        parser = _StreamingLinkParser()
+        try:
+            parser.feed(self.text)
+            parser.close()
+        except Exception as e:
+            logger.debug(f"Streaming html parser failed, fallback to BeautifulSoup: {e}")
+            return None
+        return parser
+
+    @functools.cached_property
+    def title(self) -> str:
+        """Titles of the html, separated by |"""
+        if "soup" not in self.__dict__ and self._stream is not None:
+            return "|".join(self._stream.titles)
+        titles = list()
+        for t in self.soup.find_all("title"):
+            text = t.get_text()
+            titles.append(text.replace("\n", " ").replace("\r", " ").strip())
+        return "|".join(titles)
+
+    @functools.cached_property
+    def links(self) -> typing.FrozenSet[str]:
+        """Links in tag attributes: href of <a> and <link>, src of <script> ending with .js"""
+        if self._stream is not None:
+            return frozenset(self._stream.links)
+        return self.tree_links
+
+    def get_links(self, engine: str = "stream") -> typing.FrozenSet[str]:
+        """Links in tag attributes, collected by the streaming parser or the BeautifulSoup tree"""
+        if engine not in HTML_ENGINES:
+            raise ValueError(f"engine must be one of {HTML_ENGINES}, got {engine!r}")
+        return self.links if engine == "stream" else self.tree_links
+
+    @functools.cached_property
+    def tree_links(self) -> typing.FrozenSet[str]:
+        """Same as `links`, read from the BeautifulSoup tree"""
+        hrefs: typing.Set[str] = set()
+        for tag in self.soup.find_all(["a", "link"]):
+            href = tag.get("href")
+            if href is not None:
+                hrefs.add(str(href))
+        for tag in self.soup.find_all("script"):
+            src = tag.get("src")
+            if src is not None and str(src).endswith(".js"):
+                hrefs.add(str(src))
+        return frozenset(hrefs)
+
+
+def as_document(text: typing.Union[str, Document]) -> Document:
+    """Wrap text in a Document unless it already is one"""
+    if isinstance(text, Document):
+        return text
+    return Document(text=text)
@@ -1,6 +1,9 @@
 """Entity classes and factory methods."""
 
+import itertools
+import sys
 import typing
+import weakref
 from dataclasses import dataclass, field
 from urllib.parse import ParseResult, urlparse
 
@@ -12,26 +15,177 @@ except ImportError:
     URL = ParseResult
 
 
-@dataclass(unsafe_hash=True, eq=True)
+# url nodes by id, a spilled frontier holds the ids of its nodes and of their parents
+_nodes: "weakref.WeakValueDictionary[int, URLNode]" = weakref.WeakValueDictionary()
+_node_ids = itertools.count(1)
+
+
 class URLNode:
     """URL node used in site map.
     Compare based on url_object.
+
+    Slotted and compact: the url is stored as its parsed `url_object`, with scheme and netloc interned,
+    `url` is only stored if it differs from `url_object.geturl()`. A node keeps its parent,
+    and so its chain of ancestors, alive.
     """
 
-    url: str = field(hash=False, compare=False)
-    url_object: ParseResult = field(hash=True, compare=True)
-    response_status: str = field(default="Unknown", hash=False, compare=False)
-    depth: int = field(default=0, hash=False, compare=False)
-    parent: typing.Optional["URLNode"] = field(default=None, hash=False, compare=False)
-    content_length: int = field(hash=False, compare=False, default=-1)
-    content_type: str = field(hash=False, compare=False, default="")
-    title: str = field(hash=False, compare=False, default="")
+    __slots__ = (
+        "_url",
+        "_url_object",
+        "_id",
+        "_parent",
+        "response_status",
+        "depth",
+        "content_length",
+        "content_type",
+        "title",
+        "__weakref__",
+    )
+
+    def __init__(
+        self,
+        url: typing.Optional[str] = None,
+        url_object: typing.Optional[ParseResult] = None,
+        response_status: str = "Unknown",
+        depth: int = 0,
+        parent: typing.Optional["URLNode"] = None,
+        content_length: int = -1,
+        content_type: str = "",
+        title: str = "",
+    ):
+        """
+
+        :param url: url string, defaults to `url_object.geturl()`
+        :param url_object: parsed url, defaults to `urlparse(url)`
+        """
+        if url_object is None:
+            if url is None:
+                raise ValueError("URLNode: either url or url_object must be provided")
+            url_object = urlparse(url)
+        scheme, netloc, path, params, query, fragment = url_object
+        self._url_object = ParseResult(sys.intern(scheme), sys.intern(netloc), path, params, query, fragment)
+        self._url = url if url is not None and url != url_object.geturl() else None
+        self._id = 0  # id in the node table, assigned on first use of node_id
+        self._parent: typing.Optional[URLNode] = None
+        self.response_status = response_status
+        self.depth = depth
+        self.content_length = content_length
+        self.content_type = content_type
+        self.title = title
+        if parent is not None:
+            if depth <= parent.depth:
+                raise ValueError(
+                    f"URLNode: depth({depth}) must be greater than that of parent({parent.depth})"
+                )
+            self.parent = parent
+
+    @property
+    def url(self) -> str:
+        if self._url is not None:
+            return self._url
+        return self.url_object.geturl()
+
+    @url.setter
+    def url(self, url: str) -> None:
+        self._url = url if url != self.url_object.geturl() else None
+
+    @property
+    def url_object(self) -> ParseResult:
+        return self._url_object
+
+    @property
+    def scheme(self) -> str:
+        return self._url_object.scheme
+
+    @property
+    def netloc(self) -> str:
+        return self._url_object.netloc
+
+    @property
+    def path(self) -> str:
+        return self._url_object.path
+
+    @property
+    def node_id(self) -> int:
+        """Id to look the node up with `get_node` while it is alive"""
+        if self._id == 0:
+            self._id = next(_node_ids)
+            _nodes[self._id] = self
+        return self._id
+
+    @property
+    def parent_id(self) -> int:
+        """`node_id` of the parent, 0 for a root node"""
+        return self._parent.node_id if self._parent is not None else 0
+
+    @property
+    def parent(self) -> typing.Optional["URLNode"]:
+        """Parent node, None for a root node"""
+        return self._parent
 
-    def __post_init__(self):
-        if self.parent is not None and self.depth <= self.parent.depth:
-            raise ValueError(
-                f"URLNode: depth({self.depth}) must be greater than that of parent({self.parent.depth})"
-            )
+    @parent.setter
+    def parent(self, parent: typing.Optional["URLNode"]) -> None:
+        self._parent = parent
+
+    def __eq__(self, other: object) -> bool:
+        if other.__class__ is not self.__class__:
+            return NotImplemented
+        return self._url_object == other._url_object
+
+    def __hash__(self) -> int:
+        # same value as the former dataclass hash of (url_object,)
+        return hash((self._url_object,))
+
+    def __repr__(self) -> str:
+        return (
+            f"{self.__class__.__qualname__}(url={self.url!r}, url_object={self.url_object!r}, "
+            f"response_status={self.response_status!r}, depth={self.depth!r}, parent={self.parent!r}, "
+            f"content_length={self.content_length!r}, content_type={self.content_type!r}, title={self.title!r})"
+        )
+
+    def __reduce__(self):
+        # the parent by its url and depth only, not its chain of ancestors
+        parent = self.parent
+        return _restore_node, (
+            self.url,
+            self._url_object,
+            self.response_status,
+            self.depth,
+            (parent.url, parent.depth) if parent is not None else None,
+            self.content_length,
+            self.content_type,
+            self.title,
+        )
+
+
+def get_node(node_id: int) -> typing.Optional[URLNode]:
+    """Url node of a `URLNode.node_id`, None once it is garbage collected"""
+    return _nodes.get(node_id)
+
+
+# unpickled url nodes by url and depth, so a node unpickled after its parent is linked to it
+_restored: "weakref.WeakValueDictionary[typing.Tuple[str, int], URLNode]" = weakref.WeakValueDictionary()
+
+
+def _restore_node(
+    url: str,
+    url_object: ParseResult,
+    response_status: str,
+    depth: int,
+    parent: typing.Optional[typing.Tuple[str, int]],
+    content_length: int,
+    content_type: str,
+    title: str,
+) -> URLNode:
+    """Unpickle a url node, with the parent of the same url and depth if one was unpickled and is alive"""
+    parent_node = None
+    if parent is not None:
+        parent_node = _restored.get(parent)
+        if parent_node is None:
+            parent_node = URLNode(url=parent[0], depth=parent[1])
+    url_node = URLNode(url, url_object, response_status, depth, parent_node, content_length, content_type, title)
+    _restored[(url_node.url, depth)] = url_node
+    return url_node
 
 
 @dataclass(eq=True, frozen=True)
@@ -42,6 +196,17 @@ class Secret:
 
     type: str = field(compare=True, hash=True)
     data: typing.Any = field(compare=True, hash=True)
+    span: typing.Optional[typing.Tuple[int, int]] = field(default=None, compare=False, hash=False)  # byte offsets
+
+
+@dataclass(frozen=True)
+class PageResult:
+    """Results of one crawled page"""
+
+    url_node: URLNode
+    url_children: typing.FrozenSet[URLNode] = frozenset()
+    js_children: typing.FrozenSet[URLNode] = frozenset()
+    secrets: typing.FrozenSet[Secret] = frozenset()
 
 
 def create_url(url_str: str, depth: int = -1, parent: URLNode = None) -> URLNode:
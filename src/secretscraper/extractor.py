@@ -0,0 +1,188 @@
+"""Run the CPU-bound part of processing a page: secrets, child links and title.
+
+All stages consume one `Document`, so the body is decoded, encoded and parsed
+once. By default extraction runs inline on the event loop. With a thread or
+process executor the document is shipped to a worker and the loop keeps doing
+I/O only. Process workers receive the handler and the url parser once, at start-up,
+and send results back as compact tuples which are turned into `Secret` objects on the loop.
+
+What is extracted depends on the body only, links are re-based on each url
+afterwards. Results are memoized by a hash of the body and its encoding, so a
+bundle served at many urls or hosts is extracted once.
+"""
+
+import asyncio
+import codecs
+import concurrent.futures
+import hashlib
+import multiprocessing
+import typing
+from collections import OrderedDict, namedtuple
+
+from .document import Document, as_document
+from .entity import Secret, URLNode
+from .handler import Handler
+from .urlparser import Link, URLParser
+
+__all__ = ["Extractor", "ExtractResult", "ContentResult", "EXECUTOR_TYPES"]
+
+EXECUTOR_TYPES = ("", "thread", "process")
+
+ExtractResult = namedtuple("ExtractResult", ["title", "secrets", "children"])
+
+# what is extracted from a body, links is None if they were not extracted
+ContentResult = namedtuple("ContentResult", ["title", "secrets", "links"])
+
+# title, ((type, data), ...), ((scheme, netloc, path, params, query, fragment), ...) or None
+CompactResult = typing.Tuple[str, typing.Tuple[tuple, ...], typing.Optional[typing.Tuple[tuple, ...]]]
+
+# per-process state of extraction workers, installed by _init_worker
+_worker_handler: typing.Optional[Handler] = None
+_worker_parser: typing.Optional[URLParser] = None
+
+
+def _init_worker(handler: Handler, parser: URLParser) -> None:
+    """Initializer of process workers"""
+    global _worker_handler, _worker_parser
+    _worker_handler = handler
+    _worker_parser = parser
+
+
+def _memo_key(document: Document) -> bytes:
+    # the same bytes decode to other text, and so other secrets, in another encoding
+    digest = hashlib.blake2b(codecs.lookup(document.encoding).name.encode(), digest_size=16)
+    digest.update(b"\0")
+    digest.update(document.content)
+    return digest.digest()
+
+
+def extract_content(handler: Handler, parser: URLParser, text: typing.Union[str, Document], extend: bool) -> ContentResult:
+    """Extract title, secrets and, if `extend`, links from text"""
+    document = as_document(text)
+    secrets = handler.handle(document)
+    return ContentResult(
+        title=document.title,
+        secrets=frozenset(secrets) if secrets is not None else frozenset(),
+        links=parser.extract_links(document) if extend else None,
+    )
+
+
+def extract(
+    handler: Handler, parser: URLParser, url_node: URLNode, text: typing.Union[str, Document], extend: bool
+) -> ExtractResult:
+    """Extract title, secrets and, if `extend`, child url nodes from text"""
+    content = extract_content(handler, parser, text, extend)
+    return ExtractResult(
+        title=content.title,
+        secrets=set(content.secrets),
+        children=parser.rebase(url_node, content.links) if extend else set(),
+    )
+
+
+def _extract_in_worker(document: Document, extend: bool) -> CompactResult:
+    """Extract in a process worker, results are flattened to tuples of strings"""
+    result = extract_content(_worker_handler, _worker_parser, document, extend)
+    return (
+        result.title,
+        tuple((secret.type, secret.data) for secret in result.secrets),
+        tuple(tuple(link) for link in result.links) if result.links is not None else None,
+    )
+
+
+class Extractor:
+    """Extract secrets, child links and title of responses, inline or in an executor"""
+
+    def __init__(
+        self,
+        handler: Handler,
+        parser: URLParser,
+        executor_type: str = "",
+        max_workers: int = 0,
+        memo_size: int = 1024,
+    ):
+        """
+
+        :param handler: extract secrets
+        :param parser: extract child url nodes
+        :param executor_type: "" to extract on the event loop, "thread" or "process" to use a pool
+        :param max_workers: worker number of the pool, 0 for the executor's default
+        :param memo_size: number of bodies whose results are memoized, 0 to disable
+        """
+        if executor_type not in EXECUTOR_TYPES:
+            raise ValueError(f"executor_type must be one of {EXECUTOR_TYPES}, got {executor_type!r}")
+        if max_workers < 0:
+            raise ValueError("max_workers must be non-negative")
+        if memo_size < 0:
+            raise ValueError("memo_size must be non-negative")
+        self.handler = handler
+        self.parser = parser
+        self.executor_type = executor_type
+        self.max_workers = max_workers
+        self._executor: typing.Optional[concurrent.futures.Executor] = None
+        self.memo_size = memo_size
+        self._memo: "OrderedDict[bytes, ContentResult]" = OrderedDict()  # digest of document to its result, LRU
+        self.memo_hits = 0
+        self.memo_misses = 0
+
+    def _get_executor(self) -> concurrent.futures.Executor:
+        """Create the pool on first use"""
+        if self._executor is None:
+            max_workers = self.max_workers if self.max_workers > 0 else None
+            if self.executor_type == "thread":
+                self._executor = concurrent.futures.ThreadPoolExecutor(
+                    max_workers=max_workers, thread_name_prefix="secretscraper-extract"
+                )
+            else:
+                self._executor = concurrent.futures.ProcessPoolExecutor(
+                    max_workers=max_workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                    initializer=_init_worker,
+                    initargs=(self.handler, self.parser),
+                )
+        return self._executor
+
+    async def extract(self, url_node: URLNode, text: typing.Union[str, Document], extend: bool) -> ExtractResult:
+        """Extract title, secrets and, if `extend`, child url nodes of url_node from its response text"""
+        document = as_document(text)
+        key = _memo_key(document) if self.memo_size > 0 else None
+        content = self._memo.get(key) if key is not None else None
+        if content is not None and (content.links is not None or not extend):
+            self._memo.move_to_end(key)
+            self.memo_hits += 1
+        else:
+            self.memo_misses += 1
+            content = await self._extract_content(document, extend)
+            if key is not None:
+                self._memo[key] = content
+                self._memo.move_to_end(key)
+                if len(self._memo) > self.memo_size:
+                    self._memo.popitem(last=False)
+        return ExtractResult(
+            title=content.title,
+            secrets=set(content.secrets),
+            children=self.parser.rebase(url_node, content.links) if extend else set(),
+        )
+
+    async def _extract_content(self, document: Document, extend: bool) -> ContentResult:
+        """Extract from a body, inline or in the pool"""
+        if self.executor_type == "":
+            return extract_content(self.handler, self.parser, document, extend)
+
+        loop = asyncio.get_running_loop()
+        if self.executor_type == "thread":
+            return await loop.run_in_executor(
+                self._get_executor(), extract_content, self.handler, self.parser, document, extend
+            )
+
+        title, secrets, links = await loop.run_in_executor(self._get_executor(), _extract_in_worker, document, extend)
+        return ContentResult(
+            title=title,
+            secrets=frozenset(Secret(type=type_, data=data) for type_, data in secrets),
+            links=frozenset(Link(*link) for link in links) if links is not None else None,
+        )
+
+    def shutdown(self) -> None:
+        """Shutdown the pool without waiting for pending extractions"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
@@ -3,6 +3,7 @@
 import copy
 import functools
 import logging
+import os
 import pathlib
 import traceback
 import typing
@@ -20,8 +21,9 @@ from .filter import (ChainedURLFilter, DomainBlackListURLFilter,
 from .handler import get_regex_handler
 from .output_formatter import Formatter
 from .scanner import FileScanner
+from .sharding import ShardedCrawler
 from .urlparser import RegexURLParser, URLParser
-from .util import Range, read_rules_from_setting, to_host_port
+from .util import Range, read_rule_literals_from_setting, read_rules_from_setting, to_host_port
 
 logger = logging.getLogger(__name__)
 
@@ -102,7 +104,7 @@ class CrawlerFacade:
                                         f"{self.formatter.output_secrets(self.crawler.url_secrets)}"
                                         )
                 print_func_colorful(f, self.print_func, f"{self.formatter.output_js(self.crawler.js_dict)}")
-                self.formatter.output_found_domains(list(self.crawler.found_urls), True)
+                self.formatter.output_found_domains(self.crawler.found_nodes(), True)
             else:
                 # tidy output
                 # URLs per domain
@@ -119,7 +121,7 @@ class CrawlerFacade:
                 # JS per domain
                 self.formatter.output_url_per_domain(domains, self.crawler.js_dict, "JS")
                 # Domains
-                self.formatter.output_found_domains(list(self.crawler.found_urls), True)
+                self.formatter.output_found_domains(self.crawler.found_nodes(), True)
                 # Secrets
                 if not self.hide_regex:
                     print_func_colorful(f, self.print_func,
@@ -129,6 +131,7 @@ class CrawlerFacade:
                 self.formatter.output_csv(self.outfile, self.crawler.url_dict, self.crawler.url_secrets)
                 print_func_colorful(None, self.print_func, f"Save result to csv file {self.outfile.name}", fg="green",
                                     bold=True)
+            self.output_cache_stats(f)
         except KeyboardInterrupt:
             self.print_func("\nExiting...")
             self.crawler.close_all()
@@ -136,6 +139,35 @@ class CrawlerFacade:
             self.print_func(f"Unexpected error: {e}.\nExiting...")
             self.crawler.close_all()
             # raise FacadeException from e
+        finally:
+            if self.crawler.disk_cache is not None:
+                self.crawler.disk_cache.close()
+            if self.crawler.checkpoint is not None:
+                self.crawler.checkpoint.close()
+
+    def output_cache_stats(self, f: typing.Optional[typing.IO]) -> None:
+        """Print how many requests the response caches and how many extractions the memo saved, and how the pool scaled"""
+        stats = self.crawler.cache.stats
+        content = (
+            f"Response cache: {stats.hits} hits, {stats.misses} misses, {stats.evictions} evictions, "
+            f"{self.crawler.coalesced_requests} coalesced requests"
+            f"\nExtraction memo: {self.crawler.extractor.memo_hits} hits, {self.crawler.extractor.memo_misses} misses"
+        )
+        disk_cache = self.crawler.disk_cache
+        if disk_cache is not None:
+            disk_stats = disk_cache.stats
+            content += (
+                f"\nDisk cache: {disk_stats.revalidated} revalidated, {disk_stats.stored} stored, "
+                f"{disk_stats.evictions} evictions, {disk_stats.entries} entries, "
+                f"{disk_stats.bytes / 2 ** 20:.1f} MB in {disk_cache.path}"
+            )
+        if self.crawler.autoscaler is not None:
+            stats = self.crawler.stats
+            content += (
+                f"\nWorkers: {stats.workers}, peak {stats.peak_workers}, "
+                f"scaled up {stats.scale_ups} and down {stats.scale_downs} times"
+            )
+        print_func_colorful(f, self.print_func, content, fg="bright_black")
 
     def create_crawler(self) -> Crawler:
         """Create a Crawler"""
@@ -289,21 +321,96 @@ class CrawlerFacade:
         if min_request_interval is not None:
             self.settings["min_request_interval"] = min_request_interval
 
+        # Extraction executor
+        extract_executor: typing.Optional[str] = self.custom_settings.get(
+            "extract_executor", None
+        )
+        if extract_executor is not None:
+            self.settings["extract_executor"] = extract_executor
+        if self.settings.get("extract_executor", ""):
+            print_config(f"Using extraction executor: {self.settings['extract_executor']}")
+
+        # Dedup index
+        dedup_mode: typing.Optional[str] = self.custom_settings.get("dedup_mode", None)
+        if dedup_mode is not None:
+            self.settings["dedup_mode"] = dedup_mode
+        if self.settings.get("dedup_mode", "exact") == "bloom":
+            print_config(
+                f"Using bloom filter dedup: capacity {self.settings.get('bloom_capacity', 10_000_000)}, "
+                f"error rate {self.settings.get('bloom_error_rate', 1e-4)}"
+            )
+
+        # Autoscaling
+        min_workers: typing.Optional[int] = self.custom_settings.get("min_workers", None)
+        if min_workers is not None:
+            self.settings["min_workers"] = min_workers
+        if self.settings.get("min_workers", 0):
+            print_config(
+                f"Autoscaling workers between {self.settings['min_workers']} and {self.settings.get('workers_num')}"
+            )
+
+        # Scheduler
+        scheduler: typing.Optional[str] = self.custom_settings.get("scheduler", None)
+        if scheduler is not None:
+            self.settings["scheduler"] = scheduler
+
+        # Sharding
+        shards: typing.Optional[int] = self.custom_settings.get("shards", None)
+        if shards is not None:
+            self.settings["shards"] = shards
+        if self.settings.get("shards", 0) > 1:
+            print_config(f"Crawling in {self.settings['shards']} processes")
+
+        # Progress report
+        progress_interval: typing.Optional[float] = self.custom_settings.get("progress_interval", None)
+        if progress_interval is not None:
+            self.settings["progress_interval"] = progress_interval
+
+        # Disk cache
+        disk_cache: typing.Optional[pathlib.Path] = self.custom_settings.get("disk_cache", None)
+        if disk_cache is not None:
+            self.settings["disk_cache"] = str(disk_cache)
+        if self.settings.get("disk_cache", ""):
+            print_config(f"Using disk cache: {self.settings['disk_cache']}")
+
+        # Checkpoint
+        checkpoint: typing.Optional[pathlib.Path] = self.custom_settings.get("checkpoint", None)
+        if checkpoint is not None:
+            self.settings["checkpoint"] = str(checkpoint)
+        resume = self.custom_settings.get("resume", False) is True
+        if resume and not self.settings.get("checkpoint", ""):
+            raise FacadeException("--resume requires a checkpoint file, set with --checkpoint")
+        if self.settings.get("checkpoint", "") and self.settings.get("shards", 0) > 1:
+            raise FacadeException("--checkpoint is not supported with --shards")
+        if self.settings.get("checkpoint", ""):
+            print_config(f"{'Resuming from' if resume else 'Checkpointing to'}: {self.settings['checkpoint']}")
+
         # Read rules from config file
         rules: typing.Dict[str, str] = read_rules_from_setting(self.settings)
         handler_type = self.settings.get("handler_type", "re")
         if handler_type == "hyperscan":
-            handler = get_regex_handler(rules)
+            cache_dir = self.settings.get("hyperscan_cache_dir", "")
+            handler = get_regex_handler(rules, cache_dir=os.path.expanduser(cache_dir) if cache_dir else None)
             print_config(f"Using regex handler: Hyperscan")
         else:
-            handler = get_regex_handler(rules, type_="regex", use_groups=True)
+            handler = get_regex_handler(
+                rules,
+                type_="regex",
+                use_groups=True,
+                combined=self.settings.get("regex_combined", True),
+                prefilter=self.settings.get("regex_prefilter", True),
+                literals=read_rule_literals_from_setting(self.settings),
+            )
             print_config(f"Using regex handler: Re")
 
         # Read url/js regex
         rules: typing.List[str] = self.settings.get("urlFind")
         rules.extend(self.settings.get("jsFind"))
         rules_dict = {f"urlFinder_{i}": rule for i, rule in enumerate(rules)}
-        parser = RegexURLParser(get_regex_handler(rules_dict, type_="regex", use_groups=True))
+        url_handler = get_regex_handler(
+            rules_dict, type_="regex", use_groups=True, combined=self.settings.get("regex_combined", True)
+        )
+        parser = RegexURLParser(url_handler)
 
         # Detailed output
         if self.custom_settings.get("detail", False) is True:
@@ -314,7 +421,11 @@ class CrawlerFacade:
         if self.settings.get("dangerousPath", None) is not None:
             dangerous_paths.extend(set(self.settings("dangerousPath")))
 
-        crawler = Crawler(
+        if self.settings.get("shards", 0) > 1:
+            crawler_class = functools.partial(ShardedCrawler, num_shards=self.settings["shards"])
+        else:
+            crawler_class = Crawler
+        crawler = crawler_class(
             start_urls=list(start_urls),
             url_filter=urlfilter,
             # parser=URLParser(),
@@ -323,6 +434,15 @@ class CrawlerFacade:
             max_page_num=self.settings.get("max_page_num"),
             max_depth=self.settings.get("max_depth"),
             num_workers=self.settings.get("workers_num"),
+            min_workers=self.settings.get("min_workers", 0),
+            autoscale_interval=self.settings.get("autoscale_interval", 1.0),
+            task_queue_capacity=self.settings.get("task_queue_capacity", 1000),
+            done_queue_capacity=self.settings.get("done_queue_capacity", 4096),
+            scheduler=self.settings.get("scheduler", "fifo"),
+            frontier_memory_limit=self.settings.get("frontier_memory_limit", 0),
+            checkpoint=self.settings.get("checkpoint", ""),
+            checkpoint_interval=self.settings.get("checkpoint_interval", 60),
+            resume=resume,
             proxy=self.settings.get("proxy"),
             headers=headers,
             verbose=self.settings.get("verbose"),
@@ -334,7 +454,20 @@ class CrawlerFacade:
             debug=self.debug,
             follow_redirects=self.settings["follow_redirects"],
             dangerous_paths=dangerous_paths,
-            validate=validate
+            validate=validate,
+            extract_executor=self.settings.get("extract_executor", ""),
+            extract_workers=self.settings.get("extract_workers", 0),
+            extract_memo_size=self.settings.get("extract_memo_size", 1024),
+            dedup_mode=self.settings.get("dedup_mode", "exact"),
+            dedup_bits=self.settings.get("dedup_bits", 64),
+            bloom_capacity=self.settings.get("bloom_capacity", 10_000_000),
+            bloom_error_rate=self.settings.get("bloom_error_rate", 1e-4),
+            cache_ttl=self.settings.get("cache_ttl", 60),
+            cache_max_bytes=self.settings.get("cache_max_bytes", 64 * 2 ** 20),
+            disk_cache=self.settings.get("disk_cache", ""),
+            disk_cache_max_bytes=self.settings.get("disk_cache_max_bytes", 512 * 2 ** 20),
+            progress_interval=self.settings.get("progress_interval", 0),
+            progress_func=print_config,
         )
         return crawler
 
@@ -395,10 +528,18 @@ class FileScannerFacade:
         rules: typing.Dict[str, str] = read_rules_from_setting(self.settings)
         handler_type = self.settings.get("handler_type", "re")
         if handler_type == "hyperscan":
-            handler = get_regex_handler(rules)
+            cache_dir = self.settings.get("hyperscan_cache_dir", "")
+            handler = get_regex_handler(rules, cache_dir=os.path.expanduser(cache_dir) if cache_dir else None)
             print_config(f"Using regex handler: Hyperscan")
         else:
-            handler = get_regex_handler(rules, type_="regex", use_groups=True)
+            handler = get_regex_handler(
+                rules,
+                type_="regex",
+                use_groups=True,
+                combined=self.settings.get("regex_combined", True),
+                prefilter=self.settings.get("regex_prefilter", True),
+                literals=read_rule_literals_from_setting(self.settings),
+            )
             print_config(f"Using regex handler: Re")
 
         # Get all files from directory
@@ -0,0 +1,105 @@
+"""Asyncio-native crawl frontier.
+
+The frontier replaces polling a thread-safe queue: the crawler awaits the next
+url node and is woken as soon as one is enqueued, and the crawl is considered
+complete once the frontier is empty and no node taken from it is still being
+processed.
+
+Usage:
+    frontier = Frontier(create_scheduler("round-robin"))  # FIFO by default
+    frontier.put(url_node)
+
+    while (url_node := await frontier.get()) is not None:
+        ...  # process url_node, possibly put() its children
+        frontier.task_done()
+"""
+
+import asyncio
+import typing
+
+from .entity import URLNode
+from .scheduler import FIFOScheduler, Scheduler
+
+__all__ = ["Frontier"]
+
+
+class Frontier:
+    """Awaitable queue of url nodes with explicit in-flight accounting.
+
+    A node is in flight from the moment it is taken with :meth:`get` until
+    :meth:`task_done` is called for it.
+    """
+
+    def __init__(self, scheduler: typing.Optional[Scheduler] = None):
+        """
+
+        :param scheduler: order in which queued nodes are taken, FIFO by default
+        """
+        self._queue: Scheduler = scheduler if scheduler is not None else FIFOScheduler()
+        self._in_flight: int = 0
+        self._wakeup = asyncio.Event()  # set whenever a getter may make progress
+        self._finished = asyncio.Event()  # set when empty and nothing in flight
+        self._finished.set()
+
+    def put(self, url_node: URLNode) -> None:
+        """Enqueue a url node and wake up the waiting getter"""
+        self._queue.push(url_node)
+        self._finished.clear()
+        self._wakeup.set()
+
+    async def get(self) -> typing.Optional[URLNode]:
+        """Take the next url node, waiting for one if others are still in flight
+
+        :return: the next url node, or None if the crawl is complete
+        """
+        while True:
+            if self._queue:
+                self._in_flight += 1
+                return self._queue.pop()
+            if self._in_flight == 0:
+                return None
+            self._wakeup.clear()
+            await self._wakeup.wait()
+
+    def task_done(self) -> None:
+        """Mark a node taken by :meth:`get` as fully processed"""
+        if self._in_flight <= 0:
+            raise ValueError("task_done() called more times than get()")
+        self._in_flight -= 1
+        if self._in_flight == 0 and not self._queue:
+            self._finished.set()
+            self._wakeup.set()
+
+    def hold(self) -> None:
+        """Keep the frontier unfinished as if a node were in flight, until a matching :meth:`task_done`.
+
+        For urls that may still be put from outside, like those of other shards.
+        """
+        self._in_flight += 1
+        self._finished.clear()
+
+    async def join(self) -> None:
+        """Wait until the frontier is empty and nothing is in flight"""
+        await self._finished.wait()
+
+    def close(self) -> None:
+        """Release resources of the scheduler, like its spill file"""
+        self._queue.close()
+
+    def qsize(self) -> int:
+        """Number of queued nodes, excluding in-flight ones"""
+        return len(self._queue)
+
+    def empty(self) -> bool:
+        """Whether no node is queued"""
+        return not self._queue
+
+    @property
+    def in_flight(self) -> int:
+        """Number of nodes taken but not yet marked done"""
+        return self._in_flight
+
+    @property
+    def is_finish(self) -> bool:
+        """Whether the frontier is empty and nothing is in flight"""
+        return not self._queue and self._in_flight == 0
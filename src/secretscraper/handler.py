@@ -1,16 +1,32 @@
 """Handler module for extracting data from HTML pages and other text files crawled from website"""
 
+import hashlib
+import json
+import logging
+import os
+import pathlib
+import platform
 import queue
 import re
 import sys
+import tempfile
+import threading
 import typing
 from typing import Protocol, Union
 
 from bs4 import BeautifulSoup, NavigableString, Tag
 
+from secretscraper.document import Document, as_document
 from secretscraper.entity import Secret
 from secretscraper.exception import HandlerException
 
+try:
+    from re import _parser as sre_parse
+except ImportError:  # python < 3.11
+    import sre_parse
+
+logger = logging.getLogger(__name__)
+
 # T = typing.TypeVar("T")
 # IterableAsyncOrSync: typing.TypeAlias = typing.Iterable[T] | typing.AsyncIterable[T]
 BSResult = Union[Tag, NavigableString, None]
@@ -19,17 +35,43 @@ BSResult = Union[Tag, NavigableString, None]
 class Handler(Protocol):
     """Base class for different types of handlers"""
 
-    def handle(self, text: str) -> typing.Iterable[Secret]: ...
+    def handle(self, text: typing.Union[str, Document]) -> typing.Iterable[Secret]: ...
+
+
+@typing.runtime_checkable
+class StreamHandler(Handler, Protocol):
+    """Handler that also scans a body in chunks, without holding it whole.
+
+    Used by `FileScanner` for local files. The crawler keeps reading whole pages,
+    since it also parses their links and caches their bodies.
+    """
+
+    def scan_stream(
+        self, chunks: typing.Iterable[typing.Union[bytes, str]], max_match_size: int = 2 ** 16
+    ) -> typing.Iterator[Secret]: ...
 
 
 class ReRegexHandler(Handler):
     """ Regex handler using the `re` module, simple but have lowest performance."""
 
-    def __init__(self, rules: typing.Dict[str, str], flags: int = 0, use_groups: bool = False) -> None:
+    def __init__(
+        self,
+        rules: typing.Dict[str, str],
+        flags: int = 0,
+        use_groups: bool = False,
+        combined: bool = False,
+        prefilter: bool = False,
+        literals: typing.Optional[typing.Dict[str, typing.List[str]]] = None,
+    ) -> None:
         """
 
         :param rules: rules dictionary with keys indicating type and values indicating the regex
         :param use_groups: extract content from regex groups but not the whole match
+        :param combined: scan the rules starting with a character class or a literal in a single pass,
+            with the same results
+        :param prefilter: skip the rules whose required literals are not in the text, with the same results
+        :param literals: rule type => literals of which any one is in every match, instead of those
+            found in the regex by the prefilter
         """
         self.types = list(rules.keys())
         regexes = list(rules.values())
@@ -37,30 +79,258 @@ class ReRegexHandler(Handler):
         for regex in regexes:
             self.regexes.append(re.compile(regex, flags=flags | re.IGNORECASE))
         self.use_groups = use_groups
+        self.combined: typing.Optional[_CombinedRegex] = None
+        if combined:
+            self.combined = _CombinedRegex.create(self.regexes, flags=flags | re.IGNORECASE)
+        self.prefilter: typing.Optional[_LiteralPrefilter] = None
+        if prefilter:
+            literals = literals or dict()
+            self.prefilter = _LiteralPrefilter(
+                [
+                    literals[type_] if type_ in literals else _required_literals(regex)
+                    for type_, regex in zip(self.types, self.regexes)
+                ]
+            )
 
-    def handle(self, text: str) -> typing.Iterable[Secret]:
+    def handle(self, text: typing.Union[str, Document]) -> typing.Iterable[Secret]:
         """Extract secret data"""
+        document = as_document(text)
+        text = document.text
+        active = self.prefilter.active(document.folded) if self.prefilter is not None else None
+        if self.combined is not None:
+            return self._handle_combined(text, active)
         result_list: typing.List[Secret] = list()
         for index, regex in enumerate(self.regexes):
-            if self.use_groups:
-                matches = regex.findall(text)
-                for match in matches:
-                    if match is not None:
-                        secret_data = match if type(match) is not tuple else match[0]
-                        secret_type = self.types[index]
-                        secret = Secret(type=secret_type, data=secret_data)
-                        result_list.append(secret)
-            else:
-                match = regex.search(text)
-                if match is not None:
-                    secret_data = match.group(0)
-                    secret_type = self.types[index]
-                    secret = Secret(type=secret_type, data=secret_data)
-                    result_list.append(secret)
+            if active is not None and not active[index]:
+                continue
+            for secret_data in self._scan(regex, text):
+                result_list.append(Secret(type=self.types[index], data=secret_data))
+        return result_list
 
+    def _scan(self, regex: re.Pattern, text: str) -> typing.List[str]:
+        """Data of every match with groups, or of the first match"""
+        if self.use_groups:
+            matches = regex.findall(text)
+            return [match if type(match) is not tuple else match[0] for match in matches]
+        match = regex.search(text)
+        return [match.group(0)] if match is not None else []
+
+    def _handle_combined(self, text: str, active: typing.Optional[typing.List[bool]]) -> typing.List[Secret]:
+        """Scan the combined rules once, the others one by one, in the order of the rules"""
+        if active is None or any(active[index] for index in self.combined.rule_groups):
+            data_list = self.combined.scan(text, first_only=not self.use_groups)
+        else:
+            data_list = [[] for _ in self.regexes]
+        for index in self.combined.separate:
+            if active is None or active[index]:
+                data_list[index] = self._scan(self.regexes[index], text)
+        result_list: typing.List[Secret] = list()
+        for index, data in enumerate(data_list):
+            for secret_data in data:
+                result_list.append(Secret(type=self.types[index], data=secret_data))
         return result_list
 
 
+# a character class or a literal character that a pattern starts with, and that is not optional
+_LEADING_CLASS = re.compile(r"(?:\[(?!\^|\])(?:\\.|[^\]\\])*\]|[^\\\[\]().*+?{}|^$])(?![?*]|\{0)")
+_BACKREFERENCE = re.compile(r"\\[1-9]|\(\?P=")
+# tokens of a pattern, escapes and character classes may contain "|" or parentheses
+_TOKENS = re.compile(r"\\.|\[\^?\]?(?:\\.|[^\]\\])*\]|.", re.DOTALL)
+
+
+def _leading_class(pattern: str) -> typing.Optional[str]:
+    """Content of a character class matching the first character of every match of pattern, if found"""
+    if _BACKREFERENCE.search(pattern):
+        return None  # the numbers of groups change once combined
+    branches: typing.List[str] = [""]
+    depth = 0
+    for token in _TOKENS.findall(pattern):
+        if token == "|" and depth == 0:
+            branches.append("")
+            continue
+        if token == "(":
+            depth += 1
+        elif token == ")":
+            depth -= 1
+        branches[-1] += token
+    classes: typing.List[str] = list()
+    for branch in branches:
+        leading = _LEADING_CLASS.match(branch)
+        if leading is None:
+            return None
+        leading_class = leading.group(0)
+        classes.append(leading_class[1:-1] if leading_class.startswith("[") else re.escape(leading_class))
+    return "".join(classes)
+
+
+class _CombinedRegex:
+    """Rules starting with a character class or a literal merged into one alternation of lookaheads.
+
+    The alternation is guarded by the union of the leading classes, so the scan skips to the
+    candidate positions like a single rule does. Each position where the alternation matches is
+    checked against the rules after the one that matched there, and a rule only matches after
+    the end of its previous match, as `findall` does.
+    """
+
+    def __init__(
+        self,
+        regexes: typing.List[re.Pattern],
+        pattern: typing.Optional[re.Pattern],
+        group_rules: typing.Dict[int, int],
+        separate: typing.List[int],
+    ):
+        self.regexes = regexes
+        self.pattern = pattern
+        self.group_rules = group_rules  # wrapping group of a rule in pattern => rule index
+        self.rule_groups = {index: group for group, index in group_rules.items()}
+        self.separate = separate  # rules scanned one by one
+
+    @classmethod
+    def create(cls, regexes: typing.List[re.Pattern], flags: int) -> "_CombinedRegex":
+        classes: typing.List[str] = list()
+        combined: typing.List[int] = list()
+        separate: typing.List[int] = list()
+        for index, regex in enumerate(regexes):
+            leading_class = None if flags & re.VERBOSE else _leading_class(regex.pattern)
+            if leading_class is None:
+                separate.append(index)
+                continue
+            classes.append(leading_class)
+            combined.append(index)
+        if len(combined) < 2:
+            return cls(regexes, None, {}, sorted(separate + combined))
+        group_rules: typing.Dict[int, int] = dict()
+        alternatives: typing.List[str] = list()
+        group = 1
+        for index in combined:
+            group_rules[group] = index
+            alternatives.append(f"(?=({regexes[index].pattern}))")
+            group += 1 + regexes[index].groups
+        try:
+            pattern = re.compile(f"(?=[{''.join(classes)}])(?:{'|'.join(alternatives)})", flags=flags)
+        except re.error:  # e.g. the same group name in two rules
+            return cls(regexes, None, {}, list(range(len(regexes))))
+        return cls(regexes, pattern, group_rules, separate)
+
+    def scan(self, text: str, first_only: bool) -> typing.List[typing.List[str]]:
+        """Data of the matches of each combined rule by rule index
+
+        :param first_only: the whole first match of each rule like `search`, otherwise the first group
+            of every match like `findall`
+        """
+        data_list: typing.List[typing.List[str]] = [[] for _ in self.regexes]
+        if self.pattern is None:
+            return data_list
+        rules = sorted(self.rule_groups)
+        positions = {index: position for position, index in enumerate(rules)}
+        next_start = {index: 0 for index in rules}  # a rule matches again after the end of its last match
+        for match in self.pattern.finditer(text):
+            start = match.start()
+            matched = self.group_rules[match.lastindex]
+            for index in rules[positions[matched]:]:
+                if start < next_start[index]:
+                    continue
+                with_groups = self.regexes[index].groups > 0 and not first_only
+                if index == matched:
+                    # groups of the rule follow its wrapping group in pattern
+                    group = self.rule_groups[index]
+                    end = match.end(group)
+                    data = match.group(group + 1) if with_groups else match.group(group)
+                else:
+                    rule_match = self.regexes[index].match(text, start)
+                    if rule_match is None:
+                        continue
+                    end = rule_match.end()
+                    data = rule_match.group(1) if with_groups else rule_match.group(0)
+                data_list[index].append(data or "")
+                next_start[index] = end if end > start else start + 1
+                if first_only:
+                    next_start[index] = len(text) + 1
+            if first_only and all(start > len(text) for start in next_start.values()):
+                break
+        return data_list
+
+
+_REPEATS = (sre_parse.MIN_REPEAT, sre_parse.MAX_REPEAT, getattr(sre_parse, "POSSESSIVE_REPEAT", None))
+
+
+def _required_literals(regex: re.Pattern) -> typing.Optional[typing.List[str]]:
+    """Literals of which any one is in every match of regex, None if not found"""
+    try:
+        parsed = sre_parse.parse(regex.pattern, regex.flags)
+    except Exception:
+        return None
+    literals = _sequence_literals(parsed)
+    return sorted(literals) if literals is not None else None
+
+
+def _sequence_literals(sequence) -> typing.Optional[typing.Set[str]]:
+    """The longest of the required literal sets of a parsed sequence"""
+    candidates: typing.List[typing.Set[str]] = list()
+    run = ""  # consecutive ASCII literals
+    for op, av in sequence:
+        if op is sre_parse.LITERAL and av < 128:
+            run += chr(av)
+            continue
+        if run:
+            candidates.append({run})
+            run = ""
+        literals = None
+        if op is sre_parse.SUBPATTERN:
+            literals = _sequence_literals(av[-1])
+        elif op in _REPEATS and av[0] > 0:
+            literals = _sequence_literals(av[2])
+        elif op is getattr(sre_parse, "ATOMIC_GROUP", None):
+            literals = _sequence_literals(av)
+        elif op is sre_parse.BRANCH:
+            branches = [_sequence_literals(branch) for branch in av[1]]
+            if all(branch is not None for branch in branches):
+                literals = set().union(*branches)
+        if literals is not None:
+            candidates.append(literals)
+    if run:
+        candidates.append({run})
+    if not candidates:
+        return None
+    # the rarer in text, the more rules are skipped
+    return max(candidates, key=lambda literals: (min(map(len, literals)), -len(literals)))
+
+
+class _LiteralPrefilter:
+    """Find which rules may match from their required literals, each searched once in the folded text.
+
+    Aho-Corasick is not in the standard library, and a substring search in C per literal is faster than
+    an alternation of the literals in `re`.
+    """
+
+    def __init__(self, literals: typing.List[typing.Optional[typing.List[str]]]):
+        """
+
+        :param literals: for each rule, literals of which any one is in every match, None to always scan it
+        """
+        self.literals = [
+            [literal.lower() for literal in rule_literals] if rule_literals else None for rule_literals in literals
+        ]
+
+    def active(self, folded: str) -> typing.List[bool]:
+        """Whether each rule may match text, given the text folded by `Document.folded`"""
+        found: typing.Dict[str, bool] = dict()
+        active: typing.List[bool] = list()
+        for rule_literals in self.literals:
+            if rule_literals is None:
+                active.append(True)
+                continue
+            for literal in rule_literals:
+                if literal not in found:
+                    found[literal] = literal in folded
+                if found[literal]:
+                    active.append(True)
+                    break
+            else:
+                active.append(False)
+        return active
+
+
 if not sys.platform.startswith("win"):
     # hyperscan does not support windows
     try:
@@ -73,13 +343,18 @@ if not sys.platform.startswith("win"):
         """Regex handler using `hyperscan` module"""
 
         def __init__(
-            self, rules: typing.Dict[str, str], lazy_init: bool = False, hs_flag: int = 0
+            self,
+            rules: typing.Dict[str, str],
+            lazy_init: bool = False,
+            hs_flag: int = 0,
+            cache_dir: typing.Union[str, pathlib.Path, None] = None,
         ):
             """
 
             :param rules: regex rules dictionary with keys indicating type and values indicating the regex
             :param lazy_init: True for deferring the initialization to actively call the init() method, otherwise initialize immediately
             :param hs_flag: hyperscan flag perform to every expressions
+            :param cache_dir: directory of compiled databases, loaded instead of compiling the same rules again
             """
             # self.output_queue: queue.Queue[Secret] = queue.Queue()
             self.rules = rules
@@ -90,36 +365,121 @@ if not sys.platform.startswith("win"):
             self._db: typing.Optional[hyperscan.Database] = None
             self.patterns: typing.Dict[int, bytes] = dict()  # pattern id => regex in bytes
             self.types: typing.Dict[int, str] = dict()  # pattern id => type
+            self._local = threading.local()  # scratch space of each scanning thread
+            self._mode: int = hyperscan.HS_MODE_BLOCK
+            # compiled on the first stream, start of match in streams needs a horizon
+            self._stream_mode: int = hyperscan.HS_MODE_STREAM | hyperscan.HS_MODE_SOM_HORIZON_LARGE
+            self._stream_db: typing.Optional[hyperscan.Database] = None
+            self._stream_lock = threading.Lock()
+            self.cache_dir: typing.Optional[pathlib.Path] = pathlib.Path(cache_dir) if cache_dir else None
             if not lazy_init:
                 self.init()
 
+        def __getstate__(self) -> dict:
+            """The compiled database is pickled serialized, and deserialized on unpickling"""
+            state = self.__dict__.copy()
+            state["_db"] = hyperscan.dumpb(self._db) if self._db is not None else None
+            state["_local"] = None
+            state["_stream_db"] = None
+            state["_stream_lock"] = None
+            return state
+
+        def __setstate__(self, state: dict) -> None:
+            serialized = state.pop("_db")
+            self.__dict__.update(state)
+            self._local = threading.local()
+            self._stream_lock = threading.Lock()
+            self._db = hyperscan.loadb(serialized, self._mode) if serialized is not None else None
+
         def init(self):
-            """Initialize the hyperscan database."""
-            self._db = hyperscan.Database()
-            flags: typing.List[int] = [self._hs_flag for _ in range(len(self.rules))]
+            """Initialize the hyperscan database, loaded from the cache directory if compiled before."""
+            self._local = threading.local()  # drop scratch spaces of a previous database
+            self._stream_db = None
             for index, type_str in enumerate(self.rules):
                 regex = self.rules.get(type_str)
                 self.patterns[index] = regex.encode("utf-8")
                 self.types[index] = type_str
+            self._db = self._compile(self._mode)
+            self._init = True
 
-            self._db.compile(
-                expressions=list(self.patterns.values()),
-                ids=list(self.patterns.keys()),
-                elements=len(self.patterns),
-                flags=flags,
-            )
+        def _compile(self, mode: int) -> "hyperscan.Database":
+            """Database of the patterns in mode, loaded from the cache directory if compiled before"""
+            db = self._load_cached(mode)
+            if db is None:
+                db = hyperscan.Database(mode=mode)
+                db.compile(
+                    expressions=list(self.patterns.values()),
+                    ids=list(self.patterns.keys()),
+                    elements=len(self.patterns),
+                    flags=[self._hs_flag for _ in range(len(self.patterns))],
+                )
+                self._store_cached(db, mode)
+            return db
+
+        def _cache_key(self, mode: int) -> str:
+            """Hash of what a compiled database depends on: rules, flags, mode, hyperscan and the CPU"""
+            key = {
+                "patterns": [pattern.decode("utf-8") for pattern in self.patterns.values()],
+                "flags": self._hs_flag,
+                "mode": mode,
+                "hyperscan": hyperscan.__version__,
+                "machine": platform.machine(),
+            }
+            return hashlib.sha256(json.dumps(key, sort_keys=True).encode("utf-8")).hexdigest()
+
+        def _cache_file(self, mode: int) -> typing.Optional[pathlib.Path]:
+            if self.cache_dir is None:
+                return None
+            return self.cache_dir / f"{self._cache_key(mode)}.hsdb"
 
-            self._init = True
+        @property
+        def cache_key(self) -> str:
+            """Hash of what the compiled database depends on: rules, flags, mode, hyperscan and the CPU"""
+            return self._cache_key(self._mode)
 
-        def handle(self, text: str) -> typing.Iterable[Secret]:
+        @property
+        def cache_path(self) -> typing.Optional[pathlib.Path]:
+            """File of the compiled database in the cache directory"""
+            return self._cache_file(self._mode)
+
+        def _load_cached(self, mode: int) -> typing.Optional["hyperscan.Database"]:
+            path = self._cache_file(mode)
+            if path is None or not path.is_file():
+                return None
+            try:
+                return hyperscan.loadb(path.read_bytes(), mode)
+            except (OSError, hyperscan.HyperscanError) as e:
+                # e.g. built by another version of the library or for another CPU, compiled again
+                logger.debug(f"Failed to load hyperscan database {path}: {e}")
+                return None
+
+        def _store_cached(self, db: "hyperscan.Database", mode: int) -> None:
+            path = self._cache_file(mode)
+            if path is None:
+                return
+            try:
+                path.parent.mkdir(parents=True, exist_ok=True)
+                # written aside and renamed, so that a concurrent process never reads a partial file
+                fd, tmp_path = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+                with os.fdopen(fd, "wb") as f:
+                    f.write(hyperscan.dumpb(db))
+                os.replace(tmp_path, path)
+            except OSError as e:
+                logger.warning(f"Failed to cache hyperscan database in {path.parent}: {e}")
+
+        def handle(self, text: typing.Union[str, bytes, Document]) -> typing.Iterable[Secret]:
             """Extract secret data via the pre-compiled hyperscan database
 
-            This method is IO-bound.
+            Matches are sliced from the UTF-8 bytes scanned, by the byte offsets reported by hyperscan, and
+            only decoded to build the secrets. This method is IO-bound.
+
+            :param text: text, a document, or UTF-8 bytes such as a raw body, scanned without copy
             """
             if not self._init:
                 raise HandlerException("Hyperscan database is not initialized")
+            content = text if isinstance(text, bytes) else as_document(text).content
 
-            results: typing.List[Secret] = list()
+            matches: typing.List[typing.Tuple[int, int, int]] = list()
 
             def on_match(
                 id: int,
@@ -128,15 +488,134 @@ if not sys.platform.startswith("win"):
                 flags: int,
                 context: typing.Optional[typing.Any] = None,
             ) -> typing.Optional[bool]:
-                match = text[froms:to]
-                type = self.types.get(id)
-                results.append(Secret(type, data=match))
+                matches.append((id, froms, to))
                 return None
 
-            self._db.scan(
-                text.encode("utf8"), match_event_handler=on_match
-            )  # block call until all regex operation finish
-            return results
+            # one scratch space per thread, so that a thread pool can scan concurrently
+            scratch = getattr(self._local, "scratch", None)
+            if scratch is None:
+                scratch = hyperscan.Scratch(self._db)
+                self._local.scratch = scratch
+            # block call until all regex operation finish
+            self._db.scan(content, match_event_handler=on_match, scratch=scratch)
+
+            with memoryview(content) as buffer:
+                return [
+                    Secret(self.types.get(id), data=str(buffer[froms:to], "utf-8", "replace"), span=(froms, to))
+                    for id, froms, to in matches
+                ]
+
+        def scan_stream(
+            self, chunks: typing.Iterable[typing.Union[bytes, str]], max_match_size: int = 2 ** 16
+        ) -> typing.Iterator[Secret]:
+            """Extract secret data from a body arriving in chunks, with constant memory
+
+            Secrets are yielded as their matches end, with the byte offsets of the match in the stream.
+
+            Usage:
+                with open(path, "rb") as f:
+                    secrets = set(handler.scan_stream(iter(lambda: f.read(2 ** 20), b"")))
+
+            :param chunks: bytes, or text encoded to UTF-8
+            :param max_match_size: bytes kept before the current chunk, a longer match is cut to its end
+            """
+            window = _StreamWindow(self.types, max_match_size)
+            stream = self._open_stream(window)
+            try:
+                for chunk in chunks:
+                    yield from self._scan_chunk(stream, window, chunk)
+            finally:
+                self._close_stream(stream)
+            yield from window.drain()
+
+        async def ascan_stream(
+            self, chunks: typing.AsyncIterable[typing.Union[bytes, str]], max_match_size: int = 2 ** 16
+        ) -> typing.AsyncIterator[Secret]:
+            """Same as `scan_stream`, for chunks arriving asynchronously
+
+            Usage:
+                async with client.stream("GET", url) as response:
+                    async for secret in handler.ascan_stream(response.aiter_bytes()):
+                        ...
+            """
+            window = _StreamWindow(self.types, max_match_size)
+            stream = self._open_stream(window)
+            try:
+                async for chunk in chunks:
+                    for secret in self._scan_chunk(stream, window, chunk):
+                        yield secret
+            finally:
+                self._close_stream(stream)
+            for secret in window.drain():
+                yield secret
+
+        def _open_stream(self, window: "_StreamWindow") -> "hyperscan.Stream":
+            if not self._init:
+                raise HandlerException("Hyperscan database is not initialized")
+            with self._stream_lock:
+                if self._stream_db is None:
+                    self._stream_db = self._compile(self._stream_mode)
+            # the stream does not hold a reference to its callback, the window does
+            window.callback = window.on_match
+            stream = self._stream_db.stream(match_event_handler=window.callback)
+            stream.__enter__()
+            return stream
+
+        def _close_stream(self, stream: "hyperscan.Stream") -> None:
+            """Close stream, which reports the matches at its end"""
+            with self._stream_lock:  # closing scans with the scratch space of the database
+                stream.__exit__(None, None, None)
+
+        def _scan_chunk(
+            self, stream: "hyperscan.Stream", window: "_StreamWindow", chunk: typing.Union[bytes, str]
+        ) -> typing.List[Secret]:
+            if isinstance(chunk, str):
+                chunk = chunk.encode("utf-8")
+            elif not isinstance(chunk, bytes):
+                chunk = bytes(chunk)  # hyperscan only scans bytes
+            window.append(chunk)
+            scratch = getattr(self._local, "stream_scratch", None)
+            if scratch is None:
+                scratch = hyperscan.Scratch(self._stream_db)
+                self._local.stream_scratch = scratch
+            stream.scan(chunk, scratch=scratch)
+            secrets = window.drain()
+            window.trim()
+            return secrets
+
+
+    class _StreamWindow:
+        """The last bytes of a stream, from which the matches reported by hyperscan are sliced"""
+
+        def __init__(self, types: typing.Dict[int, str], max_match_size: int):
+            self.types = types
+            self.max_match_size = max_match_size
+            self.buffer = bytearray()
+            self.start = 0  # offset of the buffer in the stream
+            self.secrets: typing.List[Secret] = list()
+            self.callback: typing.Optional[typing.Callable] = None
+
+        def append(self, chunk: bytes) -> None:
+            self.buffer += chunk
+
+        def trim(self) -> None:
+            """Keep max_match_size bytes for the matches ending in the next chunks"""
+            excess = len(self.buffer) - self.max_match_size
+            if excess > 0:
+                del self.buffer[:excess]
+                self.start += excess
+
+        def on_match(
+            self, id: int, froms: int, to: int, flags: int, context: typing.Optional[typing.Any] = None
+        ) -> typing.Optional[bool]:
+            with memoryview(self.buffer) as buffer:
+                data = str(buffer[max(froms - self.start, 0) : to - self.start], "utf-8", "replace")
+            self.secrets.append(Secret(self.types.get(id), data=data, span=(froms, to)))
+            return None
+
+        def drain(self) -> typing.List[Secret]:
+            secrets, self.secrets = self.secrets, list()
+            return secrets
 
 
 class BSHandler(Handler):
@@ -147,13 +626,13 @@ class BSHandler(Handler):
     ) -> None:
         self.filter = filter_func
 
-    def handle(self, text: str) -> typing.Iterable[Secret]:
+    def handle(self, text: typing.Union[str, Document]) -> typing.Iterable[Secret]:
         """Extract secret data via filter
 
         :type text: str
         :param text: should be in html format
         """
-        soup = BeautifulSoup(text, "html.parser")
+        soup = as_document(text).soup
         result: typing.List[BSResult] = self.filter(soup)
         results: typing.List[Secret] = list()
         if result is not None:
@@ -178,6 +657,7 @@ def get_regex_handler(rules: typing.Dict[str, str], type_: str = "", *args, **kw
     """Return regex handler on current platform"""
     if len(type_) == 0:
         if not _is_hyperscan_available():
+            kwargs.pop("cache_dir", None)  # option of hyperscan
             return ReRegexHandler(rules, *args, **kwargs)
         else:
             return HyperscanRegexHandler(rules, *args, **kwargs)
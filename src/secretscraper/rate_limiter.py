@@ -18,6 +18,8 @@ from urllib.parse import urlparse
 
 __all__ = ["DomainRateLimiter"]
 
+_SMOOTHING = 0.2  # weight of the latest wait in the moving average
+
 
 @dataclass
 class _DomainState:
@@ -46,6 +48,8 @@ class DomainRateLimiter:
         self.max_concurrent_per_domain = max_concurrent_per_domain
         self.min_interval = min_interval
         self._domain_state: dict[str, _DomainState] = {}
+        self.total_wait = 0.0  # seconds spent waiting for a slot, over all requests
+        self.mean_wait = 0.0  # moving average of the wait of recent requests
         self._state_lock = asyncio.Lock()
 
     def _get_domain(self, url: str) -> str:
@@ -63,9 +67,14 @@ class DomainRateLimiter:
                 self._domain_state[domain] = state
             return state
 
+    def _record_wait(self, wait: float) -> None:
+        self.total_wait += wait
+        self.mean_wait += _SMOOTHING * (wait - self.mean_wait)
+
     @asynccontextmanager
     async def acquire(self, url: str):
         """Async context manager that rate-limits requests per domain."""
+        started = time.monotonic()
         domain = self._get_domain(url)
         state = await self._get_domain_state(domain)
 
@@ -78,6 +87,7 @@ class DomainRateLimiter:
                 if wait > 0:
                     await asyncio.sleep(wait)
                 state.last_request_started = time.monotonic()
+            self._record_wait(state.last_request_started - started)
             yield
         finally:
             state.semaphore.release()
@@ -6,7 +6,7 @@ import typing
 
 from .entity import Secret
 from .exception import FileScannerException
-from .handler import Handler
+from .handler import Handler, StreamHandler
 
 logger = logging.getLogger(__name__)
 
@@ -18,15 +18,17 @@ class FileScanner:
         self,
         targets: typing.List[pathlib.Path],
         handler: Handler,
+        chunk_size: int = 2 ** 20,
     ):
         """
 
         :param targets: target files to scan
         :param handler:
-        :param verbose:
+        :param chunk_size: bytes read at a time from a file, if handler scans streams
         """
         self.targets = targets
         self.handler = handler
+        self.chunk_size = chunk_size
 
         self.secrets: typing.Dict[pathlib.Path, typing.Set[Secret]] = {}
 
@@ -38,10 +40,16 @@ class FileScanner:
                 raise FileScannerException(f"Fail to open {file.name}")
             if not file.is_file():
                 raise FileScannerException(f"Internal error: got a directory: {file.name}")
-            # pass non-text file
-            content: str = file.read_text(encoding="utf8", errors="ignore")
-            logger.debug(f"Read file content: {len(content)}bytes from {file.name}")
-            secrets: typing.Set[Secret] = set(list(self.handler.handle(content)))
+            if isinstance(self.handler, StreamHandler):
+                # file read in chunks, in constant memory
+                with file.open("rb") as f:
+                    chunks = iter(lambda: f.read(self.chunk_size), b"")
+                    secrets: typing.Set[Secret] = set(self.handler.scan_stream(chunks))
+            else:
+                # pass non-text file
+                content: str = file.read_text(encoding="utf8", errors="ignore")
+                logger.debug(f"Read file content: {len(content)}bytes from {file.name}")
+                secrets = set(list(self.handler.handle(content)))
             if len(secrets) > 0:
                 self.secrets[file] = secrets
                 logger.debug(f"Found {len(secrets)} secrets from {file.name}")
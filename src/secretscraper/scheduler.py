@@ -0,0 +1,375 @@
+"""Scheduling policies of the crawl frontier, deciding which queued url is crawled next.
+
+Usage:
+    scheduler = create_scheduler("round-robin")
+    scheduler.push(url_node)
+    url_node = scheduler.pop()
+
+Policies:
+    fifo: in order of discovery
+    bfs: shallowest urls first
+    js-first: js files first, then shallowest urls
+    round-robin: one url of each host in turn, in order of discovery per host
+
+Push and pop are O(1) for fifo and round-robin, O(log n) for the priority policies.
+
+With `max_in_memory`, nodes beyond it are spilled to a SQLite file and paged
+back in by the priority of the policy, so the frontier of an unlimited crawl
+does not have to fit in memory:
+
+    scheduler = create_scheduler("bfs", max_in_memory=100_000)
+    ...
+    scheduler.close()  # delete the spill file
+"""
+
+import collections
+import heapq
+import itertools
+import os
+import pathlib
+import sqlite3
+import tempfile
+import typing
+
+from .entity import URLNode, get_node
+
+__all__ = [
+    "Scheduler",
+    "FIFOScheduler",
+    "PriorityScheduler",
+    "RoundRobinScheduler",
+    "SpillingScheduler",
+    "create_scheduler",
+    "SCHEDULER_POLICIES",
+]
+
+SCHEDULER_POLICIES = ("fifo", "bfs", "js-first", "round-robin")
+
+
+class Scheduler(typing.Protocol):
+    """Queue of url nodes ordered by a policy"""
+
+    def push(self, url_node: URLNode) -> None: ...
+
+    def pop(self) -> URLNode:
+        """Remove and return the next url node, IndexError if empty"""
+        ...
+
+    def peek(self) -> URLNode:
+        """The url node `pop` would return, IndexError if empty"""
+        ...
+
+    def __len__(self) -> int: ...
+
+    def close(self) -> None:
+        """Release resources held by the scheduler"""
+
+
+class FIFOScheduler(Scheduler):
+    """Url nodes in order of discovery"""
+
+    def __init__(self):
+        self._queue: typing.Deque[URLNode] = collections.deque()
+
+    def push(self, url_node: URLNode) -> None:
+        self._queue.append(url_node)
+
+    def pop(self) -> URLNode:
+        return self._queue.popleft()
+
+    def peek(self) -> URLNode:
+        return self._queue[0]
+
+    def __len__(self) -> int:
+        return len(self._queue)
+
+
+class PriorityScheduler(Scheduler):
+    """Url nodes with the smallest key first, in order of discovery among equal keys"""
+
+    def __init__(self, key: typing.Callable[[URLNode], typing.Any]):
+        """
+
+        :param key: priority of a url node, smaller first
+        """
+        self.key = key
+        self._heap: typing.List[typing.Tuple[typing.Any, int, URLNode]] = []
+        self._counter = itertools.count()  # tie breaker, url nodes are not ordered
+
+    def push(self, url_node: URLNode) -> None:
+        heapq.heappush(self._heap, (self.key(url_node), next(self._counter), url_node))
+
+    def pop(self) -> URLNode:
+        return heapq.heappop(self._heap)[2]
+
+    def peek(self) -> URLNode:
+        return self._heap[0][2]
+
+    def __len__(self) -> int:
+        return len(self._heap)
+
+
+class RoundRobinScheduler(Scheduler):
+    """One url node of each host in turn, so a host with many urls does not delay the others"""
+
+    def __init__(self):
+        self._queues: typing.Dict[str, typing.Deque[URLNode]] = dict()  # host to its url nodes
+        self._hosts: typing.Deque[str] = collections.deque()  # hosts with queued url nodes, next first
+        self._len = 0
+
+    def push(self, url_node: URLNode) -> None:
+        host = url_node.netloc
+        queue = self._queues.get(host)
+        if queue is None:
+            queue = self._queues[host] = collections.deque()
+            self._hosts.append(host)
+        queue.append(url_node)
+        self._len += 1
+
+    def pop(self) -> URLNode:
+        if not self._hosts:
+            raise IndexError("pop from an empty scheduler")
+        host = self._hosts.popleft()
+        queue = self._queues[host]
+        url_node = queue.popleft()
+        if queue:
+            self._hosts.append(host)
+        else:
+            del self._queues[host]
+        self._len -= 1
+        return url_node
+
+    def peek(self) -> URLNode:
+        if not self._hosts:
+            raise IndexError("peek from an empty scheduler")
+        return self._queues[self._hosts[0]][0]
+
+    def __len__(self) -> int:
+        return self._len
+
+
+class SpillingScheduler(Scheduler):
+    """Keep up to max_in_memory url nodes in a scheduler and spill the rest to a SQLite file.
+
+    Once nodes are spilled, new nodes are spilled too, and whenever the in-memory
+    scheduler runs empty it is refilled with the spilled nodes of smallest priority,
+    in order of discovery among equal priorities, at most `_PAGE_BATCH` at a time so a
+    page-in blocks the event loop only briefly. With `interleave`, spilled nodes of
+    smaller priority than the next in-memory node are paged in before it is popped,
+    so the order of the policy holds across the spill boundary.
+
+    A spilled node is stored by url, depth and ids: paging in returns the same node
+    object while something else keeps it alive, and an equal new node otherwise.
+    In a crawl the results keep every found node, so spilling saves the entries of
+    the in-memory scheduler, not the nodes themselves.
+    """
+
+    _WRITE_BATCH = 1024  # spilled nodes buffered before a write
+    _PAGE_BATCH = 1024  # max spilled nodes read per page-in
+
+    def __init__(
+        self,
+        scheduler: Scheduler,
+        priority: typing.Callable[[URLNode], int],
+        max_in_memory: int = 100_000,
+        path: typing.Optional[typing.Union[str, pathlib.Path]] = None,
+        on_page_in: typing.Optional[typing.Callable[[URLNode, int], typing.Any]] = None,
+        interleave: bool = False,
+    ):
+        """
+
+        :param scheduler: in-memory scheduler
+        :param priority: priority of a spilled url node, smaller first
+        :param max_in_memory: max url nodes in the in-memory scheduler, exceeded by nodes paged in by `interleave`
+        :param path: SQLite file, its frontier table is replaced. A temporary file deleted on close by default
+        :param on_page_in: called with each paged in url node and its priority
+        :param interleave: compare spilled nodes with the next in-memory node, priority must then be
+            a function of the node alone, ordered like the in-memory scheduler
+        """
+        if max_in_memory < 1:
+            raise ValueError("max_in_memory must be at least 1")
+        self.scheduler = scheduler
+        self.priority = priority
+        self.max_in_memory = max_in_memory
+        self.on_page_in = on_page_in
+        self.interleave = interleave
+        self._min_priority: typing.Optional[int] = None  # smallest priority of the spilled nodes
+        self._is_temporary = path is None
+        if path is None:
+            fd, path = tempfile.mkstemp(prefix="secretscraper-frontier-", suffix=".sqlite3")
+            os.close(fd)
+        self.path = pathlib.Path(path)
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False, isolation_level=None)
+        # a spill file is not meant to survive a crash
+        self._conn.execute("PRAGMA journal_mode=OFF")
+        self._conn.execute("PRAGMA synchronous=OFF")
+        self._conn.execute("DROP TABLE IF EXISTS frontier")
+        self._conn.execute(
+            "CREATE TABLE frontier ("
+            "seq INTEGER PRIMARY KEY, priority INTEGER, node_id INTEGER, url TEXT, depth INTEGER, parent_id INTEGER)"
+        )
+        self._conn.execute("CREATE INDEX frontier_priority ON frontier (priority, seq)")
+        self._seq = itertools.count()
+        self._pending: typing.List[tuple] = []  # spilled rows not written yet
+        self._spilled = 0  # spilled nodes, written or pending
+        self.spills = 0  # nodes spilled in total
+        self.page_ins = 0  # times the in-memory scheduler was refilled
+
+    def push(self, url_node: URLNode) -> None:
+        if not self._spilled and len(self.scheduler) < self.max_in_memory:
+            self.scheduler.push(url_node)
+            return
+        priority = self.priority(url_node)
+        if self._min_priority is None or priority < self._min_priority:
+            self._min_priority = priority
+        self._pending.append(
+            (
+                next(self._seq),
+                priority,
+                url_node.node_id,
+                url_node.url,
+                url_node.depth,
+                url_node.parent_id,
+            )
+        )
+        self._spilled += 1
+        self.spills += 1
+        if len(self._pending) >= self._WRITE_BATCH:
+            self._flush()
+
+    def pop(self) -> URLNode:
+        if self._spilled:
+            if not len(self.scheduler):
+                self._page_in()
+            elif self.interleave:
+                head = self.priority(self.scheduler.peek())
+                if self._min_priority < head:
+                    self._page_in(below=head)
+        return self.scheduler.pop()
+
+    def peek(self) -> URLNode:
+        if not len(self.scheduler) and self._spilled:
+            self._page_in()
+        return self.scheduler.peek()
+
+    def _flush(self) -> None:
+        self._conn.execute("BEGIN")
+        self._conn.executemany("INSERT INTO frontier VALUES (?, ?, ?, ?, ?, ?)", self._pending)
+        self._conn.execute("COMMIT")
+        self._pending.clear()
+
+    def _page_in(self, below: typing.Optional[int] = None) -> None:
+        """Move a batch of the spilled nodes of smallest priority to the in-memory scheduler
+
+        :param below: only move nodes of a smaller priority
+        """
+        if self._pending:
+            self._flush()
+        size = min(self.max_in_memory, self._PAGE_BATCH)
+        self._conn.execute("BEGIN")
+        where, params = ("WHERE priority < ?", (below, size)) if below is not None else ("", (size,))
+        rows = self._conn.execute(
+            f"SELECT seq, priority, node_id, url, depth, parent_id FROM frontier {where} ORDER BY priority, seq LIMIT ?",
+            params,
+        ).fetchall()
+        self._conn.executemany("DELETE FROM frontier WHERE seq = ?", ((row[0],) for row in rows))
+        self._min_priority = self._conn.execute("SELECT MIN(priority) FROM frontier").fetchone()[0]
+        self._conn.execute("COMMIT")
+        for _, priority, node_id, url, depth, parent_id in rows:
+            url_node = get_node(node_id)
+            if url_node is None:
+                url_node = URLNode(url=url, depth=depth, parent=get_node(parent_id))
+            self.scheduler.push(url_node)
+            if self.on_page_in is not None:
+                self.on_page_in(url_node, priority)
+        self._spilled -= len(rows)
+        self.page_ins += 1
+
+    def __len__(self) -> int:
+        return len(self.scheduler) + self._spilled
+
+    def close(self) -> None:
+        self._conn.close()
+        if self._is_temporary:
+            self.path.unlink(missing_ok=True)
+
+
+class _HostRank:
+    """Spill priority of the round-robin policy: the rank of a url node within its host, interleaving hosts.
+
+    Only hosts with spilled nodes are counted. Once all spilled nodes of a host
+    are paged in, the host is forgotten, and its next spilled node joins the
+    rotation at the rank last paged in.
+    """
+
+    def __init__(self):
+        self._ranks: typing.Dict[str, int] = dict()  # host to the rank of its last spilled node
+        self._spilled: typing.Counter[str] = collections.Counter()  # host to its spilled nodes
+        self._current = 0  # highest rank paged in
+
+    def __call__(self, url_node: URLNode) -> int:
+        host = url_node.netloc
+        rank = self._ranks.get(host, self._current) + 1
+        self._ranks[host] = rank
+        self._spilled[host] += 1
+        return rank
+
+    def paged_in(self, url_node: URLNode, rank: int) -> None:
+        host = url_node.netloc
+        self._current = max(self._current, rank)
+        self._spilled[host] -= 1
+        if self._spilled[host] <= 0:
+            del self._spilled[host]
+            self._ranks.pop(host, None)
+
+    def __len__(self) -> int:
+        """Hosts counted"""
+        return len(self._ranks)
+
+
+def create_scheduler(
+    policy: str = "fifo",
+    is_js: typing.Optional[typing.Callable[[URLNode], bool]] = None,
+    max_in_memory: int = 0,
+    spill_path: typing.Optional[typing.Union[str, pathlib.Path]] = None,
+) -> Scheduler:
+    """Create a scheduler
+
+    :param policy: one of SCHEDULER_POLICIES
+    :param is_js: whether a url node is a js file, required by the js-first policy
+    :param max_in_memory: url nodes kept in memory before spilling to disk, 0 for no limit
+    :param spill_path: SQLite file to spill to, a temporary file by default
+    """
+    scheduler: Scheduler
+    priority: typing.Callable[[URLNode], int]
+    on_page_in = None
+    interleave = False  # whether priority is a function of the node, ordered like the in-memory scheduler
+    if policy == "fifo":
+        scheduler = FIFOScheduler()
+        priority = lambda url_node: 0
+    elif policy == "bfs":
+        scheduler = PriorityScheduler(key=lambda url_node: url_node.depth)
+        priority = lambda url_node: url_node.depth
+        interleave = True
+    elif policy == "js-first":
+        if is_js is None:
+            raise ValueError("js-first policy requires is_js")
+        scheduler = PriorityScheduler(key=lambda url_node: (not is_js(url_node), url_node.depth))
+        priority = lambda url_node: (0 if is_js(url_node) else 1 << 32) + url_node.depth
+        interleave = True
+    elif policy == "round-robin":
+        scheduler = RoundRobinScheduler()
+        priority = _HostRank()
+        on_page_in = priority.paged_in
+    else:
+        raise ValueError(f"policy must be one of {SCHEDULER_POLICIES}, got {policy!r}")
+    if max_in_memory > 0:
+        return SpillingScheduler(
+            scheduler,
+            priority,
+            max_in_memory=max_in_memory,
+            path=spill_path,
+            on_page_in=on_page_in,
+            interleave=interleave,
+        )
+    return scheduler
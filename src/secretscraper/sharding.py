@@ -0,0 +1,380 @@
+"""Crawl in several processes, each owning the hosts whose hostname hashes to its shard.
+
+Each shard is a `Crawler` in its own process, with its own event loop, http
+client and rate limiter, so the limits per domain hold without coordination.
+A shard crawls the urls of its hosts and sends the urls it finds on other
+hosts to the inbox of their shard. The crawl is complete once every shard is
+idle and every url sent was received; the coordinator then merges the results
+of the shards into `url_dict`, `js_dict` and `url_secrets`, like a single
+crawler's:
+
+    crawler = ShardedCrawler(num_shards=4, start_urls=urls, url_filter=..., parser=..., handler=...)
+    crawler.start()
+    formatter.output_url_per_domain(domains, crawler.url_dict)
+"""
+
+import asyncio
+import functools
+import hashlib
+import logging
+import multiprocessing
+import queue
+import time
+import typing
+from collections import namedtuple
+from urllib.parse import ParseResult, urlparse
+
+from .cache import DiskCache
+from .checkpoint import DONE, JS_LINK, URL_LINK, build_results, node_row, secret_row
+from .crawler import Crawler
+from .entity import URLNode
+
+__all__ = ["ShardedCrawler", "ShardCrawler", "ShardChannels", "ShardResult", "shard_of"]
+
+logger = logging.getLogger(__name__)
+
+ShardResult = namedtuple(
+    "ShardResult", ["shard", "nodes", "links", "secrets", "total_page", "stats", "cache", "disk_cache"]
+)
+
+# counters of CrawlStats summed over the shards
+_STATS_COUNTERS = ("pages", "bytes", "secrets", "workers", "peak_workers", "scale_ups", "scale_downs")
+
+
+def shard_of(host: str, num_shards: int) -> int:
+    """Shard owning a host, stable across processes and runs unlike `hash`"""
+    digest = hashlib.blake2b(host.lower().encode(), digest_size=8).digest()
+    return int.from_bytes(digest, "big") % num_shards
+
+
+def _host_of(url_object: ParseResult) -> str:
+    # the key of the domain rate limiter, so that one shard owns each of its domains
+    return url_object.hostname or url_object.netloc
+
+
+class ShardChannels:
+    """Inboxes of the shards and the shared counters telling when the crawl is complete.
+
+    A url is counted as sent before it is put in an inbox, and as received after
+    its shard marked itself active and enqueued it. When all shards are idle
+    and the sent and received counts are equal and unchanged around that check,
+    no url is in transit and none can be found any more.
+    """
+
+    def __init__(self, context: multiprocessing.context.BaseContext, num_shards: int):
+        self.inboxes = [context.Queue() for _ in range(num_shards)]
+        self.results = context.Queue()
+        self.sent = context.Value("q", 0)
+        self.received = context.Value("q", 0)
+        self.active = context.Array("b", [1] * num_shards, lock=False)  # each shard writes its own flag only
+        self.stop = context.Event()
+
+    @property
+    def num_shards(self) -> int:
+        return len(self.inboxes)
+
+    def send(self, shard: int, message: tuple) -> None:
+        with self.sent.get_lock():
+            self.sent.value += 1
+        self.inboxes[shard].put(message)
+
+    def receive(self, shard: int) -> typing.Iterator[tuple]:
+        """Messages waiting in the inbox of shard, without blocking. Count them with `mark_received`"""
+        inbox = self.inboxes[shard]
+        while True:
+            try:
+                message = inbox.get_nowait()
+            except queue.Empty:
+                return
+            self.active[shard] = 1
+            yield message
+
+    def mark_received(self, num: int) -> None:
+        if num:
+            with self.received.get_lock():
+                self.received.value += num
+
+    def is_complete(self) -> bool:
+        """Whether all shards are idle with no url in transit"""
+        sent, received = self.sent.value, self.received.value
+        if sent != received or any(self.active):
+            return False
+        return self.sent.value == sent and self.received.value == received
+
+
+class ShardCrawler(Crawler):
+    """Crawler of one shard: crawls the urls of its hosts and sends the others to their shard"""
+
+    def __init__(self, shard: int, channels: ShardChannels, poll_interval: float = 0.01, **kwargs):
+        """
+
+        :param shard: index of this shard
+        :param channels: inboxes and counters shared with the other shards
+        :param poll_interval: seconds between reads of the inbox
+        :param kwargs: arguments of `Crawler`
+        """
+        super().__init__(**kwargs)
+        self.shard = shard
+        self.channels = channels
+        self.poll_interval = poll_interval
+        self.processed: typing.List[URLNode] = []  # url nodes taken from the frontier, with their response
+
+    async def main_task(self):
+        # the frontier is not finished while other shards may still send urls
+        self.working_queue.hold()
+        try:
+            await asyncio.gather(self.run(), self.consumer(), self.receive())
+        except asyncio.CancelledError:
+            return
+
+    def enqueue(self, url_node: URLNode) -> None:
+        shard = shard_of(_host_of(url_node.url_object), self.channels.num_shards)
+        if shard == self.shard:
+            super().enqueue(url_node)
+            return
+        # not crawled here, and sent only once
+        self.visited_urls.add(url_node)
+        self.channels.send(shard, (url_node.url, url_node.depth))
+
+    async def receive(self) -> None:
+        """Enqueue urls sent by other shards until the coordinator stops the crawl"""
+        while not self.close.is_set():
+            if self.channels.stop.is_set():
+                self.working_queue.task_done()  # release the hold, the run loop ends
+                return
+            num = 0
+            for url, depth in self.channels.receive(self.shard):
+                url_node = URLNode(url=url, depth=depth)
+                if url_node not in self.visited_urls:
+                    super().enqueue(url_node)
+                num += 1
+            self.channels.mark_received(num)
+            # only the hold left in flight
+            self.channels.active[self.shard] = int(
+                not (self.working_queue.empty() and self.working_queue.in_flight == 1)
+            )
+            await asyncio.sleep(self.poll_interval)
+
+    async def process_one(self, url_node: URLNode):
+        self.processed.append(url_node)
+        await super().process_one(url_node)
+
+    def result(self) -> ShardResult:
+        """Rows of the results of this shard, for the coordinator to merge"""
+        nodes = [node_row(url_node, DONE) for url_node in self.processed]
+        links = []
+        for kind, results in ((URL_LINK, self.url_dict), (JS_LINK, self.js_dict)):
+            for parent, children in results.items():
+                nodes.append(node_row(parent))
+                for child in children:
+                    nodes.append(node_row(child))
+                    links.append((parent.url, child.url, kind))
+        secrets = []
+        for url_node, url_secrets in self.url_secrets.items():
+            nodes.append(node_row(url_node))
+            secrets.extend(secret_row(url_node.url, secret) for secret in url_secrets)
+        stats = {name: getattr(self.stats, name) for name in _STATS_COUNTERS}
+        stats.update(
+            errors=self.stats.errors,
+            coalesced_requests=self.coalesced_requests,
+            memo_hits=self.extractor.memo_hits,
+            memo_misses=self.extractor.memo_misses,
+        )
+        return ShardResult(
+            shard=self.shard,
+            nodes=nodes,
+            links=links,
+            secrets=secrets,
+            total_page=self.total_page,
+            stats=stats,
+            cache=self.cache.stats,
+            disk_cache=self.disk_cache.stats if self.disk_cache is not None else None,
+        )
+
+
+def _report(report: typing.Callable[[str], typing.Any], shard: int, summary: str) -> None:
+    report(f"Shard {shard}: {summary}")
+
+
+def _run_shard(shard: int, channels: ShardChannels, poll_interval: float, kwargs: dict) -> None:
+    """Process target: crawl a shard and put its result"""
+    for inbox in channels.inboxes:
+        inbox.cancel_join_thread()  # urls left unread once stopped are dropped on exit
+    crawler = None
+    try:
+        crawler = ShardCrawler(shard, channels, poll_interval=poll_interval, **kwargs)
+        crawler.start()
+    except KeyboardInterrupt:
+        pass
+    except Exception as e:
+        logger.error(f"Shard {shard} failed: {e.__class__.__name__}: {e}")
+    finally:
+        # urls sent to a shard that stopped early are counted and dropped, so the crawl can complete
+        while not channels.stop.is_set():
+            channels.mark_received(sum(1 for _ in channels.receive(shard)))
+            channels.active[shard] = 0
+            time.sleep(poll_interval)
+        channels.results.put(crawler.result() if crawler is not None else None)
+        if crawler is not None and crawler.disk_cache is not None:
+            crawler.disk_cache.close()
+
+
+def _get_context() -> multiprocessing.context.BaseContext:
+    # forked shards inherit the handler, compiled rules included, without pickling it
+    if "fork" in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context("fork")
+    return multiprocessing.get_context()
+
+
+class ShardedCrawler(Crawler):
+    """Coordinator of a crawl sharded by host over several processes.
+
+    Exposes the results and statistics of `Crawler`, merged from the shards, and
+    validates results in the coordinator. `max_page_num` is split evenly between
+    the shards. Checkpoints are not supported.
+
+    The coordinator holds no http client or disk cache while the shards are forked:
+    each shard creates its own, and the coordinator opens the disk cache only once
+    the shards are done. The shards share the disk cache file and its whole
+    `disk_cache_max_bytes`, each accounting for the bytes stored by the others.
+    """
+
+    def __init__(self, num_shards: int = 2, poll_interval: float = 0.01, **kwargs):
+        """
+
+        :param num_shards: number of crawler processes
+        :param poll_interval: seconds between checks of the inboxes and of completion
+        :param kwargs: arguments of `Crawler`, passed to each shard
+        """
+        if num_shards < 1:
+            raise ValueError("num_shards must be at least 1")
+        if kwargs.get("checkpoint"):
+            raise ValueError("checkpoint is not supported by a sharded crawl")
+        super().__init__(**{**kwargs, "disk_cache": ""})
+        self.num_shards = num_shards
+        self.poll_interval = poll_interval
+        self._kwargs = kwargs
+        self.processes: typing.List[multiprocessing.process.BaseProcess] = []
+
+    def shard_kwargs(self, shard: int) -> dict:
+        """Crawler arguments of a shard: its own start urls and share of max_page_num"""
+        kwargs = dict(self._kwargs)
+        kwargs["start_urls"] = [
+            url for url in self.start_urls if shard_of(_host_of(urlparse(url)), self.num_shards) == shard
+        ]
+        if self.max_page_num > 0:
+            kwargs["max_page_num"] = -(-self.max_page_num // self.num_shards)
+        kwargs["progress_func"] = functools.partial(_report, self.progress.report, shard)
+        return kwargs
+
+    def start(self):
+        """Run the shards until the crawl is complete and merge their results"""
+        context = _get_context()
+        channels = ShardChannels(context, self.num_shards)
+        self.processes = [
+            context.Process(
+                target=_run_shard,
+                args=(shard, channels, self.poll_interval, self.shard_kwargs(shard)),
+                name=f"secretscraper-shard-{shard}",
+                daemon=True,
+            )
+            for shard in range(self.num_shards)
+        ]
+        for process in self.processes:
+            process.start()
+        try:
+            while not channels.is_complete():
+                # shards only exit once stopped
+                if any(process.exitcode is not None for process in self.processes):
+                    logger.error("A shard exited before the crawl was complete")
+                    break
+                time.sleep(self.poll_interval)
+        finally:
+            channels.stop.set()
+        results = self.collect(channels)
+        for process in self.processes:
+            process.join(timeout=5)
+            if process.is_alive():
+                process.terminate()
+        if self._kwargs.get("disk_cache"):
+            self.open_disk_cache()
+        self.merge(results)
+        logger.debug(f"Sharded crawl finished. {self.stats.summary()}")
+        super().close_all()
+
+    def open_disk_cache(self) -> None:
+        """Open the disk cache the shards wrote to, for their statistics and for validation"""
+        max_bytes = self._kwargs.get("disk_cache_max_bytes")
+        path = self._kwargs["disk_cache"]
+        self.disk_cache = DiskCache(path) if max_bytes is None else DiskCache(path, max_bytes=max_bytes)
+
+    def collect(self, channels: ShardChannels) -> typing.List[ShardResult]:
+        """Results of the shards, once stopped"""
+        results = []
+        pending = len(self.processes)
+        while pending:
+            try:
+                result = channels.results.get(timeout=1)
+            except queue.Empty:
+                if any(process.is_alive() for process in self.processes):
+                    continue
+                try:
+                    result = channels.results.get(timeout=self.poll_interval)  # put before the shard exited
+                except queue.Empty:
+                    logger.error(f"{pending} shards exited without results")
+                    break
+            pending -= 1
+            if result is not None:
+                results.append(result)
+        return results
+
+    def merge(self, results: typing.List[ShardResult]) -> None:
+        """Merge the results of the shards into those of this crawler.
+
+        A url processed by a shard takes its response from that shard, and its
+        depth and parent from the shard that found it.
+        """
+        rows: typing.Dict[str, list] = dict()
+        links, secrets = set(), set()
+        for result in results:
+            for row in result.nodes:
+                merged = rows.get(row[0])
+                if merged is None:
+                    rows[row[0]] = list(row)
+                    continue
+                if row[3] > merged[3]:
+                    merged[3:] = row[3:]
+                if merged[2] is None and row[2] is not None:
+                    merged[1:3] = row[1:3]
+            links.update(result.links)
+            secrets.update(result.secrets)
+            self.total_page += result.total_page
+            self.stats.errors.update(result.stats["errors"])
+            self.coalesced_requests += result.stats["coalesced_requests"]
+            self.extractor.memo_hits += result.stats["memo_hits"]
+            self.extractor.memo_misses += result.stats["memo_misses"]
+            self.cache.hits += result.cache.hits
+            self.cache.misses += result.cache.misses
+            self.cache.evictions += result.cache.evictions
+            self.cache.expirations += result.cache.expirations
+            if self.disk_cache is not None and result.disk_cache is not None:
+                self.disk_cache.revalidations += result.disk_cache.revalidated
+                self.disk_cache.stored += result.disk_cache.stored
+                self.disk_cache.misses += result.disk_cache.misses
+                self.disk_cache.evictions += result.disk_cache.evictions
+        for name in _STATS_COUNTERS:
+            setattr(self.stats, name, sum(result.stats[name] for result in results))
+        if self.disk_cache is not None:
+            self.disk_cache.reload()
+        _, self.url_dict, self.js_dict, self.url_secrets = build_results(
+            sorted(rows.values(), key=lambda row: row[1]), links, secrets
+        )
+        for url_node in self.found_nodes():
+            self.found_urls.add(url_node)
+
+    def close_all(self):
+        for process in self.processes:
+            if process.is_alive():
+                process.terminate()
+                process.join(timeout=5)
+        super().close_all()
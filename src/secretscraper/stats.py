@@ -0,0 +1,136 @@
+"""Live statistics of a crawl.
+
+Counters are updated as pages are processed, so reading them is O(1) however
+large the crawl grows:
+
+    stats = CrawlStats(frontier)
+    stats.record_page(len(response.content))
+
+    reporter = ProgressReporter(stats, interval=5, report=print)
+    reporter.start(loop)  # reports on a timer, also while no url is dequeued
+    ...
+    reporter.stop()
+"""
+
+import asyncio
+import collections
+import logging
+import time
+import typing
+
+from .frontier import Frontier
+
+__all__ = ["CrawlStats", "ProgressReporter"]
+
+logger = logging.getLogger(__name__)
+
+_SMOOTHING = 0.2  # weight of the latest fetch in the moving average latency
+
+
+class CrawlStats:
+    """Incrementally maintained counters of a crawl"""
+
+    def __init__(self, frontier: typing.Optional[Frontier] = None):
+        """
+
+        :param frontier: crawl frontier to read queue depth and in-flight count from
+        """
+        self.frontier = frontier
+        self.started = time.monotonic()
+        self.pages = 0  # pages fetched
+        self.bytes = 0  # body bytes fetched
+        self.secrets = 0  # secrets found
+        self.errors: typing.Counter[str] = collections.Counter()  # errors by exception class name
+        self.fetch_latency = 0.0  # moving average of the seconds of recent fetches
+        self.workers = 0  # workers of the pool
+        self.peak_workers = 0
+        self.scale_ups = 0  # times the pool grew
+        self.scale_downs = 0  # times the pool shrank
+
+    def record_page(self, nbytes: int) -> None:
+        self.pages += 1
+        self.bytes += nbytes
+
+    def record_secrets(self, num: int) -> None:
+        self.secrets += num
+
+    def record_error(self, error: BaseException) -> None:
+        self.errors[error.__class__.__name__] += 1
+
+    def record_fetch(self, seconds: float) -> None:
+        self.fetch_latency += _SMOOTHING * (seconds - self.fetch_latency)
+
+    def set_workers(self, num: int) -> None:
+        """Set the number of workers of a new pool, not counted as a resize"""
+        self.workers = num
+        self.peak_workers = max(self.peak_workers, num)
+
+    def record_workers(self, num: int) -> None:
+        """Record the number of workers after the pool was resized"""
+        if num > self.workers:
+            self.scale_ups += 1
+        elif num < self.workers:
+            self.scale_downs += 1
+        self.set_workers(num)
+
+    @property
+    def queue_depth(self) -> int:
+        """Urls waiting in the frontier"""
+        return self.frontier.qsize() if self.frontier is not None else 0
+
+    @property
+    def in_flight(self) -> int:
+        """Urls taken from the frontier and not done yet"""
+        return self.frontier.in_flight if self.frontier is not None else 0
+
+    @property
+    def elapsed(self) -> float:
+        return time.monotonic() - self.started
+
+    def summary(self) -> str:
+        elapsed = self.elapsed
+        rate = self.pages / elapsed if elapsed > 0 else 0.0
+        errors = ", ".join(f"{name}: {num}" for name, num in self.errors.most_common())
+        return (
+            f"Pages: {self.pages} ({rate:.1f}/s), Bytes: {self.bytes}, Secrets: {self.secrets}, "
+            f"Queue: {self.queue_depth}, In-flight: {self.in_flight}, Workers: {self.workers}, Errors: {sum(self.errors.values())}"
+            + (f" ({errors})" if errors else "")
+        )
+
+
+class ProgressReporter:
+    """Report crawl statistics every interval, from a task on the loop of the crawl"""
+
+    def __init__(
+        self,
+        stats: CrawlStats,
+        interval: float = 5,
+        report: typing.Optional[typing.Callable[[str], typing.Any]] = None,
+    ):
+        """
+
+        :param interval: seconds between reports, 0 to disable
+        :param report: called with the summary, defaults to logging at info level
+        """
+        if interval < 0:
+            raise ValueError("interval must be non-negative")
+        self.stats = stats
+        self.interval = interval
+        self.report = report if report is not None else logger.info
+        self.future: typing.Optional[asyncio.Future] = None
+
+    async def run(self) -> None:
+        """Report every interval"""
+        while True:
+            await asyncio.sleep(self.interval)
+            self.report(self.stats.summary())
+
+    def start(self, loop: asyncio.AbstractEventLoop) -> None:
+        """Report on loop until stopped, unless reports are disabled"""
+        if self.interval > 0 and self.future is None:
+            self.future = loop.create_task(self.run())
+
+    def stop(self) -> None:
+        if self.future is not None:
+            self.future.cancel()
+            self.future = None
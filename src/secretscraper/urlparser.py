@@ -1,57 +1,45 @@
-"""Extract URL nodes in HTML page."""
+"""Extract URL nodes in HTML page.
+
+Extraction runs in two steps: `extract_links` finds the links of a text, which
+depend on the text only, and `rebase` turns them into URL nodes under the url
+the text was fetched from. Links of identical bodies can thus be reused for
+every url serving them.
+"""
 import typing
+from collections import namedtuple
 from typing import Set
 from urllib.parse import ParseResult, urlparse
 
-from bs4 import BeautifulSoup
-
+from .document import HTML_ENGINES, Document, as_document
 from .entity import URL, Secret, URLNode
 from .handler import Handler
 from .util import is_static_resource, sanitize_url
 
+# components of a parsed url, scheme and netloc are None where those of the base url apply
+Link = namedtuple("Link", ["scheme", "netloc", "path", "params", "query", "fragment"])
+
 
 class URLParser:
     """Extract URL nodes in HTML"""
 
-    def __init__(self):
-        pass
+    def __init__(self, engine: str = "stream"):
+        """
 
-    def extract_urls(self, base_url: URLNode, text: str) -> Set[URLNode]:
+        :param engine: "stream" to collect tag links from parser events without building a tree,
+            "bs4" to read them from a BeautifulSoup tree
+        """
+        if engine not in HTML_ENGINES:
+            raise ValueError(f"engine must be one of {HTML_ENGINES}, got {engine!r}")
+        self.engine = engine
+
+    def extract_urls(self, base_url: URLNode, text: typing.Union[str, Document]) -> Set[URLNode]:
         """Extract URL nodes"""
-        found_urls: Set[URLNode] = set()
-        soup = BeautifulSoup(text, "html.parser")
-        current_depth = base_url.depth + 1
-        links_a = soup.find_all("a")
-        links_link = soup.find_all("link")
-        links_script = soup.find_all("script")
-        hrefs: Set[str] = set()
-
-        for link in links_link:
-            try:
-                href = str(link["href"])
-                hrefs.add(href)
-            except KeyError:
-                pass
-                # try:
-                #     href = str(link["href"])
-                #     hrefs.add(href)
-                # except KeyError:
-                #     pass
-
-        for link in links_a:
-            try:
-                href = str(link["href"])
-                hrefs.add(href)
-            except KeyError:
-                pass
-
-        for link in links_script:
-            try:
-                href = str(link["src"])
-                if href.endswith(".js"):
-                    hrefs.add(href)
-            except KeyError:
-                pass
+        return self.rebase(base_url, self.extract_links(text))
+
+    def extract_links(self, text: typing.Union[str, Document]) -> typing.FrozenSet[Link]:
+        """Extract the links of a text, independent of the url it was fetched from"""
+        links: Set[Link] = set()
+        hrefs: typing.Iterable[str] = as_document(text).get_links(self.engine)
 
         for href in hrefs:
             if href is not None:
@@ -68,44 +56,41 @@ class URLParser:
                     and len(url_obj.netloc) > 0
                 ):
                     # a full url
-                    node = URLNode(
-                        depth=current_depth,
-                        parent=base_url,
-                        url=url_obj.geturl(),
-                        url_object=url_obj,
-                    )
-                    found_urls.add(node)
+                    links.add(Link(*url_obj))
                 else:
                     # only a path on base_url
-                    url_obj = URL(
-                        scheme=base_url.url_object.scheme,
-                        netloc=base_url.url_object.netloc,
-                        path=url_obj.path,
-                        params=url_obj.params,
-                        query=url_obj.query,
-                        fragment=url_obj.fragment,
-                    )
-                    node = URLNode(
-                        depth=current_depth,
-                        parent=base_url,
-                        url=url_obj.geturl(),
-                        url_object=url_obj,
-                    )
-                    found_urls.add(node)
+                    links.add(Link(None, None, url_obj.path, url_obj.params, url_obj.query, url_obj.fragment))
+        return frozenset(links)
+
+    @staticmethod
+    def rebase(base_url: URLNode, links: typing.Iterable[Link]) -> Set[URLNode]:
+        """URL nodes of links found on base_url"""
+        found_urls: Set[URLNode] = set()
+        current_depth = base_url.depth + 1
+        for scheme, netloc, path, params, query, fragment in links:
+            url_obj = URL(
+                scheme=base_url.scheme if scheme is None else scheme,
+                netloc=base_url.netloc if netloc is None else netloc,
+                path=path,
+                params=params,
+                query=query,
+                fragment=fragment,
+            )
+            found_urls.add(URLNode(depth=current_depth, parent=base_url, url_object=url_obj))
         return found_urls
 
 
 class RegexURLParser(URLParser):
     """Extract URLs via regex and HTML node"""
 
-    def __init__(self, handler: Handler):
+    def __init__(self, handler: Handler, engine: str = "stream"):
         self.handler: Handler = handler
-        super().__init__()
+        super().__init__(engine)
 
-    def extract_urls(self, base_url: URLNode, text: str) -> Set[URLNode]:
-        """Extract URLs via regex and HTML node"""
-        found_urls: Set[URLNode] = set()
-        current_depth = base_url.depth + 1
+    def extract_links(self, text: typing.Union[str, Document]) -> typing.FrozenSet[Link]:
+        """Extract links via regex and HTML node"""
+        found_links: Set[Link] = set()
+        text = as_document(text)  # share one parse between the handler and the html stage
 
         links: typing.Set[Secret] = set(self.handler.handle(text))
         for link in links:
@@ -119,22 +104,17 @@ class RegexURLParser(URLParser):
             link = sanitize_url(link)
             if len(link) == 0:
                 continue
-            url_obj = URL(
-                scheme=base_url.url_object.scheme if obj.scheme == "" or obj.scheme not in (
-                    "http", "https") else obj.scheme,
-                netloc=base_url.url_object.netloc if obj.netloc == "" else obj.netloc,
-                path=obj.path,
-                params=obj.params,
-                query=obj.query,
-                fragment=obj.fragment,
+            found_links.add(
+                Link(
+                    # scheme and netloc of base_url unless the link has its own
+                    scheme=None if obj.scheme == "" or obj.scheme not in ("http", "https") else obj.scheme,
+                    netloc=None if obj.netloc == "" else obj.netloc,
+                    path=obj.path,
+                    params=obj.params,
+                    query=obj.query,
+                    fragment=obj.fragment,
+                )
             )
-            node = URLNode(
-                depth=current_depth,
-                parent=base_url,
-                url=url_obj.geturl(),
-                url_object=url_obj,
-            )
-            found_urls.add(node)
 
-        found_urls.update(super().extract_urls(base_url, text))
-        return found_urls
+        found_links.update(super().extract_links(text))
+        return frozenset(found_links)
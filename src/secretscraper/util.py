@@ -9,10 +9,10 @@ from urllib.parse import urlparse
 from threading import Thread
 import requests
 import tldextract
-from bs4 import BeautifulSoup
 
 # from dynaconf import LazySettings
 
+from .document import Document, as_document
 from .entity import URL
 from .exception import SecretScraperException
 
@@ -41,6 +41,25 @@ def read_rules_from_setting(settings) -> typing.Dict[str, str]:
     return rules_dict
 
 
+def read_rule_literals_from_setting(settings) -> typing.Dict[str, typing.List[str]]:
+    """Read the literals declared by rules, of which any one is in every match of the rule
+
+    :param settings: Dynaconf settings
+    :return typing.Dict[str, typing.List[str]]: key for rule name and value for literals
+    """
+    literals_dict = dict()
+    try:
+        for rule in settings.RULES:
+            literals = rule.get("literals")
+            if rule.get("loaded") is True and literals:
+                literals_dict[rule.get("name")] = [str(literal) for literal in literals]
+    except Exception as e:
+        raise SecretScraperException(
+            f"Exception occur when reading rules from setting: {e}"
+        ) from e
+    return literals_dict
+
+
 def is_static_resource(path: str) -> bool:
     """Check whether a path is a static resource"""
     exts = {'.png', '.jpg', '.jpeg', '.gif', '.css', '.ico', ".dtd", '.svg', '.scss', '.vue', '.ts'}
@@ -108,12 +127,12 @@ def is_hyperscan() -> bool:
 
 def get_response_title(response: requests.Response) -> str:
     """Get the response title"""
-    bs = BeautifulSoup(response.text, "html.parser")
-    titles = list()
-    for t in bs.find_all('title'):
-        text = t.get_text()
-        titles.append(text.replace("\n", " ").replace("\r", " ").strip())
-    return "|".join(titles)
+    return get_text_title(response.text)
+
+
+def get_text_title(text: typing.Union[str, Document]) -> str:
+    """Get the title of a html text"""
+    return as_document(text).title
 
 
 import http.server
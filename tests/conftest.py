@@ -8,6 +8,10 @@ from pathlib import Path
 import pytest
 from click.testing import CliRunner
 
+from secretscraper.crawler import Crawler
+from secretscraper.filter import ChainedURLFilter, DomainBlackListURLFilter
+from secretscraper.handler import ReRegexHandler
+from secretscraper.urlparser import URLParser
 from secretscraper.util import read_rules_from_setting, start_local_test_http_server
 
 from . import settings
@@ -66,3 +70,90 @@ def local_http_server_base_url() -> typing.Generator[str, None, None]:
         httpd.server_close()
         if thread is not None:
             thread.join(timeout=1)
+
+
+def write_site(site: Path, link_base: typing.Callable[[int], str] = lambda level: "") -> None:
+    """Three levels of pages, each linking to three children and leaking a key
+
+    :param link_base: scheme and host of the links on the pages of a level, "" for relative links
+    """
+
+    def write_page(name: str, level: int):
+        children = [f"{name}_{i}" for i in range(3)] if level < 2 else []
+        links = "".join(f'<a href="{link_base(level)}/{child}.html">{child}</a>' for child in children)
+        (site / f"{name}.html").write_text(f"<html><body>{links} key_{name}</body></html>")
+        for child in children:
+            write_page(child, level + 1)
+
+    write_page("index", 0)
+
+
+@pytest.fixture
+def site_url(tmp_path) -> typing.Generator[str, None, None]:
+    """Url of the index of a site of 13 pages"""
+    site = tmp_path / "site"
+    site.mkdir()
+    write_site(site)
+    thread, httpd = start_local_test_http_server("127.0.0.1", 0, site)
+    try:
+        yield f"http://127.0.0.1:{httpd.server_address[1]}/index.html"
+    finally:
+        httpd.shutdown()
+        httpd.server_close()
+        thread.join(timeout=1)
+
+
+@pytest.fixture
+def hosts(tmp_path) -> typing.Generator[typing.List[str], None, None]:
+    """One site of 13 pages served on two hosts, pages linking to the other host every other level"""
+    site = tmp_path / "site"
+    site.mkdir()
+    # links to 127.0.0.1 and localhost are dropped by the parser
+    servers = [start_local_test_http_server(address, 0, site) for address in ("127.0.0.2", "127.0.0.3")]
+    hosts = [f"{httpd.server_address[0]}:{httpd.server_address[1]}" for _, httpd in servers]
+    write_site(site, lambda level: f"http://{hosts[level % 2]}")
+    try:
+        yield hosts
+    finally:
+        for thread, httpd in servers:
+            httpd.shutdown()
+            httpd.server_close()
+            thread.join(timeout=1)
+
+
+@pytest.fixture
+def crawler_kwargs() -> typing.Callable[..., dict]:
+    """Arguments of a small crawler of the test site, from a start url and overrides"""
+
+    def make(start_url: str, **kwargs) -> dict:
+        return dict(
+            dict(
+                start_urls=[start_url],
+                url_filter=ChainedURLFilter([DomainBlackListURLFilter(set())]),
+                parser=URLParser(),
+                handler=ReRegexHandler(rules={"Key": r"key_\w+"}),
+                max_depth=3,
+                num_workers=2,
+                min_request_interval=0,
+            ),
+            **kwargs,
+        )
+
+    return make
+
+
+@pytest.fixture
+def crawl_results() -> typing.Callable[[Crawler], tuple]:
+    """Links with the depth and status of each child, and secrets of a crawler, to compare crawls"""
+
+    def results(crawler: Crawler) -> tuple:
+        return (
+            {
+                (parent.url, child.url, child.depth, child.response_status)
+                for parent, children in crawler.url_dict.items()
+                for child in children
+            },
+            {(url_node.url, secret.data) for url_node, secrets in crawler.url_secrets.items() for secret in secrets},
+        )
+
+    return results
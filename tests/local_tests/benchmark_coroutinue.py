@@ -0,0 +1,87 @@
+"""Submit/complete throughput of AsyncPool at 10, 100 and 1000 workers,
+and peak memory of the collector with and without done_capacity.
+Run with `pytest tests/local_tests/benchmark_coroutinue.py -s`."""
+
+import asyncio
+import time
+import tracemalloc
+
+import pytest
+
+from secretscraper.coroutinue import AsyncPool, AsyncPoolCollector, AsyncTask
+
+NUM_TASKS = 20_000
+
+
+async def noop(i: int) -> int:
+    await asyncio.sleep(0)
+    return i
+
+
+class TestAsyncPoolThroughput:
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("num_workers", [10, 100, 1000])
+    async def test_async_pool_throughput(self, num_workers: int):
+        pool = AsyncPool(num_workers=num_workers, event_loop=asyncio.get_event_loop(), queue_capacity=0)
+        tasks = [AsyncTask(noop, i) for i in range(NUM_TASKS)]
+
+        start = time.perf_counter()
+        futures = await pool.submit_all(tasks)
+        await pool.wait_idle()
+        end = time.perf_counter()
+        await pool.shutdown(cancel_tasks=False)
+
+        assert all(future.done() for future in futures)
+        print(f"\n{num_workers} workers: {NUM_TASKS / (end - start):.0f} tasks/s")
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("num_workers", [10, 100, 1000])
+    async def test_async_pool_is_finish_polling(self, num_workers: int):
+        """Cost of the idle check done while a crawl is running"""
+        collector = AsyncPoolCollector.create_pool(num_workers, 0, asyncio.get_event_loop(), cancel_tasks=False)
+        await asyncio.sleep(0)
+
+        start = time.perf_counter()
+        for _ in range(NUM_TASKS):
+            collector.is_finish
+            collector.running_tasks
+        end = time.perf_counter()
+        await collector.close()
+
+        print(f"\n{num_workers} workers: {(end - start) / NUM_TASKS * 1e9:.0f} ns per is_finish + running_tasks")
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("num_tasks", [20_000, 200_000])
+    @pytest.mark.parametrize("done_capacity", [0, 4096])
+    async def test_collector_peak_memory(self, num_tasks: int, done_capacity: int):
+        """Producer faster than the consumer, as a crawl with a large frontier"""
+        collector = AsyncPoolCollector.create_pool(
+            100, 1000 if done_capacity else 0, asyncio.get_event_loop(), cancel_tasks=False, done_capacity=done_capacity
+        )
+
+        async def produce():
+            for i in range(num_tasks):
+                await collector.submit(AsyncTask(noop, i))
+
+        async def consume():
+            done = 0
+            async for future in collector.iter():
+                future.result()
+                done += 1
+                if done == num_tasks:
+                    break
+
+        tracemalloc.start()
+        try:
+            start = time.perf_counter()
+            await asyncio.gather(produce(), consume())
+            end = time.perf_counter()
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+        await collector.close()
+        print(
+            f"\ndone_capacity {done_capacity}, {num_tasks} tasks: peak {peak / 2 ** 20:.1f} MB, "
+            f"{num_tasks / (end - start):.0f} tasks/s"
+        )
@@ -0,0 +1,85 @@
+"""Crawl throughput (pages/sec) against a generated site served by the local test server.
+Run with `pytest tests/local_tests/benchmark_crawler.py`."""
+
+import pathlib
+import tempfile
+import time
+import typing
+
+import pytest
+
+from secretscraper.crawler import Crawler
+from secretscraper.filter import ChainedURLFilter, DomainBlackListURLFilter
+from secretscraper.handler import ReRegexHandler
+from secretscraper.urlparser import URLParser
+from secretscraper.util import start_local_test_http_server
+
+FAN_OUT = 6
+DEPTH = 3
+
+
+def generate_site(root: pathlib.Path, fan_out: int = FAN_OUT, depth: int = DEPTH) -> int:
+    """Generate a tree of html pages, return the number of pages"""
+    pages = 0
+
+    def write_page(name: str, level: int):
+        nonlocal pages
+        pages += 1
+        children = [f"{name}_{i}" for i in range(fan_out)] if level < depth else []
+        links = "".join(f'<a href="/{child}.html">{child}</a>' for child in children)
+        (root / f"{name}.html").write_text(
+            f"<html><head><title>{name}</title></head><body>{links}</body></html>"
+        )
+        for child in children:
+            write_page(child, level + 1)
+
+    write_page("index", 0)
+    return pages
+
+
+@pytest.fixture(scope="module")
+def site_base_url() -> typing.Generator[typing.Tuple[str, int], None, None]:
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        pages = generate_site(pathlib.Path(tmp_dir))
+        thread, httpd = start_local_test_http_server("127.0.0.1", 0, pathlib.Path(tmp_dir))
+        assert httpd is not None
+        try:
+            yield f"http://127.0.0.1:{httpd.server_address[1]}/index.html", pages
+        finally:
+            httpd.shutdown()
+            httpd.server_close()
+            thread.join(timeout=1)
+
+
+def crawl(start_url: str, regex_dict: typing.Dict[str, str], min_workers: int = 0) -> typing.Tuple[int, float]:
+    crawler = Crawler(
+        start_urls=[start_url],
+        url_filter=ChainedURLFilter([DomainBlackListURLFilter(set())]),
+        parser=URLParser(),
+        handler=ReRegexHandler(rules=regex_dict),
+        max_page_num=0,
+        max_depth=DEPTH,
+        num_workers=100,
+        min_workers=min_workers,
+        autoscale_interval=0.05,
+        max_concurrent_per_domain=20,
+        min_request_interval=0,
+    )
+    start = time.perf_counter()
+    crawler.start()
+    return crawler.total_page, time.perf_counter() - start
+
+
+@pytest.mark.parametrize("min_workers", [0, 4], ids=["fixed", "autoscale"])
+def test_crawler_pages_per_second(site_base_url, regex_dict, benchmark, min_workers):
+    start_url, pages = site_base_url
+    results = []
+
+    def run():
+        results.append(crawl(start_url, regex_dict, min_workers))
+
+    benchmark.pedantic(run, rounds=5, iterations=1)
+    for total_page, elapsed in results:
+        assert total_page == pages
+    benchmark.extra_info["pages"] = pages
+    benchmark.extra_info["pages_per_sec"] = pages / min(elapsed for _, elapsed in results)
@@ -0,0 +1,52 @@
+"""Memory and speed of the visited url index at one and ten million urls.
+Run with `pytest tests/local_tests/benchmark_dedup.py -s`, the 10M cases take a few minutes."""
+
+import time
+import tracemalloc
+from urllib.parse import urlparse
+
+import pytest
+
+from secretscraper.dedup import BloomFilter, FingerprintSet
+from secretscraper.entity import URLNode
+
+
+def url(i: int) -> str:
+    return f"https://host{i % 1000}.example.com/path/{i}/page.html?id={i}"
+
+
+@pytest.mark.parametrize("num", [1_000_000, 10_000_000])
+@pytest.mark.parametrize(
+    "name,factory",
+    [
+        ("exact64", lambda num: FingerprintSet(bits=64)),
+        ("exact128", lambda num: FingerprintSet(bits=128)),
+        ("bloom", lambda num: BloomFilter(capacity=num, error_rate=1e-4)),
+    ],
+)
+def test_index_memory(name, factory, num):
+    index = factory(num)
+    start = time.perf_counter()
+    for i in range(num):
+        index.add(urlparse(url(i)))
+    elapsed = time.perf_counter() - start
+    print(
+        f"\n{name} {num} urls: {index.nbytes / 2 ** 20:.1f} MB, {index.nbytes / num:.1f} bytes/url, "
+        f"{elapsed / num * 1e6:.1f} us/url including urlparse"
+    )
+    assert len(index) >= num * 0.999
+
+
+def test_node_set_memory():
+    """A set of url nodes, the previous visited index, also keeps the nodes alive"""
+    num = 1_000_000
+    tracemalloc.start()
+    try:
+        visited = set()
+        for i in range(num):
+            u = url(i)
+            visited.add(URLNode(url=u, url_object=urlparse(u)))
+        memory = tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
+    print(f"\nset of URLNode {num} urls: {memory / 2 ** 20:.1f} MB, {memory / num:.1f} bytes/url")
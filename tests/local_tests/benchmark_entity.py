@@ -0,0 +1,66 @@
+"""Memory, allocations and construction time of url nodes, compared with the former dataclass layout.
+Run with `pytest tests/local_tests/benchmark_entity.py -s`."""
+
+import time
+import tracemalloc
+import typing
+from dataclasses import dataclass, field
+from urllib.parse import ParseResult, urlparse
+
+import pytest
+
+from secretscraper.entity import URLNode
+
+NUM = 200_000
+
+
+@dataclass(unsafe_hash=True, eq=True)
+class DataclassURLNode:
+    """URLNode before it was slotted"""
+
+    url: str = field(hash=False, compare=False)
+    url_object: ParseResult = field(hash=True, compare=True)
+    response_status: str = field(default="Unknown", hash=False, compare=False)
+    depth: int = field(default=0, hash=False, compare=False)
+    parent: typing.Optional["DataclassURLNode"] = field(default=None, hash=False, compare=False)
+    content_length: int = field(hash=False, compare=False, default=-1)
+    content_type: str = field(hash=False, compare=False, default="")
+    title: str = field(hash=False, compare=False, default="")
+
+    def __post_init__(self):
+        if self.parent is not None and self.depth <= self.parent.depth:
+            raise ValueError("depth must be greater than that of parent")
+
+
+def build(node_type, num: int) -> list:
+    """A crawl-like tree: 100 pages at depth 1, each with num / 100 children"""
+    root = node_type(url="https://example.com/", url_object=urlparse("https://example.com/"), depth=0)
+    nodes = list()
+    for i in range(num):
+        if i % (num // 100) == 0:
+            page_url = f"https://example.com/page/{i}"
+            page = node_type(url=page_url, url_object=urlparse(page_url), depth=1, parent=root)
+            nodes.append(page)
+        url = f"https://example.com/item/{i}?ref=page{i % 100}"
+        nodes.append(node_type(url=url, url_object=urlparse(url), depth=2, parent=page))
+    return nodes
+
+
+@pytest.mark.parametrize("node_type", [DataclassURLNode, URLNode], ids=["dataclass", "slotted"])
+def test_url_node_memory(node_type):
+    tracemalloc.start()
+    try:
+        nodes = build(node_type, NUM)
+        current = tracemalloc.get_traced_memory()[0]
+        allocations = sum(stat.count for stat in tracemalloc.take_snapshot().statistics("filename"))
+    finally:
+        tracemalloc.stop()
+    del nodes
+
+    start = time.perf_counter()
+    build(node_type, NUM)
+    elapsed = time.perf_counter() - start
+    print(
+        f"\n{node_type.__name__}: {current / NUM:.1f} bytes/node, {allocations / NUM:.1f} live blocks/node, "
+        f"{elapsed / NUM * 1e6:.2f} us/node"
+    )
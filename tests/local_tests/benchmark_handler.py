@@ -1,5 +1,9 @@
+import pytest
+
 from secretscraper.handler import HyperscanRegexHandler, ReRegexHandler
 
+from .. import settings
+
 
 def test_re_regex_handler_benchmark(regex_dict, resource_text, benchmark):
     handler = ReRegexHandler(rules=regex_dict)
@@ -9,3 +13,23 @@ def test_re_regex_handler_benchmark(regex_dict, resource_text, benchmark):
 def test_hyper_regex_handler_benchmark(regex_dict, resource_text, benchmark):
     handler = HyperscanRegexHandler(rules=regex_dict, lazy_init=False)
     benchmark(handler.handle, resource_text)
+
+
+@pytest.mark.parametrize("source", ["str", "bytes"])
+def test_hyper_regex_handler_source_benchmark(regex_dict, html_text, benchmark, source):
+    handler = HyperscanRegexHandler(rules=regex_dict, lazy_init=False)
+    benchmark(handler.handle, html_text if source == "str" else html_text.encode("utf-8"))
+
+
+@pytest.mark.parametrize("rules", ["secrets", "urls"])
+@pytest.mark.parametrize("text", ["source_text", "hackernews"])
+@pytest.mark.parametrize(
+    "combined,prefilter", [(False, False), (True, False), (True, True)], ids=["per_rule", "combined", "prefilter"]
+)
+def test_re_regex_handler_combined_benchmark(
+    regex_dict, resource_text, html_text, benchmark, rules, text, combined, prefilter
+):
+    if rules == "urls":
+        regex_dict = {f"url_{i}": rule for i, rule in enumerate(settings.get("urlFind") + settings.get("jsFind"))}
+    handler = ReRegexHandler(rules=regex_dict, use_groups=True, combined=combined, prefilter=prefilter)
+    benchmark(handler.handle, resource_text if text == "source_text" else html_text)
@@ -0,0 +1,58 @@
+"""Push and pop cost of each scheduling policy at one million url nodes,
+and memory of a frontier spilling to disk.
+Run with `pytest tests/local_tests/benchmark_scheduler.py -s`."""
+
+import time
+import tracemalloc
+from urllib.parse import urlparse
+
+import pytest
+
+from secretscraper.entity import URLNode
+from secretscraper.scheduler import SCHEDULER_POLICIES, create_scheduler
+
+NUM = 1_000_000
+
+
+@pytest.mark.parametrize("policy", SCHEDULER_POLICIES)
+def test_scheduler_push_pop(policy: str):
+    nodes = []
+    for i in range(NUM):
+        url = f"https://host{i % 1000}.example.com/path/{i}.{'js' if i % 10 == 0 else 'html'}"
+        nodes.append(URLNode(url=url, url_object=urlparse(url), depth=i % 4))
+    scheduler = create_scheduler(policy, is_js=lambda url_node: url_node.path.endswith(".js"))
+
+    start = time.perf_counter()
+    for url_node in nodes:
+        scheduler.push(url_node)
+    pushed = time.perf_counter()
+    while len(scheduler):
+        scheduler.pop()
+    end = time.perf_counter()
+    print(
+        f"\n{policy} {NUM} urls: push {(pushed - start) / NUM * 1e6:.2f} us, pop {(end - pushed) / NUM * 1e6:.2f} us"
+    )
+
+
+@pytest.mark.parametrize("max_in_memory", [0, 10_000])
+def test_spilling_frontier_memory(max_in_memory: int):
+    """Nodes only held by the frontier, as once results are not kept in memory"""
+    scheduler = create_scheduler("bfs", max_in_memory=max_in_memory)
+    tracemalloc.start()
+    try:
+        start = time.perf_counter()
+        for i in range(NUM):
+            url = f"https://host{i % 1000}.example.com/path/{i}.html"
+            scheduler.push(URLNode(url=url, url_object=urlparse(url), depth=i % 4))
+        pushed = time.perf_counter()
+        memory = tracemalloc.get_traced_memory()[0]
+        while len(scheduler):
+            scheduler.pop()
+        end = time.perf_counter()
+    finally:
+        tracemalloc.stop()
+        scheduler.close()
+    print(
+        f"\nmax_in_memory {max_in_memory}, {NUM} urls: {memory / 2 ** 20:.1f} MB, "
+        f"push {(pushed - start) / NUM * 1e6:.2f} us, pop {(end - pushed) / NUM * 1e6:.2f} us"
+    )
@@ -0,0 +1,81 @@
+"""Crawl throughput (pages/sec) of a sharded crawl against a generated site served on several hosts.
+Run with `pytest tests/local_tests/benchmark_sharding.py`, on a machine with at least as many cores as shards."""
+
+import pathlib
+import tempfile
+import time
+import typing
+
+import pytest
+
+from secretscraper.crawler import Crawler
+from secretscraper.filter import ChainedURLFilter, DomainBlackListURLFilter
+from secretscraper.handler import ReRegexHandler
+from secretscraper.sharding import ShardedCrawler
+from secretscraper.urlparser import URLParser
+from secretscraper.util import start_local_test_http_server
+
+HOSTS = ("127.0.0.2", "127.0.0.3", "127.0.0.4", "127.0.0.5")
+FAN_OUT = 6
+DEPTH = 3
+
+
+@pytest.fixture(scope="module")
+def site_urls() -> typing.Generator[typing.Tuple[typing.List[str], int], None, None]:
+    """The same tree of pages on each host, with a secret-like text on each page"""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        root = pathlib.Path(tmp_dir)
+        pages = 0
+
+        def write_page(name: str, level: int):
+            nonlocal pages
+            pages += 1
+            children = [f"{name}_{i}" for i in range(FAN_OUT)] if level < DEPTH else []
+            links = "".join(f'<a href="/{child}.html">{child}</a>' for child in children)
+            text = " ".join(f"user{i}@example.org 13812345678" for i in range(50))
+            (root / f"{name}.html").write_text(f"<html><body>{links}<p>{text}</p></body></html>")
+            for child in children:
+                write_page(child, level + 1)
+
+        write_page("index", 0)
+        servers = [start_local_test_http_server(host, 0, root) for host in HOSTS]
+        try:
+            yield [f"http://{host}:{httpd.server_address[1]}/index.html" for host, (_, httpd) in zip(HOSTS, servers)], pages * len(HOSTS)
+        finally:
+            for thread, httpd in servers:
+                httpd.shutdown()
+                httpd.server_close()
+                thread.join(timeout=1)
+
+
+def crawl(start_urls: typing.List[str], regex_dict: typing.Dict[str, str], shards: int) -> typing.Tuple[int, float]:
+    kwargs = dict(
+        start_urls=start_urls,
+        url_filter=ChainedURLFilter([DomainBlackListURLFilter(set())]),
+        parser=URLParser(),
+        handler=ReRegexHandler(rules=regex_dict),
+        max_page_num=0,
+        max_depth=DEPTH,
+        num_workers=50,
+        max_concurrent_per_domain=20,
+        min_request_interval=0,
+    )
+    crawler = ShardedCrawler(num_shards=shards, **kwargs) if shards > 1 else Crawler(**kwargs)
+    start = time.perf_counter()
+    crawler.start()
+    return crawler.total_page, time.perf_counter() - start
+
+
+@pytest.mark.parametrize("shards", [1, 2, 4])
+def test_sharded_crawler_pages_per_second(site_urls, regex_dict, benchmark, shards):
+    start_urls, pages = site_urls
+    results = []
+
+    def run():
+        results.append(crawl(start_urls, regex_dict, shards))
+
+    benchmark.pedantic(run, rounds=3, iterations=1)
+    for total_page, elapsed in results:
+        assert total_page == pages
+    benchmark.extra_info["pages"] = pages
+    benchmark.extra_info["pages_per_sec"] = pages / min(elapsed for _, elapsed in results)
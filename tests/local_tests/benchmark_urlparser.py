@@ -0,0 +1,44 @@
+"""Compare the streaming and the BeautifulSoup link extraction engines on a multi-megabyte page.
+Run with `pytest tests/local_tests/benchmark_urlparser.py`."""
+
+import tracemalloc
+from urllib.parse import urlparse
+
+import pytest
+
+from secretscraper.document import Document
+from secretscraper.entity import URLNode
+from secretscraper.urlparser import URLParser
+
+COPIES = 3  # ~4MB of html
+
+
+@pytest.fixture
+def big_html_text(html_text) -> str:
+    return html_text * COPIES
+
+
+@pytest.fixture
+def base_url() -> URLNode:
+    return URLNode(url="https://news.ycombinator.com/", url_object=urlparse("https://news.ycombinator.com/"))
+
+
+def extract(engine: str, base_url: URLNode, text: str):
+    return URLParser(engine=engine).extract_urls(base_url, Document(text=text))
+
+
+def peak_memory(engine: str, base_url: URLNode, text: str) -> int:
+    tracemalloc.start()
+    try:
+        extract(engine, base_url, text)
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+@pytest.mark.parametrize("engine", ["stream", "bs4"])
+def test_urlparser_engine_benchmark(engine, base_url, big_html_text, benchmark):
+    benchmark.extra_info["html_bytes"] = len(big_html_text)
+    benchmark.extra_info["peak_memory_bytes"] = peak_memory(engine, base_url, big_html_text)
+    urls = benchmark(extract, engine, base_url, big_html_text)
+    assert urls == extract("bs4", base_url, big_html_text)
@@ -69,14 +69,14 @@ def test_crawler_scrapeme(regex_dict):
     )
     formatter = Formatter()
     crawler.start()
-    for url in crawler.visited_urls:
+    for url in crawler.url_secrets:
         assert max_depth <= 0 or url.depth <= max_depth
         assert urlfilter.doFilter(url.url_object) is True
     if max_page_num > 0:
         assert crawler.total_page <= max_page_num
     logger.info(f"Total page: {crawler.total_page}")
     logger.info(
-        f"found urls: {formatter.output_found_domains(list(crawler.found_urls))}"
+        f"found urls: {formatter.output_found_domains(crawler.found_nodes())}"
     )
     logger.info(f"Hierarchy: {formatter.output_url_hierarchy(crawler.url_dict)}")
     logger.info(f"Secrets: {formatter.output_secrets(crawler.url_secrets)}")
@@ -120,14 +120,14 @@ def test_crawler_local(regex_dict, start_urls):
     )
     formatter = Formatter()
     crawler.start()
-    for url in crawler.visited_urls:
+    for url in crawler.url_secrets:
         assert max_depth <= 0 or url.depth <= max_depth
         assert urlfilter.doFilter(url.url_object) is True
     if max_page_num > 0:
         assert crawler.total_page <= max_page_num
     logger.info(f"Total page: {crawler.total_page}")
     logger.info(
-        f"found urls: {formatter.output_found_domains(list(crawler.found_urls))}"
+        f"found urls: {formatter.output_found_domains(crawler.found_nodes())}"
     )
     # visited_urls_str = "\n".join(str(url) for url in crawler.visited_urls)
     # logger.info(f"visited_urls: {visited_urls_str}")
@@ -0,0 +1,127 @@
+import time
+
+import httpx
+import pytest
+
+from secretscraper.cache import CachedResponse, DiskCache, ResponseCache
+
+
+def response(body: bytes, status: int = 200) -> httpx.Response:
+    return httpx.Response(
+        status,
+        headers={"Content-Type": "text/html; charset=utf-8", "Content-Length": str(len(body)), "Server": "x"},
+        content=body,
+    )
+
+
+def test_cached_response_keeps_used_parts():
+    cached = CachedResponse.from_response(response("标题".encode("utf8"), 404))
+
+    assert cached.status_code == 404
+    assert cached.headers == {"content-type": "text/html; charset=utf-8", "content-length": "6"}
+    assert cached.headers.get("content-type") == "text/html; charset=utf-8"
+    assert cached.encoding == "utf-8"
+    assert cached.text == "标题"
+
+
+def test_response_cache_hit_and_miss():
+    cache = ResponseCache(max_bytes=2 ** 20, ttl=60)
+
+    assert cache.get("http://a/") is None
+    cached = cache.set("http://a/", response(b"a"))
+    assert cache.get("http://a/") is cached
+    assert cache.stats.hits == 1 and cache.stats.misses == 1 and cache.stats.entries == 1
+
+
+def test_response_cache_evicts_lru_by_bytes():
+    body = b"x" * 1000
+    entry_size = CachedResponse(200, {}, body).nbytes
+    cache = ResponseCache(max_bytes=entry_size * 2, ttl=0)
+    cache.set("a", CachedResponse(200, {}, body))
+    cache.set("b", CachedResponse(200, {}, body))
+    cache.get("a")
+    cache.set("c", CachedResponse(200, {}, body))
+
+    assert "a" in cache and "c" in cache and "b" not in cache
+    assert cache.nbytes == entry_size * 2
+    assert cache.stats.evictions == 1
+
+    too_big = CachedResponse(200, {}, body * 3)
+    assert cache.set("d", too_big) is too_big
+    assert "d" not in cache and len(cache) == 2
+
+
+def test_response_cache_ttl():
+    cache = ResponseCache(max_bytes=2 ** 20, ttl=0.01)
+    cache.set("a", response(b"a"))
+    time.sleep(0.02)
+
+    assert cache.get("a") is None
+    assert cache.stats.expirations == 1
+    assert cache.nbytes == 0
+
+
+def test_response_cache_disabled():
+    cache = ResponseCache(max_bytes=0)
+    cache.set("a", response(b"a"))
+
+    assert len(cache) == 0
+    with pytest.raises(ValueError):
+        ResponseCache(ttl=-1)
+
+
+def revalidatable(body: bytes) -> CachedResponse:
+    return CachedResponse(200, {"content-type": "text/javascript", "etag": '"v1"'}, body, "utf-8")
+
+
+def test_disk_cache_persists_revalidatable_responses(tmp_path):
+    path = tmp_path / "cache.sqlite3"
+    cache = DiskCache(path)
+    cache.set("a", revalidatable(b"a"))
+    cache.set("b", CachedResponse(200, {"content-type": "text/html"}, b"b"))  # no validator
+    cache.set("c", CachedResponse(404, {"etag": '"v1"'}, b"c"))
+    cache.close()
+
+    cache = DiskCache(path)
+    stored = cache.get("a")
+    assert stored.content == b"a"
+    assert stored.headers["content-type"] == "text/javascript"
+    assert stored.validators() == {"If-None-Match": '"v1"'}
+    assert cache.validators("a") == {"If-None-Match": '"v1"'}
+    assert cache.validators("b") is None and cache.validators("c") is None
+    assert cache.revalidate("a").content == b"a"
+    assert cache.revalidate("b") is None
+    assert cache.revalidate("a", {"etag": '"v2"', "last-modified": "Sat, 17 Oct 2026 00:00:00 GMT"}).content == b"a"
+    assert cache.validators("a") == {"If-None-Match": '"v2"', "If-Modified-Since": "Sat, 17 Oct 2026 00:00:00 GMT"}
+    assert cache.stats.revalidated == 2 and cache.stats.misses == 2 and cache.stats.entries == 1
+    assert cache.nbytes == stored.nbytes
+    cache.close()
+
+
+def test_disk_cache_evicts_lru_by_bytes(tmp_path):
+    body = b"x" * 1000
+    cache = DiskCache(tmp_path / "cache.sqlite3", max_bytes=revalidatable(body).nbytes * 2)
+    cache.set("a", revalidatable(body))
+    cache.set("b", revalidatable(body))
+    cache.revalidate("a")
+    cache.set("c", revalidatable(body))
+
+    assert cache.get("b") is None
+    assert cache.get("a") is not None and cache.get("c") is not None
+    assert cache.stats.evictions == 1 and cache.stats.entries == 2
+    cache.close()
+
+
+def test_disk_cache_budget_holds_for_a_shared_file(tmp_path):
+    body = b"x" * 1000
+    path = tmp_path / "cache.sqlite3"
+    first = DiskCache(path, max_bytes=revalidatable(body).nbytes * 2)
+    second = DiskCache(path, max_bytes=revalidatable(body).nbytes * 2)
+    first.set("a", revalidatable(body))
+    second.set("b", revalidatable(body))
+    first.set("c", revalidatable(body))
+
+    assert len(first) == 2 and first.get("a") is None
+    assert first.nbytes == revalidatable(body).nbytes * 2
+    first.close()
+    second.close()
@@ -0,0 +1,86 @@
+import pathlib
+import pickle
+import typing
+from urllib.parse import urlparse
+
+import pytest
+
+from secretscraper.checkpoint import Checkpoint, build_results, secret_row
+from secretscraper.crawler import Crawler
+from secretscraper.entity import Secret, URLNode
+
+
+def node(url: str, depth: int = 0, parent: URLNode = None) -> URLNode:
+    return URLNode(url=url, url_object=urlparse(url), depth=depth, parent=parent)
+
+
+def test_checkpoint_round_trip(tmp_path):
+    path = tmp_path / "crawl.sqlite3"
+    checkpoint = Checkpoint(path)
+    root = node("http://a.com/")
+    page = node("http://a.com/page", 1, root)
+    script = node("http://a.com/app.js", 1, root)
+    other = node("http://b.com/", 1, root)
+    checkpoint.queued(root)
+    checkpoint.write(checkpoint.take())
+    checkpoint.queued(page)
+    root.response_status, root.title = "200", "Home"
+    checkpoint.done(root, {page, other}, {script}, {Secret("Email", "a@a.com"), Secret("Tuple", ("x", 1))})
+    assert checkpoint.pending == 2
+    checkpoint.write(checkpoint.take())
+    checkpoint.close()
+
+    state = Checkpoint(path, resume=True).load()
+    assert [n.url for n in state.visited] == ["http://a.com/", "http://a.com/page"]
+    assert [n.url for n in state.queued] == ["http://a.com/page"]
+    (restored_root, children), = state.url_dict.items()
+    assert (restored_root.url, restored_root.response_status, restored_root.title) == ("http://a.com/", "200", "Home")
+    assert {child.url for child in children} == {"http://a.com/page", "http://b.com/"}
+    assert all(child.parent is restored_root and child.depth == 1 for child in children)
+    assert {child.url for child in state.js_dict[restored_root]} == {"http://a.com/app.js"}
+    assert state.url_secrets[restored_root] == {Secret("Email", "a@a.com"), Secret("Tuple", ("x", 1))}
+
+    assert Checkpoint(path).load().visited == []  # a new crawl clears the file
+
+
+def test_secret_data_is_not_unpickled():
+    rows = [("http://a.com/", 0, None, 2, "200", -1, "", "")]
+    secrets = [
+        secret_row("http://a.com/", Secret("Groups", ("x", None, 1))),
+        ("http://a.com/", "Pickled", pickle.dumps(Secret("Evil", "x"))),
+    ]
+    (_, url_secrets), = build_results(rows, [], secrets)[3].items()
+
+    assert Secret("Groups", ("x", None, 1)) in url_secrets
+    assert not any(isinstance(secret.data, Secret) for secret in url_secrets)
+
+
+def crawl(
+    crawler_kwargs: typing.Callable[..., dict], start_url: str, checkpoint: pathlib.Path = None, **kwargs
+) -> Crawler:
+    crawler = Crawler(**crawler_kwargs(start_url, checkpoint=str(checkpoint or ""), **kwargs))
+    crawler.start()
+    if crawler.checkpoint is not None:
+        crawler.checkpoint.close()
+    return crawler
+
+
+def test_interrupted_crawl_resumes_from_checkpoint(site_url, crawler_kwargs, crawl_results, tmp_path):
+    path = tmp_path / "crawl.sqlite3"
+    full = crawl(crawler_kwargs, site_url)
+    assert full.total_page == 13
+
+    first = crawl(crawler_kwargs, site_url, path, max_page_num=4)
+    assert 0 < len(first.url_secrets) < 13
+    resumed = crawl(crawler_kwargs, site_url, path, resume=True)
+
+    assert resumed.total_page == 13
+    assert crawl_results(resumed) == crawl_results(full)
+
+
+def test_resumed_crawl_does_not_count_evaded_pages(site_url, crawler_kwargs, tmp_path):
+    path = tmp_path / "crawl.sqlite3"
+    full = crawl(crawler_kwargs, site_url, path, dangerous_paths=["index_1"])
+    resumed = crawl(crawler_kwargs, site_url, path, resume=True, dangerous_paths=["index_1"])
+
+    assert full.total_page == resumed.total_page == 9
@@ -11,7 +11,7 @@ import aiohttp
 import pytest
 
 from secretscraper.coroutinue import (AsyncPool, AsyncPoolCollector, AsyncTask,
-                                      AsyncWorker)
+                                      AsyncWorker, AutoScaler)
 from secretscraper.util import start_local_test_http_server
 
 logger = logging.getLogger(__name__)
@@ -210,6 +210,69 @@ class TestCoroutineAsyncPool:
         assert any(not future.done() for future in futures)
         assert end - start < 1
 
+    @pytest.mark.asyncio
+    async def test_coroutine_async_pool_wait_idle(self):
+        await self.get_pool()
+        assert self.pool.is_finish is True
+
+        futures = await self.pool.submit_all(next(generate_task(200, 0.1)))
+        assert self.pool.is_finish is False
+        assert self.pool.unfinished == 200
+        await asyncio.sleep(0)
+        assert self.pool.running == 100
+
+        start = time.perf_counter()
+        await asyncio.wait_for(self.pool.wait_idle(), 1)
+        assert time.perf_counter() - start < 0.5
+        assert self.pool.is_finish is True
+        assert self.pool.running == 0
+        assert all(future.done() for future in futures)
+        await self.pool.shutdown(cancel_tasks=False)
+
+
+class TestCoroutineAutoScaler:
+
+    @pytest.mark.asyncio
+    async def test_autoscaler_grows_with_backlog_and_shrinks_when_idle(self):
+        pool = AsyncPool(2, asyncio.get_event_loop(), 0)
+        sizes = []
+        scaler = AutoScaler(pool, min_workers=2, max_workers=8, interval=0.01, on_scale=lambda _, n: sizes.append(n))
+        futures = await pool.submit_all(next(generate_task(100, 0.05)))
+        await asyncio.sleep(0)
+        assert scaler.scale() == 3
+        scaler.start()
+        await asyncio.wait_for(pool.wait_idle(), 2)
+        await asyncio.sleep(0.2)
+        scaler.stop()
+
+        assert max(sizes) == 8
+        assert len(pool.workers) == pool.num_workers == 2
+        assert all(future.result() == i + 1 for i, future in enumerate(futures))
+        await pool.shutdown(cancel_tasks=False)
+
+    @pytest.mark.asyncio
+    async def test_autoscaler_holds_when_bound_by_rate_limiter(self):
+        pool = AsyncPool(2, asyncio.get_event_loop(), 0)
+        scaler = AutoScaler(pool, 2, 8, latency=lambda: 0.1, limiter_wait=lambda: 1.0)
+        await pool.submit_all(next(generate_task(10, 0.05)))
+        await asyncio.sleep(0)
+        assert scaler.scale() == 2
+        scaler.limiter_wait = lambda: 0.01
+        assert scaler.scale() == 3
+        await pool.shutdown(cancel_queue=True, cancel_tasks=False)
+
+    @pytest.mark.asyncio
+    async def test_retired_worker_leaves_tasks_in_queue(self):
+        pool = AsyncPool(4, asyncio.get_event_loop(), 0)
+        await asyncio.sleep(0)  # workers wait on the empty queue
+        future = await pool.submit(AsyncTask(async_increment, 1, 0))
+        assert pool.retire_workers(3) == 3
+        assert await asyncio.wait_for(future, 1) == 2
+        assert pool.num_workers == 1
+        with pytest.raises(ValueError):
+            AutoScaler(pool, 0, 8)
+        await pool.shutdown(cancel_tasks=False)
+
 
 class TestCoroutineAsyncPoolCollector:
 
@@ -302,3 +365,38 @@ class TestCoroutineAsyncPoolCollector:
             assert pool.running_tasks == 0
             end = time.perf_counter()
             assert end - start <= 0.7
+
+    @pytest.mark.asyncio
+    async def test_coroutine_async_pool_collector_backpressure(self):
+        """Submit waits while done_capacity tasks are not collected"""
+        async with AsyncPoolCollector.create_pool(
+            10, 0, asyncio.get_event_loop(), cancel_tasks=False, done_capacity=5
+        ) as pool:
+            await pool.submit_all(next(generate_task(5, 0)))
+            blocked = asyncio.ensure_future(pool.submit(AsyncTask(async_increment, 5, 0)))
+            await asyncio.sleep(0.05)
+            assert not blocked.done()
+            assert pool.done_queue.qsize() == 5
+
+            results = []
+            async for future in pool.iter():
+                results.append(future.result())
+                if len(results) == 6:
+                    break
+            assert blocked.done()
+            assert sorted(results) == [1, 2, 3, 4, 5, 6]
+
+    @pytest.mark.asyncio
+    async def test_coroutine_async_pool_collector_fire_and_forget(self, caplog):
+        async def fail():
+            raise ValueError("boom")
+
+        async with AsyncPoolCollector.create_pool(
+            10, 0, asyncio.get_event_loop(), cancel_tasks=False, done_capacity=2
+        ) as pool:
+            for _ in range(3):
+                await pool.submit(AsyncTask(fail), collect=False)
+            await asyncio.wait_for(pool.wait_idle(), 1)
+            await asyncio.sleep(0)
+            assert pool.done_queue.empty()
+            assert caplog.text.count("Uncollected task failed") == 3
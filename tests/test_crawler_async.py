@@ -0,0 +1,78 @@
+import asyncio
+
+import pytest
+
+from secretscraper.crawler import Crawler
+from secretscraper.exception import CrawlerException
+
+
+@pytest.mark.asyncio
+async def test_crawl_on_running_loop_beside_other_tasks(site_url, crawler_kwargs):
+    ticks = 0
+
+    async def host_task():
+        nonlocal ticks
+        while True:
+            ticks += 1
+            await asyncio.sleep(0.001)
+
+    host = asyncio.create_task(host_task())
+    first, second = Crawler(**crawler_kwargs(site_url)), Crawler(**crawler_kwargs(site_url, validate=True))
+    async with first, second:
+        await asyncio.gather(first.crawl(), second.crawl())
+
+    assert first.total_page == second.total_page == 13
+    assert len(first.url_secrets) == len(second.url_secrets) == 13
+    assert all(url_node.response_status == "200" for url_node in second.url_dict)
+    assert first._loop is second._loop is asyncio.get_running_loop()
+    assert not host.done() and ticks > 0
+    host.cancel()
+
+
+@pytest.mark.asyncio
+async def test_iter_results_yields_each_page(site_url, crawler_kwargs):
+    async with Crawler(**crawler_kwargs(site_url)) as crawler:
+        results = [result async for result in crawler.iter_results()]
+
+    assert len(results) == 13
+    found = {child.url for children in crawler.url_dict.values() for child in children}
+    assert {result.url_node.url for result in results} == found | {site_url}
+    index = next(result for result in results if result.url_node.depth == 0)
+    assert len(index.url_children) == 3
+    assert {secret.data for secret in index.secrets} == {"key_index"}
+
+
+@pytest.mark.asyncio
+async def test_iter_results_stops_crawl_when_left_early(site_url, crawler_kwargs):
+    async with Crawler(**crawler_kwargs(site_url)) as crawler:
+        async for result in crawler.iter_results():
+            break
+    assert result.url_node.url == site_url
+    assert crawler.total_page < 13
+    assert crawler._crawl_task is None
+
+
+@pytest.mark.asyncio
+async def test_clean_runs_once(site_url, crawler_kwargs):
+    closes = 0
+    async with Crawler(**crawler_kwargs(site_url)) as crawler:
+        close = crawler.pool.close
+
+        async def counted_close():
+            nonlocal closes
+            closes += 1
+            await close()
+
+        crawler.pool.close = counted_close
+        await crawler.crawl()  # cleans up when the crawl ends
+    await crawler.clean()
+
+    assert closes == 1 and crawler.close.is_set()
+
+
+def test_crawler_bound_to_one_loop(site_url, crawler_kwargs):
+    crawler = Crawler(**crawler_kwargs(site_url))
+    crawler.start()
+    assert crawler.total_page == 13
+    with pytest.raises(CrawlerException):
+        asyncio.run(crawler.crawl())
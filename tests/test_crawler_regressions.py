@@ -1,3 +1,4 @@
+import asyncio
 import queue
 from types import SimpleNamespace
 from urllib.parse import urlparse
@@ -75,6 +76,7 @@ async def test_extract_links_records_shared_children_for_each_parent(local_http_
     crawler.found_urls = set()
     crawler.filter = AcceptAllFilter()
     crawler.working_queue = queue.Queue()
+    crawler.checkpoint = None
     crawler.url_dict = {}
     crawler.js_dict = {}
 
@@ -116,3 +118,82 @@ def test_is_extend_only_allows_text_like_content(content_type: str, expected: bo
     response = SimpleNamespace(headers={"content-type": content_type})
 
     assert Crawler.is_extend(crawler, response) is expected
+
+
+def test_fetch_serves_repeated_urls_from_response_cache(local_http_server_base_url: str):
+    crawler = Crawler(
+        start_urls=[local_http_server_base_url],
+        url_filter=AcceptAllFilter(),
+        parser=SingleChildParser(local_http_server_base_url),
+        handler=None,
+        min_request_interval=0,
+    )
+    fetch = lambda: crawler._event_loop.run_until_complete(crawler.fetch(f"{local_http_server_base_url}/"))
+    try:
+        first = fetch()
+        second = fetch()
+    finally:
+        crawler.close_all()
+
+    assert first.status_code == 200
+    assert second is first
+    assert crawler.cache.stats.hits == 1
+    assert crawler.cache.stats.misses == 1
+
+
+def test_fetch_coalesces_concurrent_requests_for_same_url(local_http_server_base_url: str):
+    crawler = Crawler(
+        start_urls=[local_http_server_base_url],
+        url_filter=AcceptAllFilter(),
+        parser=SingleChildParser(local_http_server_base_url),
+        handler=None,
+        min_request_interval=0,
+    )
+    calls = []
+    send = crawler._fetch
+
+    async def counting_fetch(url: str, key: str):
+        calls.append(url)
+        return await send(url, key)
+
+    crawler._fetch = counting_fetch
+    urls = [f"{local_http_server_base_url}/"] * 3 + [f"{local_http_server_base_url}/#top"]
+
+    async def fetch_all():
+        return await asyncio.gather(*(crawler.fetch(url) for url in urls))
+
+    try:
+        responses = crawler._event_loop.run_until_complete(fetch_all())
+    finally:
+        crawler.close_all()
+
+    assert len(calls) == 1
+    assert crawler.coalesced_requests == 3
+    assert all(response is responses[0] for response in responses)
+    assert responses[0].status_code == 200
+    assert crawler._in_flight == {}
+
+
+def test_fetch_revalidates_disk_cached_response_across_runs(local_http_server_base_url: str, tmp_path):
+    url = f"{local_http_server_base_url}/1.js"
+    responses = []
+    for _ in range(2):
+        crawler = Crawler(
+            start_urls=[local_http_server_base_url],
+            url_filter=AcceptAllFilter(),
+            parser=SingleChildParser(local_http_server_base_url),
+            handler=None,
+            min_request_interval=0,
+            disk_cache=str(tmp_path / "cache.sqlite3"),
+        )
+        try:
+            responses.append(crawler._event_loop.run_until_complete(crawler.fetch(url)))
+        finally:
+            crawler.close_all()
+            crawler.disk_cache.close()
+
+    first, second = responses
+    assert first.status_code == second.status_code == 200
+    assert "last-modified" in first.headers
+    assert second.content == first.content
+    assert crawler.disk_cache.revalidations == 1
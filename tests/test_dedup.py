@@ -0,0 +1,54 @@
+from urllib.parse import urlparse
+
+import pytest
+
+from secretscraper.dedup import BloomFilter, FingerprintSet, canonicalize_url, create_url_index, url_fingerprint
+from secretscraper.entity import URLNode
+
+
+def node(url: str, depth: int = 0) -> URLNode:
+    return URLNode(url=url, url_object=urlparse(url), depth=depth)
+
+
+def test_fingerprint_follows_url_node_equality():
+    assert url_fingerprint(node("http://a.com/x?q=1")) == url_fingerprint(node("http://a.com/x?q=1", depth=2))
+    assert url_fingerprint(node("http://a.com/x?q=1")) == url_fingerprint(urlparse("http://a.com/x?q=1"))
+    assert url_fingerprint(node("http://a.com/x?q=1")) != url_fingerprint(node("http://a.com/x?q=2"))
+    assert url_fingerprint(node("http://a.com/x"), bits=128).bit_length() > 64
+
+
+@pytest.mark.parametrize("bits", [64, 128])
+def test_fingerprint_set_is_exact(bits):
+    index = FingerprintSet(bits=bits, capacity=4)
+    urls = [node(f"http://a.com/{i}") for i in range(1000)]
+    for url in urls:
+        index.add(url)
+    index.add(node("http://a.com/0", depth=1))
+
+    assert len(index) == 1000
+    assert all(url in index for url in urls)
+    assert not any(node(f"http://b.com/{i}") in index for i in range(1000))
+
+
+def test_bloom_filter_error_rate():
+    capacity = 10_000
+    index = BloomFilter(capacity=capacity, error_rate=0.01)
+    for i in range(capacity):
+        index.add(node(f"http://a.com/{i}"))
+
+    assert all(node(f"http://a.com/{i}") in index for i in range(capacity))
+    false_positives = sum(node(f"http://b.com/{i}") in index for i in range(capacity))
+    assert false_positives < capacity * 0.02
+    assert len(index) > capacity * 0.98
+
+
+def test_create_url_index():
+    assert isinstance(create_url_index("exact"), FingerprintSet)
+    assert isinstance(create_url_index("bloom", capacity=100), BloomFilter)
+    with pytest.raises(ValueError):
+        create_url_index("set")
+
+
+def test_canonicalize_url():
+    assert canonicalize_url("http://A.com/Path?q=1#frag") == "http://a.com/Path?q=1"
+    assert canonicalize_url("http://User@A.com/") == "http://User@A.com/"
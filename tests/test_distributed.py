@@ -0,0 +1,132 @@
+import multiprocessing
+import os
+
+import pytest
+
+from secretscraper.checkpoint import CheckpointRows
+from secretscraper.crawler import Crawler
+from secretscraper.distributed import DistributedCrawler, DistributedWorker, InMemoryBroker, SQLiteBroker
+
+
+def empty_rows() -> CheckpointRows:
+    return CheckpointRows([], [], [], [], [])
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def broker(request, tmp_path):
+    broker = InMemoryBroker() if request.param == "memory" else SQLiteBroker(tmp_path / "broker.sqlite3")
+    yield broker
+    broker.close()
+
+
+def test_broker_leases(broker):
+    assert broker.add([("http://a.com/", 0), ("http://a.com/x", 1), ("http://a.com/", 0)]) == 2
+    first = broker.lease("w1", 1, ttl=60)
+    assert first.urls == [("http://a.com/", 0)]
+    second = broker.lease("w2", 5, ttl=60)
+    assert second.urls == [("http://a.com/x", 1)]
+    assert broker.lease("w3", 5, ttl=60) is None
+    assert not broker.is_finished()
+
+    assert broker.complete(first.id, [("http://a.com/x", 1), ("http://a.com/y", 1)], empty_rows())
+    assert not broker.complete(first.id, [], empty_rows())
+    assert broker.complete(second.id, [], empty_rows())
+    third = broker.lease("w1", 5, ttl=60)
+    assert third.urls == [("http://a.com/y", 1)]
+    assert broker.renew(third.id, ttl=60)
+    assert broker.complete(third.id, [], empty_rows())
+    assert broker.is_finished()
+
+
+def test_broker_releases_expired_leases(broker):
+    broker.add([("http://a.com/", 0)])
+    dead = broker.lease("dead", 5, ttl=0)
+    taken_over = broker.lease("alive", 5, ttl=60)
+    assert taken_over.urls == dead.urls
+    assert not broker.renew(dead.id, ttl=60)
+    assert not broker.complete(dead.id, [("http://a.com/late", 1)], empty_rows())
+    assert broker.complete(taken_over.id, [], empty_rows())
+    assert broker.is_finished()
+
+
+def test_distributed_crawl_matches_single_process(site_url, crawler_kwargs, crawl_results, tmp_path):
+    single = Crawler(**crawler_kwargs(site_url))
+    single.start()
+    broker = SQLiteBroker(tmp_path / "broker.sqlite3", clear=True)
+    distributed = DistributedCrawler(
+        broker, local_workers=3, batch_size=2, poll_interval=0.05, **crawler_kwargs(site_url)
+    )
+    distributed.start()
+    broker.close()
+
+    assert distributed.total_page == single.total_page == 13
+    assert crawl_results(distributed) == crawl_results(single)
+
+
+def lease_and_die(path):
+    broker = SQLiteBroker(path)
+    broker.lease("doomed", 100, ttl=1)
+    os._exit(1)
+
+
+def test_workers_take_over_leases_of_dead_worker(site_url, crawler_kwargs, tmp_path):
+    path = tmp_path / "broker.sqlite3"
+    broker = SQLiteBroker(path, clear=True)
+    coordinator = DistributedCrawler(broker, poll_interval=0.05, **crawler_kwargs(site_url))
+    coordinator.seed()
+    doomed = multiprocessing.get_context("fork").Process(target=lease_and_die, args=(path,))
+    doomed.start()
+    doomed.join()
+
+    worker = DistributedWorker(
+        broker.connect(), batch_size=2, lease_ttl=1, poll_interval=0.05, **crawler_kwargs(site_url)
+    )
+    worker.start()
+    worker.broker.close()
+    assert broker.is_finished()
+    coordinator.load()
+    coordinator.close_all()
+    broker.close()
+
+    assert coordinator.total_page == 13
+    assert len(coordinator.url_secrets) == 13
+
+
+def lease_in_child(broker, results):
+    inherited = broker._conn
+    lease = broker.lease("child", 1, ttl=60)
+    results.put((broker._conn is not inherited, lease.urls))
+    broker.complete(lease.id, [("http://a.com/child", 1)], empty_rows())
+    broker.close()
+
+
+def test_sqlite_broker_reconnects_after_fork(tmp_path):
+    broker = SQLiteBroker(tmp_path / "broker.sqlite3", clear=True)
+    broker.add([("http://a.com/", 0)])
+    inherited = broker._conn
+    context = multiprocessing.get_context("fork")
+    results = context.Queue()
+    child = context.Process(target=lease_in_child, args=(broker, results))
+    child.start()
+    child.join()
+
+    assert child.exitcode == 0
+    assert results.get(timeout=5) == (True, [("http://a.com/", 0)])
+    assert broker._conn is inherited
+    assert broker.lease("parent", 5, ttl=60).urls == [("http://a.com/child", 1)]
+    broker.close()
+
+
+def test_distributed_coordinator_forks_without_disk_cache(site_url, crawler_kwargs, tmp_path):
+    path = tmp_path / "cache.sqlite3"
+    broker = SQLiteBroker(tmp_path / "broker.sqlite3", clear=True)
+    distributed = DistributedCrawler(
+        broker, local_workers=2, poll_interval=0.05, **crawler_kwargs(site_url, disk_cache=str(path))
+    )
+    assert distributed.disk_cache is None
+    distributed.start()
+    broker.close()
+
+    assert distributed.total_page == 13
+    assert distributed.disk_cache.path == path and len(distributed.disk_cache) == 13
+    distributed.disk_cache.close()
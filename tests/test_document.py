@@ -0,0 +1,87 @@
+import pickle
+
+import pytest
+
+from secretscraper import document as document_module
+from secretscraper.document import Document, as_document
+
+
+def test_document_requires_source():
+    with pytest.raises(ValueError):
+        Document()
+
+
+def test_document_from_utf8_content_reuses_bytes():
+    content = "<title>标题</title>".encode("utf8")
+    document = Document(content=content, encoding="UTF-8")
+
+    assert document.text == "<title>标题</title>"
+    assert document.content is content
+    assert document.title == "标题"
+
+
+def test_document_folded():
+    assert Document(text="AbC").folded == "abc"
+    # letters that re.IGNORECASE matches with ASCII letters
+    assert Document(text="\u0130\u0131\u017f\u212a").folded == "iisk"
+
+
+def test_document_from_other_encoding_is_reencoded():
+    content = "<title>标题</title>".encode("gbk")
+    document = Document(content=content, encoding="gbk")
+
+    assert document.text == "<title>标题</title>"
+    assert document.content == "<title>标题</title>".encode("utf8")
+
+
+def test_document_parses_once(html_text):
+    document = as_document(html_text)
+
+    assert as_document(document) is document
+    assert document.title == "Hacker News"
+    soup = document.soup
+    assert len(document.links) > 0
+    assert document.soup is soup
+
+
+def test_document_pickles_source_only(html_text):
+    document = Document(text=html_text)
+    assert document.title == "Hacker News"
+
+    restored = pickle.loads(pickle.dumps(document))
+    assert "soup" not in restored.__dict__
+    assert restored.text == html_text
+    assert restored.links == document.links
+
+
+def test_document_links():
+    document = Document(
+        text="""
+        <a href="/a">a</a><a>no href</a>
+        <link href="/style"/>
+        <script src="/app.js"></script><script src="/app.json"></script>
+        """
+    )
+
+    assert document.links == {"/a", "/style", "/app.js"}
+
+
+def test_document_stream_title_matches_tree():
+    text = "<html><head><title>a &amp; <b>b</b>\n</head><body><title/><p>c</p></body></html>"
+    document = Document(text=text)
+    tree_document = Document(text=text)
+    tree_document.soup
+
+    assert document.title == tree_document.title == "a & b|"
+    assert "soup" not in document.__dict__
+
+
+def test_document_falls_back_to_tree(monkeypatch):
+    def reject(self, data):
+        raise AssertionError("rejected markup")
+
+    monkeypatch.setattr(document_module._StreamingLinkParser, "feed", reject)
+    document = Document(text='<title>t</title><a href="/a">a</a>')
+
+    assert document.links == {"/a"}
+    assert document.title == "t"
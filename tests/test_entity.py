@@ -1,3 +1,5 @@
+import gc
+import pickle
 from urllib.parse import urlparse
 
 import pytest
@@ -47,3 +49,42 @@ def test_urlnode():
             depth=0,
             parent=base_node,
         )
+
+
+def test_urlnode_is_compact():
+    base = URLNode(url="http://127.0.0.1/", url_object=urlparse("http://127.0.0.1/"))
+    node = URLNode(url="http://127.0.0.1/a?b=1", url_object=urlparse("http://127.0.0.1/a?b=1"), depth=1, parent=base)
+
+    assert not hasattr(node, "__dict__")
+    assert node._url is None  # rebuilt from url_object
+    assert node.url == "http://127.0.0.1/a?b=1"
+    assert node.url_object == urlparse("http://127.0.0.1/a?b=1")
+    assert node.netloc is base.netloc
+    assert URLNode(url="http://127.0.0.1/a#", url_object=urlparse("http://127.0.0.1/a#")).url == "http://127.0.0.1/a#"
+    assert URLNode(url="http://127.0.0.1/a").url_object == urlparse("http://127.0.0.1/a")
+
+
+def test_urlnode_keeps_its_parent():
+    base = URLNode(url="http://127.0.0.1/", url_object=urlparse("http://127.0.0.1/"))
+    node = URLNode(url="http://127.0.0.1/a", url_object=urlparse("http://127.0.0.1/a"), depth=1, parent=base)
+
+    assert node.parent is base
+    restored = pickle.loads(pickle.dumps([base, node]))
+    assert restored[1].parent is restored[0]
+    assert restored[1] == node and restored[1].depth == 1
+
+    del base, restored
+    gc.collect()
+    assert node.parent.url == "http://127.0.0.1/"
+
+
+def test_urlnode_pickles_parent_url_and_depth_only():
+    root = URLNode(url="http://127.0.0.1/root")
+    base = URLNode(url="http://127.0.0.1/base", depth=1, parent=root)
+    node = URLNode(url="http://127.0.0.1/node", depth=2, parent=base)
+
+    data = pickle.dumps(node)
+    assert b"/base" in data and b"/root" not in data
+    assert node.url_object is node.url_object
+    restored = pickle.loads(pickle.dumps([root, base, node]))
+    assert restored[2].parent is restored[1] and restored[1].parent is restored[0]
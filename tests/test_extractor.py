@@ -0,0 +1,104 @@
+from urllib.parse import urlparse
+
+import pytest
+
+from secretscraper.config import settings
+from secretscraper.document import Document
+from secretscraper.entity import URLNode
+from secretscraper.extractor import Extractor
+from secretscraper.handler import ReRegexHandler
+from secretscraper.urlparser import RegexURLParser
+
+
+@pytest.fixture
+def url_parser() -> RegexURLParser:
+    rules = list(settings.get("urlFind"))
+    rules.extend(settings.get("jsFind"))
+    rules_dict = {f"urlFinder_{i}": rule for i, rule in enumerate(rules)}
+    return RegexURLParser(ReRegexHandler(rules_dict, use_groups=True))
+
+
+@pytest.fixture
+def base_node() -> URLNode:
+    return URLNode(
+        url="http://127.0.0.1:8888/",
+        url_object=urlparse("http://127.0.0.1:8888/"),
+        depth=0,
+        parent=None,
+    )
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("executor_type", ["thread", "process"])
+async def test_extractor_executor_matches_inline(
+    executor_type, regex_dict, url_parser, base_node, html_text
+):
+    handler = ReRegexHandler(regex_dict, use_groups=True)
+    inline = await Extractor(handler, url_parser).extract(base_node, html_text, True)
+    extractor = Extractor(handler, url_parser, executor_type=executor_type, max_workers=1)
+    try:
+        result = await extractor.extract(base_node, html_text, True)
+    finally:
+        extractor.shutdown()
+
+    assert inline.title == "Hacker News"
+    assert result.title == inline.title
+    assert result.secrets == inline.secrets
+    assert result.children == inline.children
+    assert {child.url for child in result.children} == {child.url for child in inline.children}
+    assert all(child.parent is base_node and child.depth == 1 for child in result.children)
+
+
+@pytest.mark.asyncio
+async def test_extractor_skips_links_if_not_extend(regex_dict, url_parser, base_node, html_text):
+    extractor = Extractor(ReRegexHandler(regex_dict), url_parser)
+    result = await extractor.extract(base_node, html_text, False)
+
+    assert result.children == set()
+
+
+def test_extractor_rejects_unknown_executor(regex_dict, url_parser):
+    with pytest.raises(ValueError):
+        Extractor(ReRegexHandler(regex_dict), url_parser, executor_type="gpu")
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("executor_type", ["", "process"])
+async def test_extractor_memoizes_identical_bodies(executor_type, regex_dict, url_parser, base_node, html_text):
+    other_host = URLNode(url="https://cdn.example.org/", url_object=urlparse("https://cdn.example.org/"), depth=0)
+    extractor = Extractor(ReRegexHandler(regex_dict, use_groups=True), url_parser, executor_type=executor_type)
+    try:
+        first = await extractor.extract(base_node, html_text, True)
+        second = await extractor.extract(other_host, html_text, True)
+    finally:
+        extractor.shutdown()
+    expected = Extractor(ReRegexHandler(regex_dict, use_groups=True), url_parser, memo_size=0)
+
+    assert extractor.memo_hits == 1 and extractor.memo_misses == 1
+    assert second.secrets == first.secrets and second.title == first.title
+    assert second.children == (await expected.extract(other_host, html_text, True)).children
+    assert second.children != first.children
+    assert all(child.parent is other_host for child in second.children)
+
+
+@pytest.mark.asyncio
+async def test_extractor_memo_is_bounded(regex_dict, url_parser, base_node):
+    extractor = Extractor(ReRegexHandler(regex_dict), url_parser, memo_size=2)
+    for text in ["a", "b", "c", "a"]:
+        await extractor.extract(base_node, text, True)
+    await extractor.extract(base_node, "a", False)  # links of "a" are memoized too
+
+    assert extractor.memo_hits == 1 and extractor.memo_misses == 4
+    assert len(extractor._memo) == 2
+
+
+@pytest.mark.asyncio
+async def test_extractor_memo_keys_on_the_encoding(regex_dict, url_parser, base_node):
+    extractor = Extractor(ReRegexHandler(regex_dict), url_parser)
+    body = "<title>café</title>".encode("utf-8")
+    utf8 = await extractor.extract(base_node, Document(content=body, encoding="utf-8"), False)
+    latin1 = await extractor.extract(base_node, Document(content=body, encoding="latin-1"), False)
+    await extractor.extract(base_node, Document(content=body, encoding="UTF8"), False)
+
+    assert utf8.title == "café" and latin1.title == "cafÃ©"
+    assert extractor.memo_hits == 1 and extractor.memo_misses == 2
@@ -204,6 +204,10 @@ def test_crawler_facade_update_settings(
             ["-u", "http://127.0.0.1:8888", "-H"],
             [(lambda crawler: True, True)],
         ),
+        (
+            ["-u", "http://127.0.0.1:8888", "--shards", "2"],
+            [(lambda crawler: crawler.num_shards, 2), (lambda crawler: crawler.total_page, 1)],
+        ),
         (
             ["-u", "http://127.0.0.1:8888", "--detail"],
             [(lambda crawler: True, True)],
@@ -300,3 +304,29 @@ def test_local_scan(clicker: CliRunner, resource_text: str):
             raise result.exception
         logger.info(result.output)
         logger.info(result)
+
+
+def test_crawler_facade_regex_settings(clicker: CliRunner, tmp_path: pathlib.Path):
+    from secretscraper.config import settings
+
+    config = tmp_path / "settings.yml"
+    config.write_text("regex_combined: false\nregex_prefilter: false\n")
+    try:
+        result = clicker.invoke(main, ["-i", str(config), "-u", "http://127.0.0.1:8888"])
+        if result.exception is not None:
+            raise result.exception
+        from secretscraper.cmdline import facade_obj
+
+        assert facade_obj.crawler.handler.combined is None
+        assert facade_obj.crawler.handler.prefilter is None
+    finally:
+        settings.set("regex_combined", True)
+        settings.set("regex_prefilter", True)
+
+    result = clicker.invoke(main, ["-u", "http://127.0.0.1:8888"])
+    if result.exception is not None:
+        raise result.exception
+    from secretscraper.cmdline import facade_obj
+
+    assert facade_obj.crawler.handler.combined is not None
+    assert facade_obj.crawler.handler.prefilter is not None
@@ -0,0 +1,83 @@
+import asyncio
+from urllib.parse import urlparse
+
+import pytest
+
+from secretscraper.entity import URLNode
+from secretscraper.frontier import Frontier
+from secretscraper.scheduler import create_scheduler
+
+
+def make_node(url: str, depth: int = 0) -> URLNode:
+    return URLNode(url=url, url_object=urlparse(url), depth=depth, parent=None)
+
+
+@pytest.mark.asyncio
+async def test_frontier_returns_none_when_empty_and_idle():
+    frontier = Frontier()
+
+    assert frontier.is_finish is True
+    assert await frontier.get() is None
+
+
+@pytest.mark.asyncio
+async def test_frontier_tracks_in_flight_nodes():
+    frontier = Frontier()
+    frontier.put(make_node("http://127.0.0.1/a"))
+
+    node = await frontier.get()
+    assert node.url == "http://127.0.0.1/a"
+    assert frontier.empty() is True
+    assert frontier.in_flight == 1
+    assert frontier.is_finish is False
+
+    frontier.task_done()
+    assert frontier.is_finish is True
+    with pytest.raises(ValueError):
+        frontier.task_done()
+
+
+@pytest.mark.asyncio
+async def test_frontier_wakes_getter_on_put():
+    frontier = Frontier()
+    frontier.put(make_node("http://127.0.0.1/a"))
+    await frontier.get()
+
+    getter = asyncio.create_task(frontier.get())
+    await asyncio.sleep(0)
+    assert getter.done() is False
+
+    frontier.put(make_node("http://127.0.0.1/b", depth=1))
+    child = await asyncio.wait_for(getter, timeout=0.05)
+    assert child.url == "http://127.0.0.1/b"
+
+    frontier.task_done()
+    frontier.task_done()
+    await asyncio.wait_for(frontier.join(), timeout=0.05)
+
+
+@pytest.mark.asyncio
+async def test_frontier_completes_waiting_getter_when_last_task_done():
+    frontier = Frontier()
+    frontier.put(make_node("http://127.0.0.1/a"))
+    await frontier.get()
+
+    getter = asyncio.create_task(frontier.get())
+    await asyncio.sleep(0)
+    frontier.task_done()
+
+    assert await asyncio.wait_for(getter, timeout=0.05) is None
+
+
+@pytest.mark.asyncio
+async def test_frontier_takes_nodes_in_scheduler_order():
+    frontier = Frontier(create_scheduler("bfs"))
+    frontier.put(make_node("http://127.0.0.1/deep", depth=2))
+    frontier.put(make_node("http://127.0.0.1/top", depth=0))
+
+    assert frontier.qsize() == 2
+    assert (await frontier.get()).url == "http://127.0.0.1/top"
+    assert (await frontier.get()).url == "http://127.0.0.1/deep"
+    frontier.task_done()
+    frontier.task_done()
+    assert await frontier.get() is None
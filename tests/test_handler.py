@@ -1,6 +1,8 @@
 import asyncio
 import concurrent.futures
 import logging
+import pickle
+import re
 import sys
 import typing
 
@@ -8,6 +10,7 @@ import pytest
 from bs4 import BeautifulSoup
 
 from secretscraper import handler as handler_module
+from secretscraper.document import as_document
 from secretscraper.entity import Secret
 from secretscraper.exception import HandlerException
 from secretscraper.handler import BSHandler, BSResult, ReRegexHandler, get_regex_handler
@@ -30,6 +33,67 @@ def test_re_regex_handler(regex_dict, resource_text):
     assert len(keys) == len(regex_dict)
 
 
+@pytest.mark.parametrize("use_groups", [True, False])
+def test_re_regex_handler_combined(regex_dict, resource_text, html_text, use_groups):
+    url_rules = {f"url_{i}": rule for i, rule in enumerate(settings.get("urlFind") + settings.get("jsFind"))}
+    for rules in (regex_dict, url_rules):
+        handler = ReRegexHandler(rules=rules, use_groups=use_groups)
+        combined = ReRegexHandler(rules=rules, use_groups=use_groups, combined=True)
+        assert len(combined.combined.group_rules) > 1
+        for text in (resource_text, html_text):
+            assert list(combined.handle(text)) == list(handler.handle(text))
+
+
+def test_re_regex_handler_combined_overlapping_rules():
+    rules = {
+        "Quoted": r"['\"](\w+)['\"]",
+        "Prefix": r"'ab",
+        "Word": r"[a-z]+\d",
+        "Either": r"b(c)|x(y)",
+        "Backreference": r"(['\"])\w+\1",
+        "Anywhere": r"\d+",
+    }
+    text = "'abc' \"xy\" 'ab1' abc2 \"b\"c"
+    for use_groups in (True, False):
+        handler = ReRegexHandler(rules=rules, use_groups=use_groups)
+        combined = ReRegexHandler(rules=rules, use_groups=use_groups, combined=True)
+        assert combined.combined.separate == [4, 5]
+        assert list(combined.handle(text)) == list(handler.handle(text))
+
+
+def test_required_literals():
+    def literals(regex: str):
+        return handler_module._required_literals(re.compile(regex, re.IGNORECASE))
+
+    assert literals(r"\b((accesskeyid)|(accesskeysecret)|\b(LTAI[a-z0-9]{12,20}))\b") == [
+        "LTAI",
+        "accesskeyid",
+        "accesskeysecret",
+    ]
+    assert literals(r"\b([\w/]+?\.js\.map)") == [".js.map"]
+    assert literals(r"(ab)+c?d|x{2}") == ["ab", "x"]
+    assert literals(r"[\"'][0-9a-z]{32}") is None
+    assert literals(r"a?b*|c") is None
+    assert literals(r"(?!abc)\d+") is None
+
+
+@pytest.mark.parametrize("combined", [False, True])
+def test_re_regex_handler_prefilter(regex_dict, resource_text, html_text, combined):
+    handler = ReRegexHandler(rules=regex_dict, use_groups=True)
+    prefiltered = ReRegexHandler(rules=regex_dict, use_groups=True, combined=combined, prefilter=True)
+    for text in (resource_text, html_text, "İTEM='ſwaggerUi' ıd"):
+        assert list(prefiltered.handle(text)) == list(handler.handle(text))
+    assert prefiltered.prefilter.active(as_document(html_text).folded).count(False) > 0
+
+
+def test_re_regex_handler_prefilter_declared_literals():
+    rules = {"Key": r"k\w+", "Token": r"t\w+"}
+    handler = ReRegexHandler(rules=rules, use_groups=True, prefilter=True, literals={"Key": ["key_"]})
+    # the declared literals replace the k found in the regex
+    assert [secret.data for secret in handler.handle("kid token")] == ["token"]
+    assert [secret.data for secret in handler.handle("kid key_1")] == ["kid", "key_1"]
+
+
 def test_hyperscan_regex_handler(regex_dict, resource_text):
     if not is_hyperscan():
         return
@@ -49,6 +113,79 @@ def test_hyperscan_regex_handler(regex_dict, resource_text):
     assert len(result_types) == len(regex_dict)
 
 
+def test_hyperscan_regex_handler_non_ascii_offsets():
+    if not is_hyperscan():
+        return
+    from secretscraper.document import Document
+    from secretscraper.handler import HyperscanRegexHandler
+
+    handler = HyperscanRegexHandler(rules={"Key": r"key_\w+;"})
+    text = "中文 key_abc; ключ key_d;"
+    content = text.encode("utf-8")
+    expected = [("key_abc;", (7, 15)), ("key_d;", (25, 31))]
+    for source in (text, content, Document(content=content)):
+        assert [(secret.data, secret.span) for secret in handler.handle(source)] == expected
+
+
+def test_hyperscan_regex_handler_cache(regex_dict, resource_text, tmp_path, monkeypatch):
+    if not is_hyperscan():
+        return
+    import hyperscan
+    from secretscraper.handler import HyperscanRegexHandler
+
+    compiled = HyperscanRegexHandler(rules=regex_dict, cache_dir=tmp_path)
+    assert compiled.cache_path.is_file()
+    monkeypatch.setattr(hyperscan, "Database", lambda *args, **kwargs: pytest.fail("compiled again"))
+    loaded = HyperscanRegexHandler(rules=regex_dict, cache_dir=tmp_path)
+    assert set(loaded.handle(resource_text)) == set(compiled.handle(resource_text))
+    unpickled = pickle.loads(pickle.dumps(compiled))
+    assert set(unpickled.handle(resource_text)) == set(compiled.handle(resource_text))
+    monkeypatch.undo()
+
+    # other rules or a corrupted file are compiled again
+    assert HyperscanRegexHandler(rules={"Key": r"key_\w+"}, cache_dir=tmp_path).cache_path != compiled.cache_path
+    compiled.cache_path.write_bytes(b"corrupted")
+    recompiled = HyperscanRegexHandler(rules=regex_dict, cache_dir=tmp_path)
+    assert set(recompiled.handle(resource_text)) == set(compiled.handle(resource_text))
+    assert compiled.cache_path.read_bytes() != b"corrupted"
+
+
+@pytest.mark.parametrize("chunk_size", [1, 7, 4096])
+def test_hyperscan_regex_handler_stream(regex_dict, resource_text, chunk_size):
+    if not is_hyperscan():
+        return
+    from secretscraper.handler import HyperscanRegexHandler, StreamHandler
+
+    handler = HyperscanRegexHandler(rules=regex_dict)
+    assert isinstance(handler, StreamHandler)
+    content = resource_text.encode("utf-8")
+    chunks = [content[i : i + chunk_size] for i in range(0, len(content), chunk_size)]
+    secrets = list(handler.scan_stream(chunks))
+    assert set(secrets) == set(handler.handle(resource_text))
+    assert all(content[secret.span[0] : secret.span[1]].decode("utf-8") == secret.data for secret in secrets)
+
+    async def async_chunks():
+        for chunk in chunks:
+            yield chunk
+
+    async def scan():
+        return [secret async for secret in handler.ascan_stream(async_chunks())]
+
+    assert asyncio.run(scan()) == secrets
+
+
+def test_hyperscan_regex_handler_stream_long_match():
+    if not is_hyperscan():
+        return
+    from secretscraper.handler import HyperscanRegexHandler
+
+    handler = HyperscanRegexHandler(rules={"Key": r"key_\w+;"})
+    chunks = ["x key_", "a" * 20, "; key_b;", " key_"]
+    secrets = list(handler.scan_stream(chunks, max_match_size=8))
+    # the first match is cut to the 8 bytes kept before its last chunk, its offsets are still right
+    assert [(secret.data, secret.span) for secret in secrets] == [("aaaaaaaa;", (2, 27)), ("key_b;", (28, 34))]
+
+
 def test_get_regex_handler_explicit_regex(regex_dict):
     handler = get_regex_handler(regex_dict, type_="regex")
 
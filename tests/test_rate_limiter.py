@@ -37,3 +37,17 @@ async def test_domain_rate_limiter_enforces_min_interval():
         timestamps.append(time.monotonic())
 
     assert timestamps[1] - timestamps[0] >= 0.045
+
+
+@pytest.mark.asyncio
+async def test_domain_rate_limiter_records_wait():
+    limiter = DomainRateLimiter(max_concurrent_per_domain=1, min_interval=0.05)
+
+    async def worker():
+        async with limiter.acquire("http://127.0.0.1/test"):
+            pass
+
+    await asyncio.gather(*(worker() for _ in range(3)))
+
+    assert limiter.total_wait >= 0.09
+    assert 0 < limiter.mean_wait < limiter.total_wait
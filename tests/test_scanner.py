@@ -0,0 +1,33 @@
+import pytest
+
+from secretscraper.handler import ReRegexHandler
+from secretscraper.scanner import FileScanner
+from secretscraper.util import is_hyperscan
+
+
+@pytest.fixture
+def files(tmp_path, resource_text):
+    text_file = tmp_path / "source_text.txt"
+    text_file.write_text(resource_text, encoding="utf8")
+    empty_file = tmp_path / "empty.txt"
+    empty_file.write_text("")
+    return [text_file, empty_file]
+
+
+def test_file_scanner(regex_dict, files):
+    scanner = FileScanner(files, ReRegexHandler(rules=regex_dict, use_groups=False))
+    scanner.start()
+    assert list(scanner.secrets) == [files[0]]
+    assert {secret.type for secret in scanner.secrets[files[0]]} == set(regex_dict)
+
+
+def test_file_scanner_reads_chunks_for_stream_handler(regex_dict, files, resource_text):
+    if not is_hyperscan():
+        return
+    from secretscraper.handler import HyperscanRegexHandler
+
+    handler = HyperscanRegexHandler(rules=regex_dict)
+    scanner = FileScanner(files, handler, chunk_size=7)
+    scanner.start()
+    assert list(scanner.secrets) == [files[0]]
+    assert scanner.secrets[files[0]] == set(handler.handle(resource_text))
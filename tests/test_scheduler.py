@@ -0,0 +1,115 @@
+import gc
+from urllib.parse import urlparse
+
+import pytest
+
+from secretscraper.entity import URLNode
+from secretscraper.scheduler import FIFOScheduler, RoundRobinScheduler, SpillingScheduler, create_scheduler
+
+
+def node(url: str, depth: int = 0) -> URLNode:
+    return URLNode(url=url, url_object=urlparse(url), depth=depth)
+
+
+def drain(scheduler) -> list:
+    return [scheduler.pop().url for _ in range(len(scheduler))]
+
+
+def test_fifo_and_bfs():
+    urls = [("http://a.com/2", 2), ("http://a.com/1", 1), ("http://a.com/0", 0), ("http://a.com/1b", 1)]
+    fifo, bfs = create_scheduler("fifo"), create_scheduler("bfs")
+    for url, depth in urls:
+        fifo.push(node(url, depth))
+        bfs.push(node(url, depth))
+
+    assert isinstance(fifo, FIFOScheduler)
+    assert drain(fifo) == [url for url, _ in urls]
+    assert drain(bfs) == ["http://a.com/0", "http://a.com/1", "http://a.com/1b", "http://a.com/2"]
+    with pytest.raises(IndexError):
+        bfs.pop()
+
+
+def test_js_first():
+    scheduler = create_scheduler("js-first", is_js=lambda url_node: url_node.path.endswith(".js"))
+    for url, depth in [("http://a.com/a", 1), ("http://a.com/b.js", 2), ("http://a.com/c", 0), ("http://a.com/d.js", 1)]:
+        scheduler.push(node(url, depth))
+
+    assert drain(scheduler) == ["http://a.com/d.js", "http://a.com/b.js", "http://a.com/c", "http://a.com/a"]
+    with pytest.raises(ValueError):
+        create_scheduler("js-first")
+    with pytest.raises(ValueError):
+        create_scheduler("lifo")
+
+
+def test_round_robin_across_hosts():
+    scheduler = create_scheduler("round-robin")
+    assert isinstance(scheduler, RoundRobinScheduler)
+    for i in range(3):
+        scheduler.push(node(f"http://big.com/{i}"))
+    scheduler.push(node("http://small.com/0"))
+    order = [scheduler.pop().url]
+    scheduler.push(node("http://other.com/0"))  # a new host joins the rotation
+
+    order += drain(scheduler)
+    assert order == ["http://big.com/0", "http://small.com/0", "http://big.com/1", "http://other.com/0", "http://big.com/2"]
+    assert len(scheduler) == 0
+    with pytest.raises(IndexError):
+        scheduler.pop()
+
+
+def test_spilling_scheduler_keeps_policy_order():
+    fifo = create_scheduler("fifo", max_in_memory=3)
+    bfs = create_scheduler("bfs", max_in_memory=3)
+    nodes = [node(f"http://a.com/{i}", depth=(7 - i) % 4) for i in range(10)]
+    for url_node in nodes:
+        fifo.push(url_node)
+        bfs.push(url_node)
+
+    assert isinstance(fifo, SpillingScheduler) and len(fifo) == 10 and fifo.spills == 7
+    assert drain(fifo) == [url_node.url for url_node in nodes]
+    assert fifo.page_ins == 3
+    # spilled shallower nodes are paged in ahead of the deeper ones still in memory
+    assert bfs.peek().depth == 1 and bfs.spills == 7
+    assert [n.depth for n in (bfs.pop() for _ in range(10))] == [0, 0, 1, 1, 2, 2, 2, 3, 3, 3]
+    with pytest.raises(IndexError):
+        fifo.peek()
+    fifo.close()
+    bfs.close()
+
+
+def test_spilling_scheduler_returns_live_nodes_and_rebuilds_collected_ones(tmp_path):
+    path = tmp_path / "frontier.sqlite3"
+    scheduler = create_scheduler("fifo", max_in_memory=1, spill_path=path)
+    root = node("http://a.com/")
+    scheduler.push(root)
+    kept = URLNode(url="http://a.com/kept", depth=1, parent=root)
+    scheduler.push(kept)
+    scheduler.push(URLNode(url="http://a.com/dropped?q=1", depth=1, parent=root))
+    gc.collect()
+
+    assert scheduler.pop() is root
+    assert scheduler.pop() is kept
+    dropped = scheduler.pop()
+    assert dropped.url == "http://a.com/dropped?q=1" and dropped.depth == 1 and dropped.parent is root
+    scheduler.close()
+    assert path.exists()
+
+    temporary = create_scheduler("round-robin", max_in_memory=1)
+    temporary.close()
+    assert not temporary.path.exists()
+
+
+def test_spilling_round_robin_forgets_drained_hosts(monkeypatch):
+    monkeypatch.setattr(SpillingScheduler, "_PAGE_BATCH", 2)
+    scheduler = create_scheduler("round-robin", max_in_memory=10)
+    for i in range(10):
+        scheduler.push(node(f"http://first.com/{i}"))  # fill the in-memory scheduler
+    for i in range(3):
+        scheduler.push(node(f"http://big.com/{i}"))
+    scheduler.push(node("http://small.com/0"))
+
+    order = drain(scheduler)[10:]
+    assert order == ["http://big.com/0", "http://small.com/0", "http://big.com/1", "http://big.com/2"]
+    assert scheduler.page_ins == 2  # two at a time
+    assert len(scheduler.priority) == 0
+    scheduler.close()
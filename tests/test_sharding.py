@@ -0,0 +1,45 @@
+import pytest
+
+from secretscraper.crawler import Crawler
+from secretscraper.sharding import ShardedCrawler, shard_of
+
+
+def test_shard_of_is_stable():
+    assert shard_of("a.com", 4) == shard_of("A.com", 4)
+    assert {shard_of(f"host{i}.com", 4) for i in range(100)} == {0, 1, 2, 3}
+    assert shard_of("a.com", 1) == 0
+
+
+def test_sharded_crawl_matches_single_process(hosts, crawler_kwargs, crawl_results):
+    # shards owning one host each
+    hostnames = [host.split(":")[0] for host in hosts]
+    num_shards = next(n for n in range(2, 10) if shard_of(hostnames[0], n) != shard_of(hostnames[1], n))
+    start_url = f"http://{hosts[0]}/index.html"
+    single = Crawler(**crawler_kwargs(start_url))
+    single.start()
+    sharded = ShardedCrawler(num_shards=num_shards, **crawler_kwargs(start_url))
+    sharded.start()
+
+    assert sharded.total_page == single.total_page == 13
+    assert sharded.stats.pages == 13
+    assert crawl_results(sharded) == crawl_results(single)
+    assert all(
+        child.parent is parent for parent, children in sharded.url_dict.items() for child in children
+    )
+
+
+def test_sharded_crawler_rejects_checkpoint(crawler_kwargs, tmp_path):
+    with pytest.raises(ValueError):
+        ShardedCrawler(num_shards=2, checkpoint=str(tmp_path / "crawl.sqlite3"), **crawler_kwargs("http://a.com/"))
+
+
+def test_sharded_coordinator_forks_without_client_or_disk_cache(hosts, crawler_kwargs, tmp_path):
+    path = tmp_path / "cache.sqlite3"
+    sharded = ShardedCrawler(num_shards=2, disk_cache=str(path), **crawler_kwargs(f"http://{hosts[0]}/index.html"))
+    assert sharded.client is None and sharded.disk_cache is None
+    sharded.start()
+
+    assert sharded.total_page == 13
+    assert sharded.client is None
+    assert sharded.disk_cache is not None and sharded.disk_cache.path == path
+    sharded.disk_cache.close()
@@ -0,0 +1,55 @@
+import asyncio
+
+import httpx
+import pytest
+
+from secretscraper.frontier import Frontier
+from secretscraper.stats import CrawlStats, ProgressReporter
+
+
+def test_crawl_stats_counters():
+    frontier = Frontier()
+    frontier.put("a")
+    frontier.put("b")
+    stats = CrawlStats(frontier)
+    stats.record_page(100)
+    stats.record_page(50)
+    stats.record_secrets(3)
+    stats.record_error(httpx.ConnectError("refused"))
+    stats.record_error(httpx.ConnectError("refused"))
+    stats.record_error(TimeoutError())
+
+    assert stats.pages == 2 and stats.bytes == 150 and stats.secrets == 3
+    assert stats.queue_depth == 2 and stats.in_flight == 0
+    assert stats.errors == {"ConnectError": 2, "TimeoutError": 1}
+    summary = stats.summary()
+    assert "Pages: 2" in summary and "Queue: 2" in summary and "ConnectError: 2" in summary
+
+
+def test_crawl_stats_workers_and_latency():
+    stats = CrawlStats()
+    stats.set_workers(10)
+    for num in (15, 22, 12):
+        stats.record_workers(num)
+    stats.record_fetch(1.0)
+
+    assert (stats.workers, stats.peak_workers, stats.scale_ups, stats.scale_downs) == (12, 22, 2, 1)
+    assert 0 < stats.fetch_latency < 1
+    assert "Workers: 12" in stats.summary()
+
+
+@pytest.mark.asyncio
+async def test_progress_reporter_reports_on_a_timer():
+    reports = []
+    reporter = ProgressReporter(CrawlStats(), interval=0.01, report=reports.append)
+    reporter.start(asyncio.get_running_loop())
+    await asyncio.sleep(0.055)  # nothing else happens on the loop meanwhile
+    reporter.stop()
+    count = len(reports)
+    await asyncio.sleep(0.02)
+
+    assert count >= 2 and len(reports) == count
+    assert reporter.future is None
+    disabled = ProgressReporter(CrawlStats(), interval=0, report=reports.append)
+    disabled.start(asyncio.get_running_loop())
+    assert disabled.future is None
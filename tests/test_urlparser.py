@@ -1,10 +1,12 @@
 import logging
 from urllib.parse import urlparse
 
+import pytest
+
 from secretscraper.config import settings
 from secretscraper.entity import URLNode
 from secretscraper.handler import ReRegexHandler
-from secretscraper.urlparser import RegexURLParser, URLParser
+from secretscraper.urlparser import Link, RegexURLParser, URLParser
 
 logger = logging.getLogger(__file__)
 
@@ -48,3 +50,33 @@ def test_regex_urlparser(local_html_text: str, local_http_server_base_url: str):
     res = "\n".join(str(url) for url in urls)
     logger.info(f"{res}")
     assert len(urls) > 0
+
+
+def test_urlparser_stream_engine_matches_bs4(html_text: str):
+    base_url = URLNode(
+        url="https://news.ycombinator.com/", url_object=urlparse("https://news.ycombinator.com/"), depth=0
+    )
+
+    stream_urls = URLParser(engine="stream").extract_urls(base_url, html_text)
+    bs4_urls = URLParser(engine="bs4").extract_urls(base_url, html_text)
+
+    assert len(stream_urls) > 0
+    assert stream_urls == bs4_urls
+    assert {url.url for url in stream_urls} == {url.url for url in bs4_urls}
+
+
+def test_urlparser_rejects_unknown_engine():
+    with pytest.raises(ValueError):
+        URLParser(engine="lxml")
+
+
+def test_urlparser_links_are_rebased_per_url():
+    parser = URLParser()
+    links = parser.extract_links('<a href="/a?q=1"></a><a href="http://x.com/b"></a><a href="/logo.png"></a>')
+
+    assert links == {Link(None, None, "/a", "", "q=1", ""), Link("http", "x.com", "/b", "", "", "")}
+    for base in ["http://127.0.0.1:8888/", "https://y.org/dir/"]:
+        base_url = URLNode(url=base, url_object=urlparse(base), depth=1)
+        children = parser.rebase(base_url, links)
+        assert {child.url for child in children} == {f"{base_url.scheme}://{base_url.netloc}/a?q=1", "http://x.com/b"}
+        assert all(child.depth == 2 and child.parent is base_url for child in children)
@@ -1,4 +1,5 @@
-from secretscraper.util import read_rules_from_setting, start_local_test_http_server
+from secretscraper.util import read_rule_literals_from_setting, read_rules_from_setting, start_local_test_http_server
+import dynaconf
 import requests
 
 from . import settings
@@ -9,6 +10,20 @@ def test_read_rules_from_setting():
     assert len(d) > 0
 
 
+def test_read_rule_literals_from_setting():
+    custom = dynaconf.Dynaconf()
+    custom.set(
+        "rules",
+        [
+            {"name": "Key", "regex": r"key_\w+", "loaded": True, "literals": ["key_"]},
+            {"name": "Token", "regex": r"tok_\w+", "loaded": False, "literals": ["tok_"]},
+            {"name": "Any", "regex": r"\w+", "loaded": True},
+        ],
+    )
+    assert read_rule_literals_from_setting(custom) == {"Key": ["key_"]}
+    assert read_rule_literals_from_setting(settings) == {}
+
+
 def test_start_local_test_http_server():
     thread, httpd = start_local_test_http_server("127.0.0.1", 8888)
     res = requests.get("http://127.0.0.1:8888/index.html", timeout=5)